@@ -43,11 +43,11 @@ import os
 
 # Import first to avoid circular imports
 from . import util
-from .utils import exceptions, decorators, traitlets, signals
+from .utils import exceptions, decorators, traitlets, signals, validation
 
 import logging.config
 from .base import ParameterProvider
-from .nasapower import NASAPowerWeatherDataProvider
+from .nasapower import NASAPowerWeatherDataProvider, provider_registry
 from . import fileinput
 from . import agromanager
 from . import soil
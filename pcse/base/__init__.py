@@ -6,10 +6,10 @@ when creating PCSE simulation units.
 Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
-from .variablekiosk import VariableKiosk
+from .variablekiosk import VariableKiosk, VariableBuffer
 from .engine import BaseEngine
 from .parameter_providers import ParameterProvider, MultiCropDataProvider, MultiSiteDataProvider
 from .simulationobject import SimulationObject, AncillaryObject
 from .states_rates import StatesTemplate, RatesTemplate, StatesWithImplicitRatesTemplate, ParamTemplate
-from .dispatcher import DispatcherObject
+from .dispatcher import DispatcherObject, SignalBus
 from .timer import Timer
\ No newline at end of file
@@ -3,7 +3,133 @@
 Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
-from ..pydispatch import dispatcher
+import types
+import weakref
+
+from ..pydispatch import robustapply
+
+class SignalBus(object):
+    """Connects handlers to signals and sends signals to them for the
+    components of a single model instance.
+
+    Every VariableKiosk holds its own SignalBus, which replaces the
+    module-global tables of pydispatch. Sending a signal therefore only visits
+    the handlers connected to that signal within the same model instance and
+    the bus is garbage collected together with the Engine.
+
+    Handlers are referenced weakly, so components that are no longer part of
+    the simulation stop receiving signals once they are garbage collected.
+    The arguments accepted by a handler are determined once when it is
+    connected. On sending, keyword arguments that the handler does not accept
+    are dropped, while `signal` and `sender` are passed to handlers that have
+    arguments with those names, just like `pydispatch.dispatcher.send()`.
+    Connecting a handler that is already connected to a signal moves it to the
+    end of the list of handlers of that signal.
+    """
+
+    def __init__(self):
+        # signal -> list of [key, ref, func, argnames, filters, varkw]. For
+        # bound methods ref is a weak reference to the instance and func the
+        # function, otherwise ref refers to the handler and func is None.
+        # filters caches the accepted names per set of keyword arguments.
+        self._receivers = {}
+
+    def _make_receiver(self, handler):
+        """Returns the receiver record for handler with its precomputed
+        argument filtering.
+        """
+        _, code, start = robustapply.function(handler)
+        argnames = code.co_varnames[start:code.co_argcount]
+        varkw = bool(code.co_flags & 8)
+
+        if isinstance(handler, types.MethodType):
+            key = (id(handler.__self__), id(handler.__func__))
+            ref = weakref.ref(handler.__self__)
+            func = handler.__func__
+        else:
+            key = id(handler)
+            func = None
+            try:
+                ref = weakref.ref(handler)
+            except TypeError:
+                ref = lambda: handler
+        return [key, ref, func, argnames, {}, varkw]
+
+    def connect(self, handler, signal):
+        """Connects handler to signal.
+
+        :param handler: the callable to call when signal is sent
+        :param signal: the signal to which the handler should respond
+        """
+        receiver = self._make_receiver(handler)
+        receivers = self._receivers.setdefault(signal, [])
+        self._remove(receivers, receiver[0])
+        receivers.append(receiver)
+
+    def disconnect(self, handler, signal):
+        """Disconnects handler from signal, if it is connected.
+        """
+        receivers = self._receivers.get(signal)
+        if receivers:
+            self._remove(receivers, self._make_receiver(handler)[0])
+
+    def _remove(self, receivers, key):
+        for i, receiver in enumerate(receivers):
+            if receiver[0] == key and receiver[1]() is not None:
+                del receivers[i]
+                return
+
+    def send(self, signal, sender, *args, **kwargs):
+        """Sends signal to all live handlers connected to it.
+
+        :param signal: the signal to send
+        :param sender: the sender of the signal, passed to handlers with a
+            `sender` argument
+        :param args: positional arguments passed to all handlers
+        :param kwargs: keyword arguments, passed to the handlers that accept
+            them
+        """
+        receivers = self._receivers.get(signal)
+        if not receivers:
+            return
+
+        dead = False
+        named = dict(kwargs, signal=signal, sender=sender)
+        keys = tuple(named)
+        # Handlers connected while sending receive this signal as well
+        for _, ref, func, argnames, filters, varkw in receivers:
+            handler = ref()
+            if handler is None:
+                dead = True
+                continue
+            if func is not None:
+                handler = types.MethodType(func, handler)
+            if varkw:
+                handler(*args, **named)
+                continue
+            if args:
+                accepted = argnames[len(args):]
+                handler(*args, **{k: v for k, v in named.items() if k in accepted})
+                continue
+            # Names of the keyword arguments accepted for this set of keywords
+            names = filters.get(keys)
+            if names is None:
+                names = filters[keys] = tuple(k for k in keys if k in argnames)
+            handler(**{k: named[k] for k in names})
+
+        if dead:
+            receivers[:] = [r for r in receivers if r[1]() is not None]
+
+    def receivers(self):
+        """Returns a list of (signal, handler) pairs for all live handlers.
+        """
+        live = []
+        for signal, receivers in self._receivers.items():
+            for _, ref, func, _, _, _ in receivers:
+                handler = ref()
+                if handler is not None:
+                    live.append((signal, handler if func is None else types.MethodType(func, handler)))
+        return live
 
 class DispatcherObject(object):
     """Class only defines the _send_signal() and _connect_signal() methods.
@@ -12,23 +138,66 @@ class DispatcherObject(object):
     """
 
     def _send_signal(self, signal, *args, **kwargs):
-        """Send <signal> using the dispatcher module.
+        """Send <signal> using the SignalBus of the VariableKiosk.
 
         The VariableKiosk of this SimulationObject is used as the sender of
         the signal. Additional arguments to the _send_signal() method are
-        passed to dispatcher.send()
+        passed to SignalBus.send()
         """
 
         self.logger.debug("Sent signal: %s" % signal)
-        dispatcher.send(signal=signal, sender=self.kiosk, *args, **kwargs)
+        self.kiosk.signal_bus.send(signal, self.kiosk, *args, **kwargs)
 
     def _connect_signal(self, handler, signal):
-        """Connect the handler to the signal using the dispatcher module.
+        """Connect the handler to the signal using the SignalBus of the
+        VariableKiosk.
 
         The handler will only react on signals that have the SimulationObjects
         VariableKiosk as sender. This ensure that different PCSE model instances
         in the same runtime environment will not react to each others signals.
         """
 
-        dispatcher.connect(handler, signal, sender=self.kiosk)
+        self.kiosk.signal_bus.connect(handler, signal)
         self.logger.debug("Connected handler '%s' to signal '%s'." % (handler, signal))
+
+    def _connect_clones(self, kiosk, clones):
+        """Connect the clones of all handlers that listen to the VariableKiosk of
+        this object to the same signals sent by <kiosk>.
+
+        :param kiosk: the VariableKiosk used as sender by the cloned objects
+        :param clones: dict mapping id(original object) to its clone. Handlers
+            bound to objects not in <clones> are not connected.
+        """
+        for signal, receiver in self.kiosk.signal_bus.receivers():
+            owner = getattr(receiver, "__self__", None)
+            if id(owner) in clones:
+                handler = getattr(clones[id(owner)], receiver.__name__)
+                kiosk.signal_bus.connect(handler, signal)
+
+    def _disconnect_receivers(self, owners):
+        """Disconnect all handlers bound to one of the objects in <owners>.
+
+        Only connections that have the VariableKiosk of this object as sender
+        are considered. This is used to silence components that are no longer
+        part of a simulation (e.g. after an Engine has been restored) but that
+        may not have been garbage collected yet.
+        """
+        owner_ids = set(id(owner) for owner in owners)
+        bus = self.kiosk.signal_bus
+        for signal, receiver in bus.receivers():
+            if id(getattr(receiver, "__self__", None)) in owner_ids:
+                bus.disconnect(receiver, signal)
+
+    def _connected_owners(self):
+        """Returns the objects that own a handler connected to signals sent by
+        the VariableKiosk of this object.
+
+        This includes objects that are no longer part of the simulation but
+        that have not been garbage collected yet.
+        """
+        owners = {}
+        for _, receiver in self.kiosk.signal_bus.receivers():
+            owner = getattr(receiver, "__self__", None)
+            if owner is not None:
+                owners[id(owner)] = owner
+        return list(owners.values())
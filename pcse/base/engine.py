@@ -17,6 +17,9 @@ from .simulationobject import SimulationObject
 class BaseEngine(HasTraits, DispatcherObject):
     """Base Class for Engine to inherit from
     """
+    # Cached list of the embedded SimulationObjects, see subSimObjects
+    _sub_sim_objects = None
+
     def __init__(self):
         """Initialize class `BaseEngine`
         """
@@ -50,6 +53,9 @@ class BaseEngine(HasTraits, DispatcherObject):
         if attr.startswith("_") or type(value) is types.FunctionType:
             HasTraits.__setattr__(self, attr, value)
         elif hasattr(self, attr):
+            if isinstance(value, SimulationObject) or \
+                    isinstance(self._trait_values.get(attr), SimulationObject):
+                self._sub_sim_objects = None
             HasTraits.__setattr__(self, attr, value)
         else:
             msg = "Assignment to non-existing attribute '%s' prevented." % attr
@@ -58,13 +64,18 @@ class BaseEngine(HasTraits, DispatcherObject):
     @property
     def subSimObjects(self):
         """ Find SimulationObjects embedded within self.
-        """
 
-        subSimObjects = []
-        defined_traits = self.__dict__["_trait_values"]
-        for attr in defined_traits.values():
-            if isinstance(attr, SimulationObject):
-                subSimObjects.append(attr)
+        The list is cached until a SimulationObject is assigned to (or
+        replaced in) one of the attributes.
+        """
+        subSimObjects = self._sub_sim_objects
+        if subSimObjects is None:
+            subSimObjects = []
+            defined_traits = self.__dict__["_trait_values"]
+            for attr in defined_traits.values():
+                if isinstance(attr, SimulationObject):
+                    subSimObjects.append(attr)
+            self._sub_sim_objects = subSimObjects
         return subSimObjects
 
     def get_variable(self, varname):
@@ -4,10 +4,12 @@ and soil modules
 Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
+import copy
 import logging
 from collections import Counter
 from collections.abc import MutableMapping
 from ..utils import exceptions as exc
+from ..utils import validation
 
 class MultiCropDataProvider(dict):
     """Provides base class for Crop Data loading from .yaml files"""
@@ -190,12 +192,47 @@ class ParameterProvider(MutableMapping):
                 msg = "Cannot clear varname '%s' from override" % varname
                 raise exc.PCSEError(msg)
 
+    def copy(self):
+        """Returns a ParameterProvider that shares the crop, site and soil parameter
+        sets with this one, but has its own overrides and crop start/end types.
+        """
+        new = copy.copy(self)
+        new._override = dict(self._override)
+        new._timerdata = dict(self._timerdata)
+        new._maps = [new._override, new._sitedata, new._timerdata, new._soildata, new._cropdata]
+        return new
+
+    def snapshot(self):
+        """Returns a copy of the mutable state of the ParameterProvider.
+
+        This covers the overridden parameters, the crop start/end types and
+        the activation counters. The crop and site parameter sets themselves
+        are not copied as they are reloaded on each CROP_START/SITE_START.
+        """
+        return (dict(self._override), dict(self._timerdata),
+                self._ncrops_activated, self._nsites_activated)
+
+    def restore(self, state):
+        """Restores the mutable state of the ParameterProvider from `state`
+        as returned by `snapshot()`.
+
+        The dictionaries are updated in place as they are referenced by self._maps.
+        """
+        override, timerdata, self._ncrops_activated, self._nsites_activated = state
+        self._override.clear()
+        self._override.update(override)
+        self._timerdata.clear()
+        self._timerdata.update(timerdata)
+
     def _test_uniqueness(self):
         """Check if parameter names are unique and raise an error if duplicates occur.
 
         Note that the uniqueness is not tested for parameters in self._override as this
-        is specifically meant for overriding parameters.
+        is specifically meant for overriding parameters. The test is skipped when the
+        validation level is "fast".
         """
+        if validation.level == validation.FAST:
+            return
         parnames = []
         for mapping in [self._sitedata, self._timerdata, self._soildata, self._cropdata]:
             parnames.extend(mapping.keys())
@@ -39,6 +39,9 @@ class SimulationObject(HasTraits, DispatcherObject):
     # Placeholder for variables that are to be set during finalizing.
     _for_finalize = Dict()
 
+    # Cached list of the embedded SimulationObjects, see subSimObjects
+    _sub_sim_objects = None
+
     def __init__(self, day: date, kiosk: VariableKiosk, *args, **kwargs):
         """Initialize Simulation Object
         
@@ -104,6 +107,9 @@ class SimulationObject(HasTraits, DispatcherObject):
         if attr.startswith("_") or type(value) is types.FunctionType:
             HasTraits.__setattr__(self, attr, value)
         elif hasattr(self, attr):
+            if isinstance(value, SimulationObject) or \
+                    isinstance(self._trait_values.get(attr), SimulationObject):
+                self._sub_sim_objects = None
             HasTraits.__setattr__(self, attr, value)
         else:
             msg = "Assignment to non-existing attribute '%s' prevented." % attr
@@ -194,13 +200,18 @@ class SimulationObject(HasTraits, DispatcherObject):
     @property
     def subSimObjects(self):
         """ Return SimulationObjects embedded within self.
-        """
 
-        subSimObjects = []
-        defined_traits = self.__dict__["_trait_values"]
-        for attr in defined_traits.values():
-            if isinstance(attr, SimulationObject):
-                subSimObjects.append(attr)
+        The list is built once and rebuilt after a SimulationObject was
+        assigned to (or replaced in) one of the attributes, see `__setattr__()`.
+        """
+        subSimObjects = self._sub_sim_objects
+        if subSimObjects is None:
+            subSimObjects = []
+            defined_traits = self.__dict__["_trait_values"]
+            for attr in defined_traits.values():
+                if isinstance(attr, SimulationObject):
+                    subSimObjects.append(attr)
+            self._sub_sim_objects = subSimObjects
         return subSimObjects
 
     def finalize(self, day):
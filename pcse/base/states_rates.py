@@ -9,7 +9,7 @@ Modified by Will Solow, 2024
 """
 import logging
 
-from ..utils.traitlets import (HasTraits, Float, Int, Instance, Bool, All)
+from ..utils.traitlets import (HasTraits, Float, Int, Instance, Bool, All, TraitError)
 from ..utils import exceptions as exc
 from .variablekiosk import VariableKiosk
 from ..util import Afgen
@@ -31,6 +31,58 @@ def check_publish(publish):
         raise RuntimeError(msg)
     return set(publish)
 
+class BufferedFloat(object):
+    """Descriptor for a Float state/rate variable stored in the VariableBuffer
+    of the kiosk.
+
+    Values are coerced to float like the Float trait, None is stored as NaN.
+    Each assignment flags the slot as defined, so that the value of published
+    variables becomes available in the VariableKiosk.
+    """
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        return obj._buffer_view[self.index]
+
+    def __set__(self, obj, value):
+        if value is None:
+            value = float("nan")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            msg = "The '%s' trait of %s instance must be a float, but a value of %r was specified."
+            raise TraitError(msg % (self.name, obj.__class__.__name__, value))
+        obj._buffer_view[self.index] = value
+        obj._defined_view[self.index] = 1
+
+# Cache of the compiled subclasses of states/rates templates
+_compiled_classes = {}
+
+def compiled_class(cls):
+    """Returns a subclass of the states/rates template cls in which all Float
+    variables are `BufferedFloat` descriptors. Subclasses are created once per
+    template class.
+    """
+    try:
+        return _compiled_classes[cls]
+    except KeyError:
+        pass
+    valid = lambda s: not (s.startswith("_") or s.startswith("trait"))
+    names = sorted(name for name, trait in cls.class_traits().items()
+                   if valid(name) and isinstance(trait, Float))
+    namespace = {name: BufferedFloat(name, i) for i, name in enumerate(names)}
+    namespace["_buffered_vars"] = tuple(names)
+    namespace["__module__"] = cls.__module__
+    namespace["__doc__"] = cls.__doc__
+    compiled = type(cls)(cls.__name__, (cls,), namespace)
+    _compiled_classes[cls] = compiled
+    return compiled
+
 class ParamTemplate(HasTraits):
     """Template for storing parameter values.
 
@@ -85,8 +137,8 @@ class ParamTemplate(HasTraits):
                 raise exc.ParameterError(msg)
             value = parvalues[parname]
             if isinstance(getattr(self, parname), (Afgen)):
-                # AFGEN table parameter
-                setattr(self, parname, Afgen(value))
+                # AFGEN table parameter, identical tables share one Afgen
+                setattr(self, parname, Afgen.interned(value))
             else:
                 # Single value parameter
                 setattr(self, parname, value)
@@ -108,6 +160,13 @@ class StatesRatesCommon(HasTraits):
     _valid_vars = Instance(set)
     _locked = Bool(False)
 
+    # Float variables are stored in the VariableBuffer of the kiosk if it has
+    # one, unless a template sets _compilable to False.
+    _compilable = True
+    _buffered_vars = ()
+    _buffer = None
+    _offset = 0
+
     def __init__(self, kiosk:VariableKiosk=None, publish=None):
         """Set up the common stuff for the states and rates template
         including variables that have to be published in the kiosk
@@ -122,6 +181,15 @@ class StatesRatesCommon(HasTraits):
             raise RuntimeError(msg)
         self._kiosk = kiosk
 
+        # Move the Float variables to the buffer of the kiosk
+        if kiosk.buffer is not None and self._compilable:
+            self.__class__ = compiled_class(self.__class__)
+            for name in self._buffered_vars:
+                self._trait_values.pop(name, None)
+            self._buffer = kiosk.buffer
+            self._offset = kiosk.buffer.allocate(len(self._buffered_vars))
+            kiosk.buffer.attach(self)
+
         # Check publish variable for correct usage
         publish = check_publish(publish)
 
@@ -138,7 +206,15 @@ class StatesRatesCommon(HasTraits):
 
         valid = lambda s: not (s.startswith("_") or s.startswith("trait"))
         r = [name for name in self.trait_names() if valid(name)]
-        return set(r)
+        return set(r) | set(self._buffered_vars)
+
+    def _bind_buffer(self):
+        """Binds the views on the slots of this object in the VariableBuffer.
+        Called by the buffer on allocation and whenever its arrays change.
+        """
+        end = self._offset + len(self._buffered_vars)
+        self._buffer_view = memoryview(self._buffer.data)[self._offset:end]
+        self._defined_view = memoryview(self._buffer.defined)[self._offset:end]
 
     def _register_with_kiosk(self, publish):
         """Register the variable with the variable kiosk.
@@ -156,7 +232,13 @@ class StatesRatesCommon(HasTraits):
         """
 
         for attr in self._valid_vars:
-            if attr in publish:
+            if attr in publish and attr in self._buffered_vars:
+                # The kiosk reads the value directly from the buffer
+                publish.remove(attr)
+                index = self._offset + self._buffered_vars.index(attr)
+                self._kiosk.register_variable(id(self), attr, type=self._vartype,
+                                              publish=True, index=index)
+            elif attr in publish:
                 publish.remove(attr)
                 self._kiosk.register_variable(id(self), attr, type=self._vartype,
                                               publish=True)
@@ -304,6 +386,7 @@ class StatesWithImplicitRatesTemplate(StatesTemplate):
 
     rates = {}
     __initialized = False
+    _compilable = False
 
     def __setattr__(self, name, value):
         if name in self.rates:
@@ -413,3 +496,5 @@ class RatesTemplate(StatesRatesCommon):
         or False (Boolean).
         """
         self._trait_values.update(self._rate_vars_zero)
+        if self._buffer is not None:
+            self._buffer.data[self._offset:self._offset + len(self._buffered_vars)] = 0.
@@ -4,7 +4,82 @@ passing throughout various sub-objects of the crop and soil model
 Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
+import weakref
+
+import numpy as np
+
 from ..utils import exceptions as exc
+from ..utils import validation
+from .dispatcher import SignalBus
+
+
+class VariableBuffer(object):
+    """Contiguous float64 storage for the Float state and rate variables of the
+    StatesTemplate/RatesTemplate objects of one engine.
+
+    Each template allocates a block of slots in `data`, its Float variables
+    are then read and written through descriptors on the slots instead of
+    through traitlets. The `defined` array flags which slots were assigned
+    since the last flush of the VariableKiosk, the kiosk uses these flags to
+    expose published variables as views on the buffer.
+
+    The buffer grows when needed, in which case all templates are re-bound to
+    the new arrays.
+    """
+
+    def __init__(self, capacity=256):
+        self.data = np.zeros(capacity, dtype=np.float64)
+        self.defined = np.zeros(capacity, dtype=np.uint8)
+        self.size = 0
+        self._owners = weakref.WeakSet()
+
+    def allocate(self, n):
+        """Allocates n slots and returns the offset of the first slot.
+        """
+        offset = self.size
+        if offset + n > len(self.data):
+            self._grow(offset + n)
+        self.size += n
+        return offset
+
+    def attach(self, owner):
+        """Binds owner to this buffer, owner must implement `_bind_buffer()`.
+        """
+        self._owners.add(owner)
+        owner._bind_buffer()
+
+    def _grow(self, n):
+        capacity = max(n, 2*len(self.data))
+        data = np.zeros(capacity, dtype=np.float64)
+        defined = np.zeros(capacity, dtype=np.uint8)
+        data[:len(self.data)] = self.data
+        defined[:len(self.defined)] = self.defined
+        self.data, self.defined = data, defined
+        self.rebind()
+
+    def rebind(self):
+        """Re-binds all owners to the current arrays.
+        """
+        for owner in list(self._owners):
+            owner._bind_buffer()
+
+    def snapshot(self):
+        """Returns a copy of the allocated part of the buffer.
+        """
+        return (self.data[:self.size].copy(), self.defined[:self.size].copy())
+
+    def restore(self, state):
+        """Restores the buffer from `state` as returned by `snapshot()`. Slots
+        allocated after the snapshot was taken are released.
+        """
+        data, defined = state
+        n = len(data)
+        if n > len(self.data):
+            self._grow(n)
+        self.data[:n] = data
+        self.defined[:n] = defined
+        self.size = n
+        self.rebind()
 
 
 class VariableKiosk(dict):
@@ -85,14 +160,24 @@ class VariableKiosk(dict):
           - variable VAR3, value: undefined
     """
 
-    def __init__(self):
+    def __init__(self, buffer:VariableBuffer=None):
         """Initialize the class `VariableKiosk`
+
+        :param buffer: optional VariableBuffer in which the states/rates
+            templates store their Float variables, published variables in the
+            buffer are exposed by the kiosk as views.
         """
         dict.__init__(self)
         self.registered_states = {}
         self.registered_rates = {}
         self.published_states = {}
         self.published_rates = {}
+        self.buffer = buffer
+        # buffer index of published variables stored in the buffer
+        self._views = {}
+        self._flush_plan = {}
+        # Signals sent by the components of this model instance
+        self.signal_bus = SignalBus()
 
     def __setitem__(self, item, value):
         msg = "See set_variable() for setting a variable."
@@ -101,7 +186,19 @@ class VariableKiosk(dict):
     def __contains__(self, item):
         """Checks if item is in self.registered_states or self.registered_rates.
         """
-        return dict.__contains__(self, item)
+        if dict.__contains__(self, item):
+            return True
+        index = self._views.get(item)
+        return index is not None and self.buffer.defined[index] == 1
+
+    def __missing__(self, item):
+        """Returns the value of a published variable stored in the buffer.
+        """
+        views = self.__dict__.get("_views", {})
+        index = views.get(item)
+        if index is None or self.buffer.defined[index] == 0:
+            raise KeyError(item)
+        return float(self.buffer.data[index])
 
     def __getattr__(self, item):
         """Allow use of attribute notation (eg "kiosk.LAI") on published rates or states.
@@ -128,7 +225,7 @@ class VariableKiosk(dict):
             msg += "  - variable %s, value: %s\n" % (varname, value)
         return msg
 
-    def register_variable(self, oid, varname, type, publish=False):
+    def register_variable(self, oid, varname, type, publish=False, index=None):
         """Register a varname from object with id, with given type
 
         :param oid: Object id (from python builtin id() function) of the
@@ -138,9 +235,14 @@ class VariableKiosk(dict):
             automatically by the states/rates template class.
         :param publish: True if variable should be published in the kiosk,
             defaults to False
+        :param index: index of the variable in self.buffer if it is stored
+            there, published values are then read from the buffer.
         """
 
         self._check_duplicate_variable(varname)
+        self._flush_plan.clear()
+        if publish is True and index is not None:
+            self._views[varname] = index
         if type.upper() == "R":
             self.registered_rates[varname] = oid
             if publish is True:
@@ -160,6 +262,8 @@ class VariableKiosk(dict):
             state/rate object registering this variable.
         :param varname: Name of the variable to be registered, e.g. "DVS"
         """
+        self._flush_plan.clear()
+        self._views.pop(varname, None)
         if varname in self.registered_states:
             # print "Deregistering '%s'" % varname
             if oid != self.registered_states[varname]:
@@ -203,9 +307,14 @@ class VariableKiosk(dict):
             state/rate object registering this variable.
         :param varname: Name of the variable to be updated
         :param value: Value to be assigned to the variable.
+
+        The registration and ownership of the variable are not checked when
+        the validation level is "fast".
         """
 
-        if varname in self.published_rates:
+        if validation.level == validation.FAST:
+            dict.__setitem__(self, varname, value)
+        elif varname in self.published_rates:
             if self.published_rates[varname] == id:
                 dict.__setitem__(self, varname, value)
             else:
@@ -235,14 +344,116 @@ class VariableKiosk(dict):
         else:
             return False
 
+    def snapshot(self):
+        """Returns a copy of the published values and the registrations of the kiosk.
+
+        The last item holds the buffer views and a copy of the buffer, or None
+        if the kiosk has no buffer.
+        """
+        buffered = None
+        if self.buffer is not None:
+            buffered = (dict(self._views), self.buffer.snapshot())
+        return (dict(self), dict(self.registered_states), dict(self.registered_rates),
+                dict(self.published_states), dict(self.published_rates), buffered)
+
+    def restore(self, state):
+        """Restores the published values and registrations from `state` as
+        returned by `snapshot()`.
+        """
+        values, reg_states, reg_rates, pub_states, pub_rates, buffered = state
+        dict.clear(self)
+        dict.update(self, values)
+        for current, saved in [(self.registered_states, reg_states),
+                               (self.registered_rates, reg_rates),
+                               (self.published_states, pub_states),
+                               (self.published_rates, pub_rates)]:
+            current.clear()
+            current.update(saved)
+        self._flush_plan.clear()
+        self._views.clear()
+        if buffered is not None:
+            views, buffer_state = buffered
+            self._views.update(views)
+            self.buffer.restore(buffer_state)
+
+    def snapshot_variables(self, varnames, offset=None):
+        """Returns a copy of the registrations and published values of the
+        variables in `varnames`, which can be registered again with
+        `restore_variables()` after they were dropped from the kiosk.
+
+        :param varnames: names of registered variables
+        :param offset: first slot in the buffer of the states/rates objects
+            owning `varnames`, the slots from `offset` onwards are copied.
+        """
+        values = {k: dict.__getitem__(self, k) for k in varnames if dict.__contains__(self, k)}
+        registrations = tuple({k: reg[k] for k in varnames if k in reg}
+                              for reg in (self.registered_states, self.registered_rates,
+                                          self.published_states, self.published_rates))
+        views = {k: self._views[k] for k in varnames if k in self._views}
+        buffered = None
+        if offset is not None:
+            size = self.buffer.size
+            buffered = (offset, self.buffer.data[offset:size].copy(),
+                        self.buffer.defined[offset:size].copy())
+        return (values, *registrations, views, buffered)
+
+    def restore_variables(self, state):
+        """Registers the variables in `state` as returned by
+        `snapshot_variables()` again, including their published values and
+        buffer slots.
+
+        Raises a VariableKioskError without changing the kiosk if one of the
+        variables is registered already or if the buffer slots are no longer
+        free.
+        """
+        values, reg_states, reg_rates, pub_states, pub_rates, views, buffered = state
+        for varname in list(reg_states) + list(reg_rates):
+            self._check_duplicate_variable(varname)
+        if buffered is not None:
+            offset, data, defined = buffered
+            if self.buffer.size != offset:
+                msg = "Buffer slots from %i onwards are not free." % offset
+                raise exc.VariableKioskError(msg)
+            n = len(data)
+            self.buffer.allocate(n)
+            self.buffer.data[offset:offset+n] = data
+            self.buffer.defined[offset:offset+n] = defined
+
+        self._flush_plan.clear()
+        self.registered_states.update(reg_states)
+        self.registered_rates.update(reg_rates)
+        self.published_states.update(pub_states)
+        self.published_rates.update(pub_rates)
+        self._views.update(views)
+        dict.update(self, values)
+
+    def _get_flush_plan(self, vartype):
+        """Returns the names of the published state ("S") or rate ("R") variables
+        stored in the kiosk itself and the buffer indices of those stored in
+        the buffer.
+        """
+        if vartype not in self._flush_plan:
+            published = self.published_rates if vartype == "R" else self.published_states
+            names = [k for k in published if k not in self._views]
+            index = np.array([self._views[k] for k in published if k in self._views],
+                             dtype=np.intp)
+            self._flush_plan[vartype] = (names, index)
+        return self._flush_plan[vartype]
+
     def flush_rates(self):
         """flush the values of all published rate variable from the kiosk.
         """
-        for key in self.published_rates.keys():
+        names, index = self._get_flush_plan("R")
+        for key in names:
             self.pop(key, None)
+        if len(index) > 0:
+            self.buffer.defined[index] = 0
 
     def flush_states(self):
         """flush the values of all state variable from the kiosk.
         """
-        for key in self.published_states.keys():
+        names, index = self._get_flush_plan("S")
+        for key in names:
             self.pop(key, None)
+        if len(index) > 0:
+            self.buffer.defined[index] = 0
@@ -8,12 +8,21 @@ from math import sqrt, exp, cos, pi
 from collections import deque
 from datetime import date
 
+import numpy as np
+
 from ..utils.traitlets import Instance, Float 
 from ..util import astro, AfgenTrait
 from ..base import ParamTemplate, SimulationObject, VariableKiosk
 from ..nasapower import WeatherDataProvider
 
 
+# Gauss points and weights, and the constants of the scattering coefficient
+# of leaves for PAR (SCV = 0.2) used by assim
+_XGAUSS = (0.1127017, 0.5000000, 0.8872983)
+_WGAUSS = (0.2777778, 0.4444444, 0.2777778)
+_SQRT_1_SCV = sqrt(1.-0.2)
+_REFH = (1.-_SQRT_1_SCV)/(1.+_SQRT_1_SCV)
+
 def totass(DAYL, AMAX, EFF, LAI, KDIF, AVRAD, DIFPP, DSINBE, SINLD, COSLD):
     """ This routine calculates the daily total gross CO2 assimilation by
     performing a Gaussian integration over time. At three different times of
@@ -48,8 +57,8 @@ def totass(DAYL, AMAX, EFF, LAI, KDIF, AVRAD, DIFPP, DSINBE, SINLD, COSLD):
     """
 
     # Gauss points and weights
-    XGAUSS = [0.1127017, 0.5000000, 0.8872983]
-    WGAUSS = [0.2777778, 0.4444444, 0.2777778]
+    XGAUSS = _XGAUSS
+    WGAUSS = _WGAUSS
 
     # calculation of assimilation is done only when it will not be zero
     # (AMAX >0, LAI >0, DAYL >0)
@@ -87,16 +96,22 @@ def assim(AMAX, EFF, LAI, KDIF, SINB, PARDIR, PARDIF):
     Allard de Wit, 2011
     """
     # Gauss points and weights
-    XGAUSS = [0.1127017, 0.5000000, 0.8872983]
-    WGAUSS = [0.2777778, 0.4444444, 0.2777778]
+    XGAUSS = _XGAUSS
+    WGAUSS = _WGAUSS
 
     SCV = 0.2
 
     # 13.2 extinction coefficients KDIF, KDIRBL, KDIRT
-    REFH = (1.-sqrt(1.-SCV))/(1.+sqrt(1.-SCV))
-    REFS = REFH*2./(1.+1.6*SINB)
-    KDIRBL = (0.5/SINB)*KDIF/(0.8*sqrt(1.-SCV))
-    KDIRT = KDIRBL*sqrt(1.-SCV)
+    REFS = _REFH*2./(1.+1.6*SINB)
+    KDIRBL = (0.5/SINB)*KDIF/(0.8*_SQRT_1_SCV)
+    KDIRT = KDIRBL*_SQRT_1_SCV
+
+    # terms that do not depend on the depth in the canopy
+    AMAX2 = max(2.0, AMAX)
+    VISPP  = (1.-SCV)*PARDIR/SINB
+    if VISPP > 0.:
+        FEXP = 1.-exp(-VISPP*EFF/AMAX2)
+        EFFVISPP = EFF*VISPP
 
     #13.3 three-point Gaussian integration over LAI
     FGROS = 0.
@@ -104,26 +119,24 @@ def assim(AMAX, EFF, LAI, KDIF, SINB, PARDIR, PARDIF):
         LAIC = LAI*XGAUSS[i]
         # absorbed diffuse radiation (VISDF),light from direct
         # origine (VIST) and direct light (VISD)
+        FSLLA  = exp(-KDIRBL*LAIC)
         VISDF  = (1.-REFS)*PARDIF*KDIF  *exp(-KDIF  *LAIC)
         VIST   = (1.-REFS)*PARDIR*KDIRT *exp(-KDIRT *LAIC)
-        VISD   = (1.-SCV) *PARDIR*KDIRBL*exp(-KDIRBL*LAIC)
+        VISD   = (1.-SCV) *PARDIR*KDIRBL*FSLLA
 
         # absorbed flux in W/m2 for shaded leaves and assimilation
         VISSHD = VISDF+VIST-VISD
-        FGRSH  = AMAX*(1.-exp(-VISSHD*EFF/max(2.0, AMAX)))
+        FGRSH  = AMAX*(1.-exp(-VISSHD*EFF/AMAX2))
 
         # direct light absorbed by leaves perpendicular on direct
         # beam and assimilation of sunlit leaf area
-        VISPP  = (1.-SCV)*PARDIR/SINB
         if (VISPP <= 0.):
             FGRSUN = FGRSH
         else:
-            FGRSUN = AMAX*(1.-(AMAX-FGRSH) \
-                     *(1.-exp(-VISPP*EFF/max(2.0,AMAX)))/ (EFF*VISPP))
+            FGRSUN = AMAX*(1.-(AMAX-FGRSH)*FEXP/EFFVISPP)
 
         # fraction of sunlit leaf area (FSLLA) and local
         # assimilation rate (FGL)
-        FSLLA  = exp(-KDIRBL*LAIC)
         FGL    = FSLLA*FGRSUN+(1.-FSLLA)*FGRSH
 
         # integration
@@ -132,6 +145,83 @@ def assim(AMAX, EFF, LAI, KDIF, SINB, PARDIR, PARDIF):
     FGROS  = FGROS*LAI
     return FGROS
 
+# Gauss points and weights of the array versions of totass and assim
+_XGAUSS_ARRAY = np.array(_XGAUSS)
+_WGAUSS_ARRAY = np.array(_WGAUSS)
+
+def totass_array(DAYL, AMAX, EFF, LAI, KDIF, AVRAD, DIFPP, DSINBE, SINLD, COSLD):
+    """Array version of `totass()` that computes the daily total gross CO2
+    assimilation for many fields at once.
+
+    All arguments are scalars or arrays that broadcast to a common shape, the
+    result has that shape. The three times of the day are evaluated at once as
+    the last axis of the arrays passed to `assim_array()`, which in turn adds an
+    axis for the three canopy depths. Results match those of `totass()` within
+    floating point round-off.
+    """
+    DAYL, AMAX, LAI = np.asarray(DAYL), np.asarray(AMAX), np.asarray(LAI)
+    E = (Ellipsis, None)
+
+    HOUR   = 12.0+0.5*DAYL[E]*_XGAUSS_ARRAY
+    SINB   = np.maximum(0., np.asarray(SINLD)[E]+np.asarray(COSLD)[E]*np.cos(2.*np.pi*(HOUR+12.)/24.))
+
+    # assimilation is only calculated when it will not be zero
+    # (AMAX >0, LAI >0, DAYL >0), other values are masked below
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        PAR    = 0.5*np.asarray(AVRAD)[E]*SINB*(1.+0.4*SINB)/np.asarray(DSINBE)[E]
+        PARDIF = np.minimum(PAR, SINB*np.asarray(DIFPP)[E])
+        PARDIR = PAR-PARDIF
+        FGROS = assim_array(AMAX[E], np.asarray(EFF)[E], LAI[E], np.asarray(KDIF)[E],
+                            SINB, PARDIR, PARDIF)
+    DTGA = (FGROS[..., 0]*_WGAUSS[0] + FGROS[..., 1]*_WGAUSS[1] + FGROS[..., 2]*_WGAUSS[2])*DAYL
+
+    return np.where((AMAX > 0.) & (LAI > 0.) & (DAYL > 0.), DTGA, 0.)
+
+def assim_array(AMAX, EFF, LAI, KDIF, SINB, PARDIR, PARDIF):
+    """Array version of `assim()` that computes the gross CO2 assimilation
+    rate of the canopy for arrays of inputs that broadcast to a common shape.
+
+    The three canopy depths are evaluated at once on an extra last axis, which
+    is integrated before returning an array with the common shape.
+    """
+    SCV = 0.2
+    E = (Ellipsis, None)
+
+    # 13.2 extinction coefficients KDIF, KDIRBL, KDIRT
+    REFS = (_REFH*2./(1.+1.6*SINB))[E]
+    KDIRBL = (0.5/SINB)*KDIF/(0.8*_SQRT_1_SCV)
+    KDIRT = (KDIRBL*_SQRT_1_SCV)[E]
+    AMAX2 = np.maximum(2.0, AMAX)[E]
+    VISPP = ((1.-SCV)*PARDIR/SINB)[E]
+    KDIRBL, KDIF, PARDIR, PARDIF = KDIRBL[E], np.asarray(KDIF)[E], PARDIR[E], PARDIF[E]
+    AMAX, EFF = np.asarray(AMAX)[E], np.asarray(EFF)[E]
+
+    # 13.3 three-point Gaussian integration over LAI
+    LAIC = np.asarray(LAI)[E]*_XGAUSS_ARRAY
+    # absorbed diffuse radiation (VISDF),light from direct
+    # origine (VIST) and direct light (VISD)
+    EXP_KDIRBL = np.exp(-KDIRBL*LAIC)
+    VISDF  = (1.-REFS)*PARDIF*KDIF  *np.exp(-KDIF  *LAIC)
+    VIST   = (1.-REFS)*PARDIR*KDIRT *np.exp(-KDIRT *LAIC)
+    VISD   = (1.-SCV) *PARDIR*KDIRBL*EXP_KDIRBL
+
+    # absorbed flux in W/m2 for shaded leaves and assimilation
+    VISSHD = VISDF+VIST-VISD
+    FGRSH  = AMAX*(1.-np.exp(-VISSHD*EFF/AMAX2))
+
+    # direct light absorbed by leaves perpendicular on direct
+    # beam and assimilation of sunlit leaf area
+    FGRSUN = np.where(VISPP <= 0., FGRSH,
+                      AMAX*(1.-(AMAX-FGRSH)*(1.-np.exp(-VISPP*EFF/AMAX2))/(EFF*VISPP)))
+
+    # fraction of sunlit leaf area (FSLLA) and local
+    # assimilation rate (FGL)
+    FGL    = EXP_KDIRBL*FGRSUN+(1.-EXP_KDIRBL)*FGRSH
+
+    # integration
+    FGROS = FGL[..., 0]*_WGAUSS[0] + FGL[..., 1]*_WGAUSS[1] + FGL[..., 2]*_WGAUSS[2]
+    return FGROS*np.asarray(LAI)
+
 class WOFOST_Assimilation(SimulationObject):
     """Class implementing a WOFOST/SUCROS style assimilation routine including
     effect of changes in atmospheric CO2 concentration.
@@ -4,10 +4,10 @@ Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
 from math import exp
-from collections import deque
-from array import array
 from datetime import date
 
+import numpy as np
+
 from ..utils.traitlets import Float, Instance
 from ..utils.decorators import prepare_rates, prepare_states
 from ..util import limit, AfgenTrait
@@ -33,6 +33,16 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
 
     Finally, leaf expansion (SLA) can be influenced by nutrient stress.
 
+    The leaf classes are stored in preallocated NumPy buffers, youngest class
+    first. New classes are written in front of the youngest class and dead
+    classes are dropped from the end, so a day only touches the classes that
+    are born or die. The leaf weight (WLV) and leaf area (LASUM) are kept as
+    running sums, and the classes older than SPAN are found by walking from
+    the oldest class. Leaf ages are advanced with one in-place addition so
+    that the SPAN comparisons are identical to ageing every class. The state
+    variables `LV`, `SLA` and `LVAGE` are copies of the living classes, so
+    saved output does not change when the buffers are updated.
+
     *Simulation parameters* (provide in cropdata dictionary)
 
     =======  ============================================= =======  ============
@@ -133,10 +143,17 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         NLAI_NPK = Float(-99.)  # coefficient for the reduction due to nutrient NPK stress of the 
                                   # LAI increase (during juvenile phase)
 
+    # Initial number of leaf classes of the buffers
+    LEAF_BUFFER_SIZE = 128
+
+    _LV = Instance(np.ndarray)
+    _SLA = Instance(np.ndarray)
+    _LVAGE = Instance(np.ndarray)
+
     class StateVariables(StatesTemplate):
-        LV = Instance(deque)
-        SLA = Instance(deque)
-        LVAGE = Instance(deque)
+        LV = Instance(np.ndarray)
+        SLA = Instance(np.ndarray)
+        LVAGE = Instance(np.ndarray)
         LAIEM = Float(-99.)
         LASUM = Float(-99.)
         LAIEXP = Float(-99.)
@@ -169,6 +186,45 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         msg = "Implement `initialize` method in Leaf Dynamics subclass"
         raise NotImplementedError(msg)
     
+    def _init_leaf_classes(self, WLV, SLA):
+        """Initializes the leaf class buffers with a single leaf class and
+        returns the LV, SLA and LVAGE of the leaf class.
+
+        :param WLV: leaf biomass of the first leaf class
+        :param SLA: specific leaf area of the first leaf class
+        """
+        n = self.LEAF_BUFFER_SIZE
+        self._LV = np.zeros(n)
+        self._SLA = np.zeros(n)
+        self._LVAGE = np.zeros(n)
+        # Leaf classes are stored in [_head, _tail), youngest first
+        self._head = n - 1
+        self._tail = n
+        self._LV[self._head] = WLV
+        self._SLA[self._head] = SLA
+        self._WLV = WLV
+        self._LASUM = WLV * SLA
+        return self._leaf_classes()
+
+    def _leaf_classes(self):
+        """Returns copies of the LV, SLA and LVAGE of the living leaf classes.
+        """
+        h, t = self._head, self._tail
+        return self._LV[h:t].copy(), self._SLA[h:t].copy(), self._LVAGE[h:t].copy()
+
+    def _grow_leaf_buffers(self):
+        """Moves the leaf classes to the end of buffers that are twice as large
+        as needed, making room for new leaf classes in front of them.
+        """
+        h, t = self._head, self._tail
+        n = t - h
+        size = max(self.LEAF_BUFFER_SIZE, 2 * n)
+        for name in ("_LV", "_SLA", "_LVAGE"):
+            buf = np.zeros(size)
+            buf[size - n:] = getattr(self, name)[h:t]
+            setattr(self, name, buf)
+        self._head, self._tail = size - n, size
+
     def _calc_LAI(self):
         """Compute LAI as Total leaf area Index as sum of leaf, pod and stem area
         """
@@ -221,10 +277,15 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         # in DALV.
         # Note that the actual leaf death is imposed on the array LV during the
         # state integration step.
+        # Leaf ages increase towards the oldest class, so the classes past
+        # SPAN are found by moving a cursor from the oldest class
+        LV, LVAGE = self._LV, self._LVAGE
+        cursor = self._tail
+        while cursor > self._head and LVAGE[cursor-1] > p.SPAN:
+            cursor -= 1
         DALV = 0.0
-        for lv, lvage in zip(s.LV, s.LVAGE):
-            if lvage > p.SPAN:
-                DALV += lv
+        for i in range(cursor, self._tail):
+            DALV += float(LV[i])
         r.DALV = DALV
 
         # Total death rate leaves
@@ -268,40 +329,47 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         r = self.rates
         s = self.states
 
-        # Leaf Death
-        tLV = array('d', s.LV)
-        tSLA = array('d', s.SLA)
-        tLVAGE = array('d', s.LVAGE)
+        LV, SLA = self._LV, self._SLA
+        WLV, LASUM = self._WLV, self._LASUM
         tDRLV = r.DRLV
 
         # leaf death is imposed on leaves by removing leave classes from the
-        # right side of the deque.
-        for LVweigth in reversed(s.LV):
-            if tDRLV > 0.:
-                if tDRLV >= LVweigth: # remove complete leaf class from deque
-                    tDRLV -= LVweigth
-                    tLV.pop()
-                    tLVAGE.pop()
-                    tSLA.pop()
-                else: # Decrease value of oldest (rightmost) leave class
-                    tLV[-1] -= tDRLV
-                    tDRLV = 0.
-            else:
-                break
+        # end of the buffers.
+        while tDRLV > 0. and self._tail > self._head:
+            LVweigth = float(LV[self._tail-1])
+            if tDRLV >= LVweigth: # remove complete leaf class
+                tDRLV -= LVweigth
+                self._tail -= 1
+                WLV -= LVweigth
+                LASUM -= LVweigth * SLA[self._tail]
+            else: # Decrease value of oldest leave class
+                LV[self._tail-1] -= tDRLV
+                WLV -= tDRLV
+                LASUM -= tDRLV * SLA[self._tail-1]
+                tDRLV = 0.
 
         # Integration of physiological age
-        tLVAGE = deque([age + r.FYSAGE for age in tLVAGE])
-        tLV = deque(tLV)
-        tSLA = deque(tSLA)
+        self._LVAGE[self._head:self._tail] += r.FYSAGE
 
         # Compute Leaf Growth
         # new leaves in class 1
-        tLV.appendleft(r.GRLV)
-        tSLA.appendleft(r.SLAT)
-        tLVAGE.appendleft(0.)
+        if self._head == 0:
+            self._grow_leaf_buffers()
+            LV, SLA = self._LV, self._SLA
+        self._head -= 1
+        LV[self._head] = r.GRLV
+        SLA[self._head] = r.SLAT
+        self._LVAGE[self._head] = 0.
+        WLV += r.GRLV
+        LASUM += r.GRLV * r.SLAT
+        if self._tail - self._head == 1:
+            # Only the new leaf class is left, restart the running sums
+            WLV = r.GRLV
+            LASUM = r.GRLV * r.SLAT
+        self._WLV, self._LASUM = float(WLV), float(LASUM)
 
         # calculation of new leaf area
-        s.LASUM = sum([lv*sla for lv, sla in zip(tLV, tSLA)])
+        s.LASUM = self._LASUM
         s.LAI = self._calc_LAI()
         s.LAIMAX = max(s.LAI, s.LAIMAX)
 
@@ -309,14 +377,12 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         s.LAIEXP += r.GLAIEX
 
         # Update leaf biomass states
-        s.WLV  = sum(tLV)
+        s.WLV  = self._WLV
         s.DWLV += r.DRLV
         s.TWLV = s.WLV + s.DWLV
 
-        # Store final leaf biomass deques
-        self.states.LV = tLV
-        self.states.SLA = tSLA
-        self.states.LVAGE = tLVAGE
+        # Store the leaf classes
+        s.LV, s.SLA, s.LVAGE = self._leaf_classes()
 
     def reset(self):
         """Reset states and rates
@@ -332,12 +398,10 @@ class Base_WOFOST_Leaf_Dynamics_NPK(SimulationObject):
         TWLV = WLV + DWLV
 
         # First leaf class (SLA, age and weight)
-        SLA = deque([p.SLATB(k.DVS)])
-        LVAGE = deque([0.])
-        LV = deque([WLV])
+        LV, SLA, LVAGE = self._init_leaf_classes(WLV, p.SLATB(k.DVS))
 
         # Initial values for leaf area
-        LAIEM = LV[0] * SLA[0]
+        LAIEM = self._LASUM
         LASUM = LAIEM
         LAIEXP = LAIEM
         LAIMAX = LAIEM
@@ -385,12 +449,10 @@ class Annual_WOFOST_Leaf_Dynamics_NPK(Base_WOFOST_Leaf_Dynamics_NPK):
         TWLV = WLV + DWLV
 
         # First leaf class (SLA, age and weight)
-        SLA = deque([p.SLATB(k.DVS)])
-        LVAGE = deque([0.])
-        LV = deque([WLV])
+        LV, SLA, LVAGE = self._init_leaf_classes(WLV, p.SLATB(k.DVS))
 
         # Initial values for leaf area
-        LAIEM = LV[0] * SLA[0]
+        LAIEM = self._LASUM
         LASUM = LAIEM
         LAIEXP = LAIEM
         LAIMAX = LAIEM
@@ -449,12 +511,10 @@ class Perennial_WOFOST_Leaf_Dynamics_NPK(Base_WOFOST_Leaf_Dynamics_NPK):
         TWLV = WLV + DWLV
 
         # First leaf class (SLA, age and weight)
-        SLA = deque([p.SLATB(k.DVS)])
-        LVAGE = deque([0.])
-        LV = deque([WLV])
+        LV, SLA, LVAGE = self._init_leaf_classes(WLV, p.SLATB(k.DVS))
 
         # Initial values for leaf area
-        LAIEM = LV[0] * SLA[0]
+        LAIEM = self._LASUM
         LASUM = LAIEM
         LAIEXP = LAIEM
         LAIMAX = LAIEM
@@ -490,12 +550,10 @@ class Perennial_WOFOST_Leaf_Dynamics_NPK(Base_WOFOST_Leaf_Dynamics_NPK):
         TWLV = WLV + DWLV
 
         # First leaf class (SLA, age and weight)
-        SLA = deque([p.SLATB(k.DVS)])
-        LVAGE = deque([0.])
-        LV = deque([WLV])
+        LV, SLA, LVAGE = self._init_leaf_classes(WLV, p.SLATB(k.DVS))
 
         # Initial values for leaf area
-        LAIEM = LV[0] * SLA[0]
+        LAIEM = self._LASUM
         LASUM = LAIEM
         LAIEXP = LAIEM
         LAIMAX = LAIEM
@@ -0,0 +1,1019 @@
+"""Fused implementation of the WOFOST 8.0 crop model for annual crops
+
+`Wofost80Fused` is a drop-in replacement for `Wofost80` as CROP in the model
+configuration. Instead of a tree of SimulationObjects with their own
+parameter, state and rate templates, the phenology, assimilation,
+respiration, evapotranspiration, partitioning, organ dynamics and N/P/K
+components are inlined into one `calc_rates()` and one `integrate()` function
+working on local variables. The AFGEN tables of a day are evaluated once and
+shared by the components that use them.
+
+The computations follow the object model step by step, so the results are the
+same as with `Wofost80`. The crop registers the same variables in the
+VariableKiosk and publishes them on the same days, which is what the soil
+model and the agromanager rely on.
+
+Written by Will Solow, 2024
+"""
+from math import exp
+from datetime import date
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+from ..nasapower import WeatherDataProvider
+from ..base import VariableKiosk
+from .. import signals
+from ..utils.traitlets import Instance, Int, Bool
+from ..util import Afgen, limit, astro, daylength
+from .. import exceptions as exc
+from .wofost8 import BaseCropModel
+from .assimilation import totass
+from .evapotranspiration import SWEAF
+from .partitioning import PartioningFactors
+
+_PARAMETERS = ("TSUMEM", "TBASEM", "TEFFMX", "TSUM1", "TSUM2", "TSUM3", "IDSL", "DLO",
+    "DLC", "DVSI", "DVSM", "DVSEND", "CVL", "CVO", "CVR", "CVS", "CO2", "Q10", "RMR",
+    "RML", "RMS", "RMO", "CFET", "DEPNR", "IAIRDU", "IOX", "CRAIRC", "SM0", "SMW",
+    "SMFCF", "NPART", "NTHRESH", "PTHRESH", "KTHRESH", "RDI", "RRI", "RDMCR", "RDMSOL",
+    "TDWI", "RGRLAI", "SPAN", "TBASE", "PERDL", "RDRLV_NPK", "NSLA_NPK", "NLAI_NPK",
+    "NMAXST_FR", "NMAXRT_FR", "PMAXST_FR", "PMAXRT_FR", "KMAXST_FR", "KMAXRT_FR",
+    "NRESIDLV", "NRESIDST", "NRESIDRT", "PRESIDLV", "PRESIDST", "PRESIDRT", "KRESIDLV",
+    "KRESIDST", "KRESIDRT", "NCRIT_FR", "PCRIT_FR", "KCRIT_FR", "NLUE_NPK", "NMAXSO",
+    "PMAXSO", "KMAXSO", "TCNT", "TCPT", "TCKT", "NFIX_FR", "RNUPTAKEMAX", "RPUPTAKEMAX",
+    "RKUPTAKEMAX", "DVS_NPK_STOP", "DVS_NPK_TRANSL")
+_TABLES = ("DTSMTB", "AMAXTB", "EFFTB", "KDIFTB", "TMPFTB", "TMNFTB", "CO2AMAXTB",
+    "CO2EFFTB", "CO2TRATB", "RFSETB", "FRTB", "FLTB", "FSTB", "FOTB", "RDRRTB", "RDRROS",
+    "RDRRNPK", "RDRSTB", "SSATB", "SPA", "RDRSOB", "RDRSOF", "SLATB", "NMAXLV_TB",
+    "PMAXLV_TB", "KMAXLV_TB")
+_VERN_PARAMETERS = ("VERNSAT", "VERNBASE", "VERNDVS")
+_VERN_TABLES = ("VERNRTB",)
+
+# Rate variables and their values after zerofy()
+_ZERO_RATES = dict.fromkeys(("DTSUME", "DTSUM", "DVR", "PMRES", "EVWMX", "EVSMX", "TRAMX",
+    "TRA", "RFWS", "RFOS", "RFTRA", "RR", "GRRT", "DRRT1", "DRRT2", "DRRT3", "DRRT", "GWRT",
+    "GRST", "DRST", "GWST", "GRSO", "DRSO", "GWSO", "DHSO", "GRLV", "DSLV1", "DSLV2",
+    "DSLV3", "DSLV4", "DSLV", "DALV", "DRLV", "SLAT", "FYSAGE", "GLAIEX", "GLASOL",
+    "RNtranslocationLV", "RNtranslocationST", "RNtranslocationRT", "RPtranslocationLV",
+    "RPtranslocationST", "RPtranslocationRT", "RKtranslocationLV", "RKtranslocationST",
+    "RKtranslocationRT", "RNuptakeLV", "RNuptakeST", "RNuptakeRT", "RNuptakeSO",
+    "RPuptakeLV", "RPuptakeST", "RPuptakeRT", "RPuptakeSO", "RKuptakeLV", "RKuptakeST",
+    "RKuptakeRT", "RKuptakeSO", "RNuptake", "RPuptake", "RKuptake", "RNfixation",
+    "NdemandLV", "NdemandST", "NdemandRT", "NdemandSO", "PdemandLV", "PdemandST",
+    "PdemandRT", "PdemandSO", "KdemandLV", "KdemandST", "KdemandRT", "KdemandSO",
+    "Ndemand", "Pdemand", "Kdemand", "RNamountLV", "RPamountLV", "RKamountLV", "RNamountST",
+    "RPamountST", "RKamountST", "RNamountRT", "RPamountRT", "RKamountRT", "RNamountSO",
+    "RPamountSO", "RKamountSO", "RNdeathLV", "RNdeathST", "RNdeathRT", "RPdeathLV",
+    "RPdeathST", "RPdeathRT", "RKdeathLV", "RKdeathST", "RKdeathRT", "RNloss", "RPloss",
+    "RKloss", "NNI", "PNI", "KNI", "NPKI", "RFNPK", "GASS", "PGASS", "MRES", "ASRC", "DMI",
+    "ADMI"), 0.)
+_ZERO_RATES.update(RDEM=0, IDOS=False, IDWS=False)
+_ZERO_RATES_VERN = dict(_ZERO_RATES, VERNR=0., VERNFAC=0.)
+
+
+class Wofost80Fused(BaseCropModel):
+    """Fused version of `Wofost80`, the WOFOST 8.0 crop model for annual crops
+    with N/P/K dynamics.
+
+    The model is the same as `Wofost80` with the `Annual_Phenology` (including
+    vernalisation), `WOFOST_Assimilation`, `WOFOST_Maintenance_Respiration`,
+    `EvapotranspirationCO2`, `Annual_Partitioning_NPK`, the annual root, stem,
+    storage organ and leaf dynamics, `NPK_Crop_Dynamics` and `NPK_Stress`
+    components, see there for the description of the parameters and variables.
+    All components are computed by `calc_rates()` and `integrate()` of this
+    object itself, it has no sub-SimulationObjects and no states/rates
+    templates. The state and rate variables are kept in dicts and can be
+    retrieved with `get_variable()`.
+
+    The crop registers all variables of the components in the VariableKiosk
+    under its own id and publishes them when the object model would: all
+    states after initialization and after each day before emergence, and
+    otherwise only the variables that are assigned on that day. The crop_emerged,
+    crop_finish and crop_harvest signals are sent and handled as by the
+    components of `Wofost80`.
+
+    Parameter values are read once at initialization. As in the object model,
+    the carbon balance is checked with `_check_carbon_balance()`, which raises
+    a CarbonBalanceError at the "strict" validation level only. The
+    partitioning factors are not checked.
+    """
+
+    # Initial number of leaf classes of the buffers
+    LEAF_BUFFER_SIZE = 128
+
+    _LV = Instance(np.ndarray)
+    _SLA = Instance(np.ndarray)
+    _LVAGE = Instance(np.ndarray)
+    _TMNSAV = Instance(deque)
+    _IDWST = Int(0)
+    _IDOST = Int(0)
+    _THRESHOLD_N_FLAG = Bool(False)
+    _force_vernalisation = Bool(False)
+
+    def initialize(self, day:date, kiosk:VariableKiosk, parvalues:dict):
+        """
+        :param day: start date of the simulation
+        :param kiosk: variable kiosk of this PCSE model instance
+        :param parvalues: dictionary with parameter key/value pairs
+        """
+        self.kiosk = kiosk
+        p = self._p = self._read_parameters(parvalues)
+
+        # Phenology
+        if p.CROP_START_TYPE == "emergence":
+            STAGE = "vegetative"
+            DVS = p.DVSI
+            # send signal to indicate crop emergence
+            self._send_signal(signals.crop_emerged)
+        elif p.CROP_START_TYPE == "sowing":
+            STAGE = "emerging"
+            DVS = -0.1
+        elif p.CROP_START_TYPE == "dormant":
+            STAGE = "sowing"
+            DVS = -0.1
+        else:
+            msg = "Unknown start type: %s. Are you using the corect Phenology \
+                module (Calling the correct Gym Environment)?" % p.CROP_START_TYPE
+            raise exc.PCSEError(msg)
+        s = dict(DVS=DVS, TSUM=0., TSUME=0., DOP=day, STAGE=STAGE, DATBE=0)
+        if p.IDSL >= 2:
+            s.update(VERN=0., ISVERNALISED=False)
+        self._force_vernalisation = False
+
+        # Partitioning
+        FR = p.FRTB(DVS)
+        FL = p.FLTB(DVS)
+        FS = p.FSTB(DVS)
+        FO = p.FOTB(DVS)
+        s.update(FR=FR, FL=FL, FS=FS, FO=FO, PF=PartioningFactors(FR, FL, FS, FO))
+        self._THRESHOLD_N_FLAG = False
+        self._THRESHOLD_N = 0.
+
+        # Assimilation: minimum temperatures of the last 7 days
+        self._TMNSAV = deque(maxlen=7)
+
+        # Evapotranspiration: number of days with water and oxygen stress
+        s.update(IDOST=-999, IDWST=-999)
+        self._IDWST = 0
+        self._IDOST = 0
+
+        # Roots
+        WRT = p.TDWI * FR
+        s.update(RD=p.RDI, RDM=max(p.RDI, min(p.RDMCR, p.RDMSOL)), WRT=WRT, DWRT=0.,
+                 TWRT=WRT + 0.)
+
+        # Stems
+        WST = (p.TDWI * (1-FR)) * FS
+        SAI = WST * p.SSATB(DVS)
+        s.update(WST=WST, DWST=0., TWST=WST + 0., SAI=SAI)
+
+        # Storage organs
+        WSO = (p.TDWI * (1-FR)) * FO
+        PAI = WSO * p.SPA(DVS)
+        s.update(WSO=WSO, DWSO=0., TWSO=WSO + 0., HWSO=0., PAI=PAI, LHW=0.)
+
+        # Leaves, see Base_WOFOST_Leaf_Dynamics_NPK for the leaf class buffers
+        WLV = (p.TDWI * (1-FR)) * FL
+        n = self.LEAF_BUFFER_SIZE
+        self._LV = np.zeros(n)
+        self._SLA = np.zeros(n)
+        self._LVAGE = np.zeros(n)
+        self._head = n - 1
+        self._tail = n
+        self._LV[self._head] = WLV
+        self._SLA[self._head] = p.SLATB(DVS)
+        self._WLV = WLV
+        self._LASUM = WLV * p.SLATB(DVS)
+        LAIEM = self._LASUM
+        LV, SLA, LVAGE = self._leaf_classes()
+        s.update(LV=LV, SLA=SLA, LVAGE=LVAGE, LAIEM=LAIEM, LASUM=LAIEM, LAIEXP=LAIEM,
+                 LAIMAX=LAIEM, LAI=LAIEM + SAI + PAI, WLV=WLV, DWLV=0., TWLV=WLV + 0.)
+
+        # N/P/K translocation and amounts in the crop organs
+        for name in ("NtranslocatableLV", "NtranslocatableST", "NtranslocatableRT",
+                     "PtranslocatableLV", "PtranslocatableST", "PtranslocatableRT",
+                     "KtranslocatableLV", "KtranslocatableST", "KtranslocatableRT",
+                     "Ntranslocatable", "Ptranslocatable", "Ktranslocatable"):
+            s[name] = 0.
+        NMAXLV, PMAXLV, KMAXLV = p.NMAXLV_TB(DVS), p.PMAXLV_TB(DVS), p.KMAXLV_TB(DVS)
+        self._NPK_INITIAL = (
+            WLV * NMAXLV + WST * NMAXLV * p.NMAXST_FR + WRT * NMAXLV * p.NMAXRT_FR + 0.,
+            WLV * PMAXLV + WST * PMAXLV * p.PMAXST_FR + WRT * PMAXLV * p.PMAXRT_FR + 0.,
+            WLV * KMAXLV + WST * KMAXLV * p.KMAXST_FR + WRT * KMAXLV * p.KMAXRT_FR + 0.)
+        s.update(NamountLV=WLV * NMAXLV, NamountST=WST * NMAXLV * p.NMAXST_FR,
+                 NamountRT=WRT * NMAXLV * p.NMAXRT_FR, NamountSO=0.,
+                 PamountLV=WLV * PMAXLV, PamountST=WST * PMAXLV * p.PMAXST_FR,
+                 PamountRT=WRT * PMAXLV * p.PMAXRT_FR, PamountSO=0.,
+                 KamountLV=WLV * KMAXLV, KamountST=WST * KMAXLV * p.KMAXST_FR,
+                 KamountRT=WRT * KMAXLV * p.KMAXRT_FR, KamountSO=0.,
+                 NuptakeTotal=0., PuptakeTotal=0., KuptakeTotal=0., NfixTotal=0.,
+                 NlossesTotal=0., PlossesTotal=0., KlossesTotal=0.)
+
+        # Crop totals
+        s.update(TAGP=s["TWLV"] + s["TWST"] + s["TWSO"], GASST=0., MREST=0., CTRAT=0.,
+                 CEVST=0., HI=0., DOF=None, FINISH_TYPE=None, FIN=False)
+        self._s = s
+        self._r = dict(_ZERO_RATES_VERN if p.IDSL >= 2 else _ZERO_RATES)
+
+        oid = id(self)
+        for name in s:
+            kiosk.register_variable(oid, name, type="S", publish=True)
+        for name in self._r:
+            kiosk.register_variable(oid, name, type="R", publish=True)
+        dict.update(kiosk, s)
+
+        # Check partitioning of TDWI over plant organs
+        checksum = parvalues["TDWI"] - s["TAGP"] - s["TWRT"]
+        if abs(checksum) > 0.0001:
+            msg = "Error in partitioning of initial biomass (TDWI)!"
+            raise exc.PartitioningError(msg)
+
+        self._connect_signal(self._on_CROP_FINISH, signal=signals.crop_finish)
+        self._connect_signal(self._on_CROP_HARVEST, signal=signals.crop_harvest)
+
+    @staticmethod
+    def _read_parameters(parvalues:dict):
+        """Returns a namespace with the parameter values, the AFGEN tables and
+        the table values that only depend on parameters.
+        """
+        names = _PARAMETERS + _TABLES
+        if parvalues["IDSL"] >= 2:
+            names += _VERN_PARAMETERS + _VERN_TABLES
+        for name in names + ("CROP_START_TYPE", "CROP_END_TYPE", "DTBEM"):
+            if name not in parvalues:
+                msg = "Value for parameter %s missing." % name
+                raise exc.ParameterError(msg)
+        p = SimpleNamespace()
+        for name in names:
+            if name in _TABLES or name in _VERN_TABLES:
+                setattr(p, name, Afgen.interned(parvalues[name]))
+            else:
+                setattr(p, name, float(parvalues[name]))
+        p.CROP_START_TYPE = parvalues["CROP_START_TYPE"]
+        p.CROP_END_TYPE = parvalues["CROP_END_TYPE"]
+        p.DTBEM = int(parvalues["DTBEM"])
+        p.AMAX_CO2 = p.CO2AMAXTB(p.CO2)
+        p.EFF_CO2 = p.CO2EFFTB(p.CO2)
+        p.TRAMX_CO2 = p.CO2TRATB(p.CO2)
+        return p
+
+    def _leaf_classes(self):
+        """Returns copies of the LV, SLA and LVAGE of the living leaf classes.
+        """
+        h, t = self._head, self._tail
+        return self._LV[h:t].copy(), self._SLA[h:t].copy(), self._LVAGE[h:t].copy()
+
+    def _grow_leaf_buffers(self):
+        """Moves the leaf classes to the end of buffers that are twice as large
+        as needed, making room for new leaf classes in front of them.
+        """
+        h, t = self._head, self._tail
+        n = t - h
+        size = max(self.LEAF_BUFFER_SIZE, 2 * n)
+        for name in ("_LV", "_SLA", "_LVAGE"):
+            buf = np.zeros(size)
+            buf[size - n:] = getattr(self, name)[h:t]
+            setattr(self, name, buf)
+        self._head, self._tail = size - n, size
+
+    def calc_rates(self, day:date, drv:WeatherDataProvider):
+        """Calculate state rates for integration
+        """
+        p = self._p
+        s = self._s
+        k = self.kiosk
+
+        STAGE = s["STAGE"]
+        DVS = s["DVS"]
+        TEMP = drv.TEMP
+
+        # Phenology: day length sensitivity and vernalisation
+        DVRED = 1.
+        if p.IDSL >= 1:
+            DAYLP = daylength(day, drv.LAT)
+            DVRED = limit(0., 1., (DAYLP - p.DLC)/(p.DLO - p.DLC))
+
+        VERNFAC = 1.
+        vern = None
+        if p.IDSL >= 2 and STAGE == "vegetative":
+            if not s["ISVERNALISED"]:
+                if DVS < p.VERNDVS:
+                    VERNR = p.VERNRTB(TEMP)
+                    VERNFAC = limit(0., 1., (s["VERN"] - p.VERNBASE)/(p.VERNSAT-p.VERNBASE))
+                else:
+                    VERNR = 0.
+                    VERNFAC = 1.0
+                    self._force_vernalisation = True
+            else:
+                VERNR = 0.
+                VERNFAC = 1.0
+            vern = {"VERNR": VERNR, "VERNFAC": VERNFAC}
+
+        # Phenology: development rates
+        RDEM = 0
+        DTSUME = DTSUM = DVR = 0.
+        if STAGE == "sowing":
+            if TEMP > p.TBASEM:
+                RDEM = 1
+        elif STAGE == "emerging":
+            DTSUME = limit(0., (p.TEFFMX - p.TBASEM), (TEMP - p.TBASEM))
+            DVR = 0.1 * DTSUME/p.TSUMEM
+        elif STAGE == "vegetative":
+            DTSUM = p.DTSMTB(TEMP) * VERNFAC * DVRED
+            DVR = DTSUM/p.TSUM1
+        elif STAGE == "reproductive":
+            DTSUM = p.DTSMTB(TEMP)
+            DVR = DTSUM/p.TSUM2
+        elif STAGE == "mature":
+            DTSUM = p.DTSMTB(TEMP)
+            DVR = DTSUM/p.TSUM3
+        elif STAGE != "dead":
+            msg = "Unrecognized STAGE defined in phenology submodule: %s."
+            raise exc.PCSEError(msg, STAGE)
+
+        # if before emergence there is no need to continue
+        # because only the phenology is running.
+        if STAGE == "emerging":
+            r = dict(_ZERO_RATES_VERN if p.IDSL >= 2 else _ZERO_RATES)
+            pheno = {"DTSUME": DTSUME, "DTSUM": DTSUM, "DVR": DVR, "RDEM": RDEM}
+            r.update(pheno)
+            dict.update(k, pheno)
+            self._r = r
+            return
+
+        LAI = s["LAI"]
+        WRT, WLV, WST, WSO = s["WRT"], s["WLV"], s["WST"], s["WSO"]
+
+        # Potential assimilation
+        self._TMNSAV.appendleft(drv.TMIN)
+        TMINRA = sum(self._TMNSAV)/len(self._TMNSAV)
+        DAYL, _, SINLD, COSLD, DIFPP, _, DSINBE, _ = astro(day, drv.LAT, drv.IRRAD)
+        AMAX = p.AMAXTB(DVS)
+        AMAX *= p.AMAX_CO2
+        AMAX *= p.TMPFTB(drv.DTEMP)
+        KDIF = p.KDIFTB(DVS)
+        EFF = p.EFFTB(drv.DTEMP) * p.EFF_CO2
+        DTGA = totass(DAYL, AMAX, EFF, LAI, KDIF, drv.IRRAD, DIFPP, DSINBE, SINLD, COSLD)
+        DTGA *= p.TMNFTB(TMINRA)
+        PGASS = DTGA * 30./44.
+
+        # (evapo)transpiration rates
+        ET0_CROP = max(0., p.CFET * drv.ET0)
+        EKL = exp(-(0.75*KDIF) * LAI)
+        EVWMX = drv.E0 * EKL
+        EVSMX = max(0., drv.ES0 * EKL)
+        TRAMX = ET0_CROP * (1.-EKL) * p.TRAMX_CO2
+        SWDEP = SWEAF(ET0_CROP, p.DEPNR)
+        SMCR = (1.-SWDEP)*(p.SMFCF-p.SMW) + p.SMW
+        SM = k.SM
+        RFWS = limit(0., 1., (SM-p.SMW)/(SMCR-p.SMW))
+        RFOS = 1.
+        if p.IAIRDU == 0 and p.IOX == 1:
+            RFOSMX = limit(0., 1., (p.SM0 - SM)/p.CRAIRC)
+            # maximum reduction reached after 4 days
+            RFOS = RFOSMX + (1. - min(k.DSOS, 4)/4.)*(1.-RFOSMX)
+        RFTRA = RFOS * RFWS
+        TRA = TRAMX * RFTRA
+        IDWS = IDOS = False
+        if RFWS < 1.:
+            IDWS = True
+            self._IDWST += 1
+        if RFOS < 1.:
+            IDOS = True
+            self._IDOST += 1
+
+        # nutrient status and reduction factor
+        NMAXLV = p.NMAXLV_TB(DVS)
+        PMAXLV = p.PMAXLV_TB(DVS)
+        KMAXLV = p.KMAXLV_TB(DVS)
+        NamountLV, NamountST, NamountRT, NamountSO = \
+            s["NamountLV"], s["NamountST"], s["NamountRT"], s["NamountSO"]
+        PamountLV, PamountST, PamountRT, PamountSO = \
+            s["PamountLV"], s["PamountST"], s["PamountRT"], s["PamountSO"]
+        KamountLV, KamountST, KamountRT, KamountSO = \
+            s["KamountLV"], s["KamountST"], s["KamountRT"], s["KamountSO"]
+        # Note that NPK_Stress uses PMAXRT_FR for the P concentration in stems
+        NMAXST = p.NMAXST_FR * NMAXLV
+        PMAXST = p.PMAXRT_FR * PMAXLV
+        KMAXST = p.KMAXST_FR * KMAXLV
+        VBM = WLV + WST
+        if VBM > 0.:
+            NcriticalVBM = (p.NCRIT_FR * NMAXLV * WLV + p.NCRIT_FR * NMAXST * WST)/VBM
+            PcriticalVBM = (p.PCRIT_FR * PMAXLV * WLV + p.PCRIT_FR * PMAXST * WST)/VBM
+            KcriticalVBM = (p.KCRIT_FR * KMAXLV * WLV + p.KCRIT_FR * KMAXST * WST)/VBM
+            NconcentrationVBM = (NamountLV + NamountST)/VBM
+            PconcentrationVBM = (PamountLV + PamountST)/VBM
+            KconcentrationVBM = (KamountLV + KamountST)/VBM
+            NresidualVBM = (WLV * p.NRESIDLV + WST * p.NRESIDST)/VBM
+            PresidualVBM = (WLV * p.PRESIDLV + WST * p.PRESIDST)/VBM
+            KresidualVBM = (WLV * p.KRESIDLV + WST * p.KRESIDST)/VBM
+        else:
+            NcriticalVBM = PcriticalVBM = KcriticalVBM = 0.
+            NconcentrationVBM = PconcentrationVBM = KconcentrationVBM = 0.
+            NresidualVBM = PresidualVBM = KresidualVBM = 0.
+        if (NcriticalVBM - NresidualVBM) > 0.:
+            NNI = limit(0.001, 1.0, (NconcentrationVBM - NresidualVBM)/(NcriticalVBM - NresidualVBM))
+        else:
+            NNI = 0.001
+        if (PcriticalVBM - PresidualVBM) > 0.:
+            PNI = limit(0.001, 1.0, (PconcentrationVBM - PresidualVBM)/(PcriticalVBM - PresidualVBM))
+        else:
+            PNI = 0.001
+        if (KcriticalVBM-KresidualVBM) > 0:
+            KNI = limit(0.001, 1.0, (KconcentrationVBM - KresidualVBM)/(KcriticalVBM - KresidualVBM))
+        else:
+            KNI = 0.001
+        NPKI = min(NNI, PNI, KNI)
+        RFNPK = limit(0., 1.0, 1. - (p.NLUE_NPK * (1.0001 - NPKI) ** 2))
+
+        # Select minimum of nutrient and water/oxygen stress
+        GASS = PGASS * min(RFNPK, RFTRA)
+
+        # Respiration
+        RMRES = (p.RMR * WRT + p.RML * WLV + p.RMS * WST + p.RMO * WSO)
+        RMRES *= p.RFSETB(DVS)
+        PMRES = RMRES * p.Q10**((TEMP-25.)/10.)
+        MRES = min(GASS, PMRES)
+
+        # Net available assimilates
+        ASRC = GASS - MRES
+
+        # DM partitioning factors (pf), conversion factor (CVF) and
+        # dry matter increase (DMI)
+        SURFACE_N = k.SURFACE_N
+        if SURFACE_N > p.NTHRESH:
+            self._THRESHOLD_N_FLAG = True
+            self._THRESHOLD_N = SURFACE_N
+        else:
+            self._THRESHOLD_N_FLAG = False
+            self._THRESHOLD_N = 0
+        pf = s["PF"]
+        FR, FL, FS, FO = pf
+        CVF = 1./((FL/p.CVL + FS/p.CVS + FO/p.CVO) * (1.-FR) + FR/p.CVR)
+        DMI = CVF * ASRC
+        self._check_carbon_balance(day, DMI, GASS, MRES, CVF, pf)
+
+        # Root dynamics
+        GRRT = FR * DMI
+        RDRNPK = max(SURFACE_N / p.NTHRESH, k.SURFACE_P / p.PTHRESH, k.SURFACE_K / p.KTHRESH)
+        DRRT1 = p.RDRRTB(DVS)
+        DRRT2 = p.RDRROS(RFOS)
+        DRRT3 = p.RDRRNPK(RDRNPK)
+        DRRT = WRT * limit(0, 1, max(DRRT1, DRRT2+DRRT3))
+        GWRT = GRRT - DRRT
+        RR = min((s["RDM"] - s["RD"]), p.RRI)
+        if FR == 0.:
+            RR = 0.
+
+        # Aboveground dry matter increase and distribution over stems,
+        # storage organs and leaves
+        ADMI = (1. - FR) * DMI
+        GRST = ADMI * FS
+        DRST = p.RDRSTB(DVS) * WST
+        GWST = GRST - DRST
+
+        GRSO = ADMI * FO
+        RDRSO = limit(0, 1, p.RDRSOB(DVS)+p.RDRSOF(TEMP))
+        DRSO = WSO * RDRSO
+        DHSO = s["HWSO"] * RDRSO
+        GWSO = GRSO - DRSO
+
+        GRLV = ADMI * FL
+        DSLV1 = WLV * (1.-RFTRA) * p.PERDL
+        LAICR = 3.2/KDIF
+        DSLV2 = WLV * limit(0., 0.03, 0.03*(LAI-LAICR)/LAICR)
+        if "RF_FROST" in k:
+            DSLV3 = WLV * k.RF_FROST
+        else:
+            DSLV3 = 0.
+        DSLV4 = WLV * p.RDRLV_NPK * (1.0 - NPKI)
+        DSLV = max(DSLV1, DSLV2, DSLV3) + DSLV4
+        # Leaf classes older than SPAN, found by moving a cursor from the
+        # oldest class
+        LV, LVAGE = self._LV, self._LVAGE
+        cursor = self._tail
+        while cursor > self._head and LVAGE[cursor-1] > p.SPAN:
+            cursor -= 1
+        DALV = 0.0
+        for i in range(cursor, self._tail):
+            DALV += float(LV[i])
+        DRLV = max(DSLV, DALV)
+        FYSAGE = max(0., (TEMP - p.TBASE)/(35. - p.TBASE))
+        SLAT = p.SLATB(DVS) * exp(-p.NSLA_NPK * (1.0 - NPKI))
+        LAIEXP = s["LAIEXP"]
+        GLAIEX = GLASOL = 0.
+        if LAIEXP < 6.:
+            DTEFF = max(0., TEMP-p.TBASE)
+            # Nutrient and water stress during juvenile stage
+            if DVS < 0.2 and LAI < 0.75:
+                factor = RFTRA * exp(-p.NLAI_NPK * (1.0 - NPKI))
+            else:
+                factor = 1.
+            GLAIEX = LAIEXP * p.RGRLAI * DTEFF * factor
+            # source-limited increase in leaf area
+            GLASOL = GRLV * SLAT
+            # sink-limited increase in leaf area
+            GLA = min(GLAIEX, GLASOL)
+            # adjustment of specific leaf area of youngest leaf class
+            if GRLV > 0.:
+                SLAT = GLA/GRLV
+
+        # N/P/K demand of the organs, uses the maximum concentrations in
+        # stems of NPK_Demand_Uptake
+        NMAXRT = p.NMAXRT_FR * NMAXLV
+        PMAXST = p.PMAXST_FR * PMAXLV
+        PMAXRT = p.PMAXRT_FR * PMAXLV
+        KMAXRT = p.KMAXRT_FR * KMAXLV
+        NdemandLV = max(NMAXLV * WLV - NamountLV, 0.) + max(GRLV * NMAXLV, 0)
+        NdemandST = max(NMAXST * WST - NamountST, 0.) + max(GRST * NMAXST, 0)
+        NdemandRT = max(NMAXRT * WRT - NamountRT, 0.) + max(GRRT * NMAXRT, 0)
+        NdemandSO = max(p.NMAXSO * WSO - NamountSO, 0.)
+        PdemandLV = max(PMAXLV * WLV - PamountLV, 0.) + max(GRLV * PMAXLV, 0)
+        PdemandST = max(PMAXST * WST - PamountST, 0.) + max(GRST * PMAXST, 0)
+        PdemandRT = max(PMAXRT * WRT - PamountRT, 0.) + max(GRRT * PMAXRT, 0)
+        PdemandSO = max(p.PMAXSO * WSO - PamountSO, 0.)
+        KdemandLV = max(KMAXLV * WLV - KamountLV, 0.) + max(GRLV * KMAXLV, 0)
+        KdemandST = max(KMAXST * WST - KamountST, 0.) + max(GRST * KMAXST, 0)
+        KdemandRT = max(KMAXRT * WRT - KamountRT, 0.) + max(GRRT * KMAXRT, 0)
+        KdemandSO = max(p.KMAXSO * WSO - KamountSO, 0.)
+        Ndemand = NdemandLV + NdemandST + NdemandRT
+        Pdemand = PdemandLV + PdemandST + PdemandRT
+        Kdemand = KdemandLV + KdemandST + KdemandRT
+
+        # N/P/K uptake
+        Ntranslocatable = s["Ntranslocatable"]
+        Ptranslocatable = s["Ptranslocatable"]
+        Ktranslocatable = s["Ktranslocatable"]
+        RNuptakeSO = min(NdemandSO, Ntranslocatable)/p.TCNT
+        RPuptakeSO = min(PdemandSO, Ptranslocatable)/p.TCPT
+        RKuptakeSO = min(KdemandSO, Ktranslocatable)/p.TCKT
+        # No nutrients are absorbed when severe water shortage occurs
+        NutrientLIMIT = 1.0 if RFTRA > 0.01 else 0.
+        RNfixation = (max(0., p.NFIX_FR * Ndemand) * NutrientLIMIT)
+        if DVS < p.DVS_NPK_STOP:
+            RNuptake = (max(0., min(Ndemand - RNfixation, k.NAVAIL, p.RNUPTAKEMAX)) * NutrientLIMIT)
+            RPuptake = (max(0., min(Pdemand, k.PAVAIL, p.RPUPTAKEMAX)) * NutrientLIMIT)
+            RKuptake = (max(0., min(Kdemand, k.KAVAIL, p.RKUPTAKEMAX)) * NutrientLIMIT)
+        else:
+            RNuptake = RPuptake = RKuptake = 0.
+        if Ndemand == 0.:
+            RNuptakeLV = RNuptakeST = RNuptakeRT = 0.
+        else:
+            RNuptakeLV = (NdemandLV / Ndemand) * (RNuptake + RNfixation)
+            RNuptakeST = (NdemandST / Ndemand) * (RNuptake + RNfixation)
+            RNuptakeRT = (NdemandRT / Ndemand) * (RNuptake + RNfixation)
+        if Pdemand == 0.:
+            RPuptakeLV = RPuptakeST = RPuptakeRT = 0.
+        else:
+            RPuptakeLV = (PdemandLV / Pdemand) * RPuptake
+            RPuptakeST = (PdemandST / Pdemand) * RPuptake
+            RPuptakeRT = (PdemandRT / Pdemand) * RPuptake
+        if Kdemand == 0.:
+            RKuptakeLV = RKuptakeST = RKuptakeRT = 0.
+        else:
+            RKuptakeLV = (KdemandLV / Kdemand) * RKuptake
+            RKuptakeST = (KdemandST / Kdemand) * RKuptake
+            RKuptakeRT = (KdemandRT / Kdemand) * RKuptake
+
+        # N/P/K translocation to the storage organs
+        if Ntranslocatable > 0.:
+            RNtranslocationLV = RNuptakeSO * s["NtranslocatableLV"] / Ntranslocatable
+            RNtranslocationST = RNuptakeSO * s["NtranslocatableST"] / Ntranslocatable
+            RNtranslocationRT = RNuptakeSO * s["NtranslocatableRT"] / Ntranslocatable
+        else:
+            RNtranslocationLV = RNtranslocationST = RNtranslocationRT = 0.
+        if Ptranslocatable > 0:
+            RPtranslocationLV = RPuptakeSO * s["PtranslocatableLV"] / Ptranslocatable
+            RPtranslocationST = RPuptakeSO * s["PtranslocatableST"] / Ptranslocatable
+            RPtranslocationRT = RPuptakeSO * s["PtranslocatableRT"] / Ptranslocatable
+        else:
+            RPtranslocationLV = RPtranslocationST = RPtranslocationRT = 0.
+        if Ktranslocatable > 0:
+            RKtranslocationLV = RKuptakeSO * s["KtranslocatableLV"] / Ktranslocatable
+            RKtranslocationST = RKuptakeSO * s["KtranslocatableST"] / Ktranslocatable
+            RKtranslocationRT = RKuptakeSO * s["KtranslocatableRT"] / Ktranslocatable
+        else:
+            RKtranslocationLV = RKtranslocationST = RKtranslocationRT = 0.
+
+        # Loss of N/P/K due to death of plant material
+        RNdeathLV = p.NRESIDLV * DRLV
+        RNdeathST = p.NRESIDST * DRST
+        RNdeathRT = p.NRESIDRT * DRRT
+        RPdeathLV = p.PRESIDLV * DRLV
+        RPdeathST = p.PRESIDST * DRST
+        RPdeathRT = p.PRESIDRT * DRRT
+        RKdeathLV = p.KRESIDLV * DRLV
+        RKdeathST = p.KRESIDST * DRST
+        RKdeathRT = p.KRESIDRT * DRRT
+
+        r = {"DTSUME": DTSUME, "DTSUM": DTSUM, "DVR": DVR, "RDEM": RDEM, "PGASS": PGASS,
+             "EVWMX": EVWMX, "EVSMX": EVSMX, "TRAMX": TRAMX, "RFWS": RFWS, "RFOS": RFOS,
+             "RFTRA": RFTRA, "TRA": TRA, "NNI": NNI, "PNI": PNI, "KNI": KNI, "NPKI": NPKI,
+             "RFNPK": RFNPK, "GASS": GASS, "PMRES": PMRES, "MRES": MRES, "ASRC": ASRC,
+             "DMI": DMI, "GRRT": GRRT, "DRRT1": DRRT1, "DRRT2": DRRT2, "DRRT3": DRRT3,
+             "DRRT": DRRT, "GWRT": GWRT, "RR": RR, "ADMI": ADMI, "GRST": GRST,
+             "DRST": DRST, "GWST": GWST, "GRSO": GRSO, "DRSO": DRSO, "DHSO": DHSO,
+             "GWSO": GWSO, "GRLV": GRLV, "DSLV1": DSLV1, "DSLV2": DSLV2, "DSLV3": DSLV3,
+             "DSLV4": DSLV4, "DSLV": DSLV, "DALV": DALV, "DRLV": DRLV, "FYSAGE": FYSAGE,
+             "SLAT": SLAT, "NdemandLV": NdemandLV, "NdemandST": NdemandST,
+             "NdemandRT": NdemandRT, "NdemandSO": NdemandSO, "PdemandLV": PdemandLV,
+             "PdemandST": PdemandST, "PdemandRT": PdemandRT, "PdemandSO": PdemandSO,
+             "KdemandLV": KdemandLV, "KdemandST": KdemandST, "KdemandRT": KdemandRT,
+             "KdemandSO": KdemandSO, "Ndemand": Ndemand, "Pdemand": Pdemand,
+             "Kdemand": Kdemand, "RNuptakeSO": RNuptakeSO, "RPuptakeSO": RPuptakeSO,
+             "RKuptakeSO": RKuptakeSO, "RNfixation": RNfixation, "RNuptake": RNuptake,
+             "RPuptake": RPuptake, "RKuptake": RKuptake, "RNuptakeLV": RNuptakeLV,
+             "RNuptakeST": RNuptakeST, "RNuptakeRT": RNuptakeRT, "RPuptakeLV": RPuptakeLV,
+             "RPuptakeST": RPuptakeST, "RPuptakeRT": RPuptakeRT, "RKuptakeLV": RKuptakeLV,
+             "RKuptakeST": RKuptakeST, "RKuptakeRT": RKuptakeRT,
+             "RNtranslocationLV": RNtranslocationLV, "RNtranslocationST": RNtranslocationST,
+             "RNtranslocationRT": RNtranslocationRT, "RPtranslocationLV": RPtranslocationLV,
+             "RPtranslocationST": RPtranslocationST, "RPtranslocationRT": RPtranslocationRT,
+             "RKtranslocationLV": RKtranslocationLV, "RKtranslocationST": RKtranslocationST,
+             "RKtranslocationRT": RKtranslocationRT, "RNdeathLV": RNdeathLV,
+             "RNdeathST": RNdeathST, "RNdeathRT": RNdeathRT, "RPdeathLV": RPdeathLV,
+             "RPdeathST": RPdeathST, "RPdeathRT": RPdeathRT, "RKdeathLV": RKdeathLV,
+             "RKdeathST": RKdeathST, "RKdeathRT": RKdeathRT,
+             # N/P/K rates in the organs as uptake - translocation - death, except
+             # for storage organs which only take up as a result of translocation
+             "RNamountLV": RNuptakeLV - RNtranslocationLV - RNdeathLV,
+             "RNamountST": RNuptakeST - RNtranslocationST - RNdeathST,
+             "RNamountRT": RNuptakeRT - RNtranslocationRT - RNdeathRT,
+             "RNamountSO": RNuptakeSO,
+             "RPamountLV": RPuptakeLV - RPtranslocationLV - RPdeathLV,
+             "RPamountST": RPuptakeST - RPtranslocationST - RPdeathST,
+             "RPamountRT": RPuptakeRT - RPtranslocationRT - RPdeathRT,
+             "RPamountSO": RPuptakeSO,
+             "RKamountLV": RKuptakeLV - RKtranslocationLV - RKdeathLV,
+             "RKamountST": RKuptakeST - RKtranslocationST - RKdeathST,
+             "RKamountRT": RKuptakeRT - RKtranslocationRT - RKdeathRT,
+             "RKamountSO": RKuptakeSO,
+             "RNloss": RNdeathLV + RNdeathST + RNdeathRT,
+             "RPloss": RPdeathLV + RPdeathST + RPdeathRT,
+             "RKloss": RKdeathLV + RKdeathST + RKdeathRT}
+        dict.update(k, r)
+
+        # Rates that are only assigned under some conditions are published
+        # only then, as in the object model
+        r["GLAIEX"] = GLAIEX
+        r["GLASOL"] = GLASOL
+        if LAIEXP < 6.:
+            dict.__setitem__(k, "GLAIEX", GLAIEX)
+            dict.__setitem__(k, "GLASOL", GLASOL)
+        r["IDWS"] = IDWS
+        r["IDOS"] = IDOS
+        if IDWS:
+            dict.__setitem__(k, "IDWS", True)
+        if IDOS:
+            dict.__setitem__(k, "IDOS", True)
+        if p.IDSL >= 2:
+            if vern is None:
+                vern = {"VERNR": 0., "VERNFAC": 0.}
+            else:
+                dict.update(k, vern)
+            r.update(vern)
+        self._r = r
+
+        self._check_npk_balance(day)
+
+    def _check_npk_balance(self, day:date):
+        """Checks that the N/P/K flows in the crop are balanced, see
+        `NPK_Crop_Dynamics`.
+        """
+        s = self._s
+        NI, PI, KI = self._NPK_INITIAL
+        for nutrient, initial, total in (("N", NI, s["NuptakeTotal"] + s["NfixTotal"]),
+                                         ("P", PI, s["PuptakeTotal"]),
+                                         ("K", KI, s["KuptakeTotal"])):
+            amounts = s[nutrient + "amountLV"] + s[nutrient + "amountST"] + \
+                s[nutrient + "amountRT"] + s[nutrient + "amountSO"]
+            checksum = abs(total + initial - (amounts + s[nutrient + "lossesTotal"]))
+            if checksum >= 1.0:
+                msg = "%s flows not balanced on day %s\n" % (nutrient, day)
+                msg += "Checksum: %f, %suptake_T: %f\n" % (checksum, nutrient, total)
+                msg += "%samount: %f, %slosses: %f\n" % \
+                       (nutrient, amounts, nutrient, s[nutrient + "lossesTotal"])
+                raise exc.NutrientBalanceError(msg)
+
+    def integrate(self, day:date, delt:float=1.0):
+        """Integrate state rates
+        """
+        p = self._p
+        s = self._s
+        r = self._r
+        k = self.kiosk
+
+        # crop stage before integration
+        STAGE = s["STAGE"]
+
+        # Vernalisation
+        if p.IDSL >= 2:
+            if STAGE == "vegetative":
+                VERN = s["VERN"] + r["VERNR"]
+                if VERN >= p.VERNSAT or self._force_vernalisation:
+                    ISVERNALISED = True
+                else:
+                    ISVERNALISED = False
+                s["VERN"] = VERN
+                s["ISVERNALISED"] = ISVERNALISED
+            dict.__setitem__(k, "VERN", s["VERN"])
+            dict.__setitem__(k, "ISVERNALISED", s["ISVERNALISED"])
+
+        # Phenology
+        TSUME = s["TSUME"] + r["DTSUME"]
+        DVS = s["DVS"] + r["DVR"]
+        TSUM = s["TSUM"] + r["DTSUM"]
+        DATBE = s["DATBE"] + r["RDEM"]
+        pheno = {"TSUME": TSUME, "DVS": DVS, "TSUM": TSUM, "DATBE": DATBE}
+        s.update(pheno)
+        dict.update(k, pheno)
+        if STAGE == "sowing":
+            if DATBE >= p.DTBEM:
+                self._next_stage(day)
+                s["DVS"] = -0.1
+                s["DATBE"] = 0
+        elif STAGE == "emerging":
+            if DVS >= 0.0:
+                self._next_stage(day)
+                s["DVS"] = 0.
+        elif STAGE == "vegetative":
+            if DVS >= 1.0:
+                self._next_stage(day)
+                s["DVS"] = 1.0
+        elif STAGE == "reproductive":
+            if DVS >= p.DVSM:
+                self._next_stage(day)
+                s["DVS"] = p.DVSM
+        elif STAGE == "mature":
+            if DVS >= p.DVSEND:
+                self._next_stage(day)
+                s["DVS"] = p.DVSEND
+        elif STAGE != "dead":
+            msg = "No STAGE defined in phenology submodule"
+            raise exc.PCSEError(msg)
+        DVS = s["DVS"]
+        dict.__setitem__(k, "DVS", DVS)
+        dict.__setitem__(k, "DATBE", s["DATBE"])
+
+        # if before emergence there is no need to continue
+        # because only the phenology is running.
+        # All state variables are published to keep them available
+        # in the kiosk
+        if STAGE == "emerging":
+            dict.update(k, s)
+            self.zerofy()
+            return
+
+        # Partitioning
+        FRTB, FLTB, FSTB, FOTB = p.FRTB(DVS), p.FLTB(DVS), p.FSTB(DVS), p.FOTB(DVS)
+        RFTRA = r["RFTRA"]
+        NNI = r["NNI"]
+        if RFTRA < NNI:
+            # Water stress is more severe than nitrogen stress
+            FRTMOD = max(1., 1./(RFTRA + 0.5))
+            FR = min(0.6, FRTB * FRTMOD)
+            FL = FLTB
+            FS = FSTB
+            FO = FOTB
+        else:
+            # Nitrogen stress is more severe than water stress
+            FLVMOD = exp(-p.NPART * (1.0 - NNI))
+            FL = FLTB * FLVMOD
+            FS = FSTB + FLTB - FL
+            FR = FRTB
+            FO = FOTB
+        if self._THRESHOLD_N_FLAG:
+            # Excess nitrogen resulting in less partioning to storage organs
+            # and more to leaves
+            FLVMOD = 1 / exp(-p.NPART * (1.0 - (self._THRESHOLD_N / p.NTHRESH)))
+            FO = FOTB * FLVMOD
+            FL = FLTB + FOTB - FO
+            FS = FSTB
+            FR = FRTB
+
+        # Roots
+        WRT = s["WRT"] + r["GWRT"]
+        DWRT = s["DWRT"] + r["DRRT"]
+
+        # Storage organs
+        WSO = s["WSO"] + r["GWSO"]
+        HWSO = limit(0, WSO, s["HWSO"] + (r["GRSO"] - r["DHSO"]))
+        DWSO = s["DWSO"] + r["DRSO"]
+        TWSO = WSO + DWSO
+        PAI = WSO * p.SPA(DVS)
+
+        # Stems
+        WST = s["WST"] + r["GWST"]
+        DWST = s["DWST"] + r["DRST"]
+        TWST = WST + DWST
+        SAI = WST * p.SSATB(DVS)
+
+        # Leaves: leaf death is imposed on leaves by removing leave classes
+        # from the end of the buffers.
+        LV, SLA = self._LV, self._SLA
+        WLV, LASUM = self._WLV, self._LASUM
+        GRLV, SLAT = r["GRLV"], r["SLAT"]
+        tDRLV = r["DRLV"]
+        while tDRLV > 0. and self._tail > self._head:
+            LVweigth = float(LV[self._tail-1])
+            if tDRLV >= LVweigth: # remove complete leaf class
+                tDRLV -= LVweigth
+                self._tail -= 1
+                WLV -= LVweigth
+                LASUM -= LVweigth * SLA[self._tail]
+            else: # Decrease value of oldest leave class
+                LV[self._tail-1] -= tDRLV
+                WLV -= tDRLV
+                LASUM -= tDRLV * SLA[self._tail-1]
+                tDRLV = 0.
+        self._LVAGE[self._head:self._tail] += r["FYSAGE"]
+        # new leaves in class 1
+        if self._head == 0:
+            self._grow_leaf_buffers()
+            LV, SLA = self._LV, self._SLA
+        self._head -= 1
+        LV[self._head] = GRLV
+        SLA[self._head] = SLAT
+        self._LVAGE[self._head] = 0.
+        WLV += GRLV
+        LASUM += GRLV * SLAT
+        if self._tail - self._head == 1:
+            # Only the new leaf class is left, restart the running sums
+            WLV = GRLV
+            LASUM = GRLV * SLAT
+        self._WLV, self._LASUM = WLV, LASUM = float(WLV), float(LASUM)
+        LAI = LASUM + SAI + PAI
+        DWLV = s["DWLV"] + r["DRLV"]
+        TWLV = WLV + DWLV
+        LV, SLA, LVAGE = self._leaf_classes()
+
+        # N/P/K amounts in the organs
+        NamountLV = s["NamountLV"] + r["RNamountLV"]
+        NamountST = s["NamountST"] + r["RNamountST"]
+        NamountRT = s["NamountRT"] + r["RNamountRT"]
+        PamountLV = s["PamountLV"] + r["RPamountLV"]
+        PamountST = s["PamountST"] + r["RPamountST"]
+        PamountRT = s["PamountRT"] + r["RPamountRT"]
+        KamountLV = s["KamountLV"] + r["RKamountLV"]
+        KamountST = s["KamountST"] + r["RKamountST"]
+        KamountRT = s["KamountRT"] + r["RKamountRT"]
+
+        # translocatable N/P/K amounts in the organs
+        NtranslocatableLV = max(0., NamountLV - WLV * p.NRESIDLV)
+        NtranslocatableST = max(0., NamountST - WST * p.NRESIDST)
+        NtranslocatableRT = max(0., NamountRT - WRT * p.NRESIDRT)
+        PtranslocatableLV = max(0., PamountLV - WLV * p.PRESIDLV)
+        PtranslocatableST = max(0., PamountST - WST * p.PRESIDST)
+        PtranslocatableRT = max(0., PamountRT - WRT * p.PRESIDRT)
+        KtranslocatableLV = max(0., KamountLV - WLV * p.KRESIDLV)
+        KtranslocatableST = max(0., KamountST - WST * p.KRESIDST)
+        KtranslocatableRT = max(0., KamountRT - WRT * p.KRESIDRT)
+        if DVS > p.DVS_NPK_TRANSL:
+            Ntranslocatable = NtranslocatableLV + NtranslocatableST + NtranslocatableRT
+            Ptranslocatable = PtranslocatableLV + PtranslocatableST + PtranslocatableRT
+            Ktranslocatable = KtranslocatableLV + KtranslocatableST + KtranslocatableRT
+        else:
+            Ntranslocatable = Ptranslocatable = Ktranslocatable = 0.
+
+        states = {"FR": FR, "FL": FL, "FS": FS, "FO": FO,
+                  "PF": PartioningFactors(FR, FL, FS, FO),
+                  "WRT": WRT, "DWRT": DWRT, "TWRT": WRT + DWRT, "RD": s["RD"] + r["RR"],
+                  "WSO": WSO, "HWSO": HWSO, "DWSO": DWSO, "TWSO": TWSO, "PAI": PAI,
+                  "WST": WST, "DWST": DWST, "TWST": TWST, "SAI": SAI,
+                  "LASUM": LASUM, "LAI": LAI, "LAIMAX": max(LAI, s["LAIMAX"]),
+                  "LAIEXP": s["LAIEXP"] + r["GLAIEX"], "WLV": WLV, "DWLV": DWLV,
+                  "TWLV": TWLV, "LV": LV, "SLA": SLA, "LVAGE": LVAGE,
+                  "NamountLV": NamountLV, "NamountST": NamountST, "NamountRT": NamountRT,
+                  "NamountSO": s["NamountSO"] + r["RNamountSO"],
+                  "PamountLV": PamountLV, "PamountST": PamountST, "PamountRT": PamountRT,
+                  "PamountSO": s["PamountSO"] + r["RPamountSO"],
+                  "KamountLV": KamountLV, "KamountST": KamountST, "KamountRT": KamountRT,
+                  "KamountSO": s["KamountSO"] + r["RKamountSO"],
+                  "NtranslocatableLV": NtranslocatableLV,
+                  "NtranslocatableST": NtranslocatableST,
+                  "NtranslocatableRT": NtranslocatableRT,
+                  "PtranslocatableLV": PtranslocatableLV,
+                  "PtranslocatableST": PtranslocatableST,
+                  "PtranslocatableRT": PtranslocatableRT,
+                  "KtranslocatableLV": KtranslocatableLV,
+                  "KtranslocatableST": KtranslocatableST,
+                  "KtranslocatableRT": KtranslocatableRT,
+                  "Ntranslocatable": Ntranslocatable, "Ptranslocatable": Ptranslocatable,
+                  "Ktranslocatable": Ktranslocatable,
+                  # total NPK uptake from soil
+                  "NuptakeTotal": s["NuptakeTotal"] + r["RNuptake"],
+                  "PuptakeTotal": s["PuptakeTotal"] + r["RPuptake"],
+                  "KuptakeTotal": s["KuptakeTotal"] + r["RKuptake"],
+                  "NfixTotal": s["NfixTotal"] + r["RNfixation"],
+                  "NlossesTotal": s["NlossesTotal"] + r["RNloss"],
+                  "PlossesTotal": s["PlossesTotal"] + r["RPloss"],
+                  "KlossesTotal": s["KlossesTotal"] + r["RKloss"],
+                  # total (living+dead) above-ground biomass of the crop
+                  "TAGP": TWLV + TWST + TWSO,
+                  # total gross assimilation and maintenance respiration
+                  "GASST": s["GASST"] + r["GASS"],
+                  "MREST": s["MREST"] + r["MRES"],
+                  # total crop transpiration and soil evaporation
+                  "CTRAT": s["CTRAT"] + r["TRA"],
+                  "CEVST": s["CEVST"] + k.EVS}
+        s.update(states)
+        dict.update(k, states)
+        self.zerofy()
+
+    def _next_stage(self, day:date):
+        """Moves the STAGE to the next phenological stage and sends the
+        crop_emerged and crop_finish signals.
+        """
+        s = self._s
+        p = self._p
+
+        current_STAGE = s["STAGE"]
+        if current_STAGE == "sowing":
+            STAGE = "emerging"
+        elif current_STAGE == "emerging":
+            STAGE = "vegetative"
+        elif current_STAGE == "vegetative":
+            STAGE = "reproductive"
+        elif current_STAGE == "reproductive":
+            STAGE = "mature"
+        elif current_STAGE == "mature":
+            STAGE = "dead"
+        else:
+            msg = "Cannot move to next phenology stage: maturity already reached!"
+            raise exc.PCSEError(msg)
+        s["STAGE"] = STAGE
+        dict.__setitem__(self.kiosk, "STAGE", STAGE)
+
+        if STAGE == "vegetative":
+            # send signal to indicate crop emergence
+            self._send_signal(signals.crop_emerged)
+            if p.CROP_END_TYPE in ["emergence"]:
+                self._send_signal(signal=signals.crop_finish, day=day,
+                                  finish_type="emergence", crop_delete=True)
+        elif STAGE == "mature" and p.CROP_END_TYPE in ["maturity"]:
+            self._send_signal(signal=signals.crop_finish, day=day,
+                              finish_type="maturity", crop_delete=True)
+        elif STAGE == "dead" and p.CROP_END_TYPE in ["death"]:
+            self._send_signal(signal=signals.crop_finish, day=day,
+                              finish_type="death", crop_delete=True)
+
+        msg = "Changed phenological stage '%s' to '%s' on %s"
+        self.logger.info(msg % (current_STAGE, STAGE, day))
+
+    def finalize(self, day:date):
+        """Finalize crop parameters and output at the end of the simulation
+        """
+        s = self._s
+        # Calculate Harvest Index
+        if s["TAGP"] > 0:
+            HI = s["TWSO"]/s["TAGP"]
+        else:
+            msg = "Cannot calculate Harvest Index because TAGP=0"
+            self.logger.warning(msg)
+            HI = -1.
+        states = {"HI": HI, "IDWST": self._IDWST, "IDOST": self._IDOST}
+        while len(self._for_finalize) > 0:
+            name, value = self._for_finalize.popitem()
+            if name in s:
+                states[name] = value
+        s.update(states)
+        dict.update(self.kiosk, states)
+
+    def get_variable(self, varname:str):
+        """Return the value of the specified state or rate variable.
+
+        :param varname: Name of the variable.
+        """
+        if varname in self._s:
+            return self._s[varname]
+        return self._r.get(varname)
+
+    def touch(self):
+        """Publishes all state variables in the kiosk.
+        """
+        dict.update(self.kiosk, self._s)
+
+    def zerofy(self):
+        """Sets all rate variables to zero.
+        """
+        self._r = dict(_ZERO_RATES_VERN if self._p.IDSL >= 2 else _ZERO_RATES)
+
+    def _on_CROP_FINISH(self, day:date, finish_type:str=None):
+        """Handler for setting day of finish (DOF) and reason for
+        crop finishing (FINISH).
+        """
+        self._s["FIN"] = True
+        dict.__setitem__(self.kiosk, "FIN", True)
+        self._for_finalize["DOF"] = day
+        self._for_finalize["FINISH_TYPE"] = finish_type
+
+    def _on_CROP_HARVEST(self, day:date, efficiency:float=1.0):
+        """Receive the on crop harvest signal and update the harvestable weight
+        of the storage organs.
+        """
+        s = self._s
+        s["LHW"] = (efficiency) * s["HWSO"]
+        s["HWSO"] = (1-efficiency) * s["HWSO"]
+        dict.__setitem__(self.kiosk, "LHW", s["LHW"])
+        dict.__setitem__(self.kiosk, "HWSO", s["HWSO"])
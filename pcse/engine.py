@@ -14,11 +14,18 @@ the model details are not known beforehand.
 Written by: Allard de Wit (allard.dewit@wur.nl), April 2014
 Modified by Will Solow, 2024
 """
+import copy
+import types
 from datetime import date
+from functools import partial
+from collections import deque
+from array import array
 
-from .utils.traitlets import Instance, Bool, List, Dict
-from .base import (VariableKiosk, AncillaryObject, SimulationObject,
-                           BaseEngine, ParameterProvider)
+import numpy as np
+
+from .utils.traitlets import Instance, Bool, List, Dict, HasTraits
+from .base import (VariableKiosk, VariableBuffer, AncillaryObject, SimulationObject,
+                           BaseEngine, ParameterProvider, ParamTemplate)
 from .nasapower import WeatherDataProvider, WeatherDataContainer
 from .agromanager import BaseAgroManager
 from .util import ConfigurationLoader
@@ -26,6 +33,240 @@ from .base.timer import Timer
 from . import signals
 from . import exceptions as exc
 
+def _copy_state(value, memo):
+    """Copy the mutable containers in value, share everything else.
+
+    HasTraits objects are restored in place and are therefore shared by
+    reference, just as immutable values (floats, dates, Afgen tables). The
+    memo dict makes sure that a container referenced from several places
+    (e.g. a state variable and its published value in the kiosk) is copied
+    only once. Objects can be replaced by others by adding them to the memo
+    beforehand, which is used by `Engine.fork()`.
+    """
+    if id(value) in memo:
+        return memo[id(value)]
+    vtype = type(value)
+    if vtype not in (list, tuple, dict, set, deque, array, np.ndarray):
+        return value
+
+    if vtype is dict:
+        new = {k: _copy_state(v, memo) for k, v in value.items()}
+    elif vtype is list:
+        new = [_copy_state(v, memo) for v in value]
+    elif vtype is tuple:
+        new = tuple(_copy_state(v, memo) for v in value)
+    elif vtype is deque:
+        new = deque((_copy_state(v, memo) for v in value), maxlen=value.maxlen)
+    elif vtype is set:
+        new = set(value)
+    elif vtype is array:
+        new = array(value.typecode, value)
+    else:
+        new = value.copy()
+    memo[id(value)] = new
+    return new
+
+def _find_state_objects(root):
+    """Returns all HasTraits objects holding simulation state that can be
+    reached from root, including root itself.
+
+    Parameters (ParamTemplate) are skipped as they do not change during
+    a simulation.
+    """
+    found = {}
+    tocheck = [root]
+    while tocheck:
+        obj = tocheck.pop()
+        if isinstance(obj, HasTraits):
+            if isinstance(obj, ParamTemplate) or id(obj) in found:
+                continue
+            found[id(obj)] = obj
+            tocheck.extend(obj._trait_values.values())
+            tocheck.extend(v for k, v in obj.__dict__.items() if not k.startswith("_trait"))
+        elif isinstance(obj, (list, tuple, deque)):
+            tocheck.extend(obj)
+        elif type(obj) is dict:
+            tocheck.extend(obj.values())
+    return list(found.values())
+
+def _save_objects(objects, memo):
+    """Returns a list of (object, trait values, instance attributes) with a
+    copy of the state of each HasTraits object in objects.
+    """
+    saved = []
+    for obj in objects:
+        attrs = {k: _copy_state(v, memo) for k, v in obj.__dict__.items()
+                 if not (k.startswith("_trait") or k == "_cross_validation_lock")}
+        saved.append((obj, _copy_state(obj._trait_values, memo), attrs))
+    return saved
+
+def _restore_objects(saved, memo):
+    """Restores the objects in place from saved as returned by
+    `_save_objects()`.
+    """
+    for obj, trait_values, attrs in saved:
+        obj._trait_values.clear()
+        obj._trait_values.update(_copy_state(trait_values, memo))
+        obj.__dict__.pop("_sub_sim_objects", None)
+        for k, v in attrs.items():
+            obj.__dict__[k] = _copy_state(v, memo)
+
+def _same_parameters(a, b):
+    """Returns True if the parameter values in the dicts a and b are equal.
+    """
+    if a.keys() != b.keys():
+        return False
+    for k, v in a.items():
+        w = b[k]
+        if v is w:
+            continue
+        try:
+            if type(v) is not type(w) or not v == w:
+                return False
+        except ValueError:
+            # e.g. comparing arrays
+            return False
+    return True
+
+def _get_none():
+    """Getter for output variables that are not registered in the kiosk."""
+    return None
+
+def _get_published(kiosk, varname):
+    """Getter for output variables that are only available through the kiosk."""
+    return kiosk[varname] if varname in kiosk else None
+
+def _to_float(value):
+    """Converts an output value for storage in the output array. Missing
+    values become NaN, dates are stored as YYYYMMDD and other values that are
+    not numeric (e.g. FINISH_TYPE) as NaN.
+    """
+    if value is None:
+        return np.nan
+    if isinstance(value, date):
+        return float(value.year * 10000 + value.month * 100 + value.day)
+    if isinstance(value, np.ndarray) and value.ndim > 0:
+        # e.g. the leaf classes
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class EngineSnapshot(object):
+    """Copy of the mutable state of an Engine as returned by `Engine.snapshot()`.
+
+    The snapshot refers to the SimulationObjects of the engine it was taken
+    from and can therefore only be restored on that engine. A snapshot can be
+    restored any number of times.
+    """
+
+    def __init__(self, engine, day, objects, kiosk, parameters):
+        """
+        :param engine: the Engine this snapshot was taken from
+        :param day: the simulation day of the snapshot
+        :param objects: list of (object, trait values, instance attributes)
+        :param kiosk: the state of the VariableKiosk
+        :param parameters: the state of the ParameterProvider
+        """
+        self.engine = engine
+        self.day = day
+        self.objects = objects
+        self.kiosk = kiosk
+        self.parameters = parameters
+
+class CropPool(object):
+    """Crop simulation objects kept by an Engine for reuse at the next
+    CROP_START of the same crop, see CROP_POOLING in the model configuration.
+
+    The first time a crop is started it is created as usual and its initial
+    state is recorded, together with the variables it registered in the
+    VariableKiosk and the signal handlers it connected. When the crop is
+    started again after it was dropped from the engine (e.g. when the engine
+    is restored to a state before the crop started), the object graph is
+    re-initialized in place from this record instead of being rebuilt. States
+    that hold the day the crop was started (e.g. DOP) are set to the new day.
+
+    The record is only used when all parameter values are the same as when the
+    crop was created and none of its variables are registered in the kiosk,
+    otherwise a new crop object is created. Signals sent by the crop during
+    initialization are not sent again when the crop is reused.
+    """
+
+    def __init__(self):
+        self._crops = {}
+
+    def get_crop(self, engine, day:date, key:tuple):
+        """Returns a crop object initialized on day for the active crop
+        parameters, reused from the pool if possible.
+
+        :param engine: the Engine the crop belongs to
+        :param day: the day the crop is started
+        :param key: (crop_name, variety_name, crop_start_type, crop_end_type)
+        """
+        pp = engine.parameterprovider
+        parameters = {k: pp[k] for k in pp._unique_parameters}
+        record = self._crops.get(key)
+        if record is not None and _same_parameters(record["parameters"], parameters):
+            crop = self._reuse(engine, day, record)
+            if crop is not None:
+                return crop
+
+        kiosk = engine.kiosk
+        registered = set(kiosk.registered_states) | set(kiosk.registered_rates)
+        offset = None if kiosk.buffer is None else kiosk.buffer.size
+
+        crop = engine.mconf.CROP(day, kiosk, pp)
+
+        objects = _find_state_objects(crop)
+        owners = set(id(obj) for obj in objects)
+        varnames = [k for k in list(kiosk.registered_states) + list(kiosk.registered_rates)
+                    if k not in registered]
+        receivers = [(signal, handler) for signal, handler in kiosk.signal_bus.receivers()
+                     if id(getattr(handler, "__self__", None)) in owners]
+        memo = {}
+        self._crops[key] = {"crop": crop, "day": day, "parameters": parameters,
+                            "objects": _save_objects(objects, memo),
+                            "kiosk": _copy_state(kiosk.snapshot_variables(varnames, offset), memo),
+                            "receivers": receivers}
+        return crop
+
+    def _reuse(self, engine, day:date, record:dict):
+        """Re-initializes the crop in record in place on day. Returns None if
+        its variables cannot be registered in the kiosk of the engine.
+        """
+        memo = {}
+        kiosk_state = _copy_state(record["kiosk"], memo)
+        try:
+            engine.kiosk.restore_variables(kiosk_state)
+        except exc.VariableKioskError:
+            return None
+
+        _restore_objects(record["objects"], memo)
+        if engine.kiosk.buffer is not None:
+            engine.kiosk.buffer.rebind()
+
+        # States that hold the day the crop was started
+        if day != record["day"]:
+            for obj, _, _ in record["objects"]:
+                trait_values = obj._trait_values
+                for k, v in trait_values.items():
+                    if type(v) is date and v == record["day"]:
+                        trait_values[k] = day
+                # States kept in plain dicts, e.g. by the fused crop model
+                for attr in obj.__dict__.values():
+                    if type(attr) is dict:
+                        for k, v in attr.items():
+                            if type(v) is date and v == record["day"]:
+                                attr[k] = day
+            for k, v in kiosk_state[0].items():
+                if type(v) is date and v == record["day"]:
+                    dict.__setitem__(engine.kiosk, k, day)
+
+        for signal, handler in record["receivers"]:
+            engine.kiosk.signal_bus.connect(handler, signal)
+        return record["crop"]
+
 class Engine(BaseEngine):
     """Simulation engine for simulating the combined soil/crop system.
 
@@ -110,6 +351,28 @@ class Engine(BaseEngine):
     _saved_summary_output = List()
     _saved_terminal_output = Dict()
 
+    # resolution plan mapping output variables to their getters, see
+    # _compile_output_plan()
+    _output_plan = None
+    _output_plan_registrations = None
+
+    # flat execution schedule of the SimulationObjects and their rates, see
+    # _compile_schedule()
+    _schedule = None
+    _schedule_rates = None
+
+    # With OUTPUT_ARRAY the OUTPUT_VARS are saved in a float64 array instead,
+    # see get_output_array()
+    _output_array = None
+    _output_day = None
+
+    # Set by run(fast_forward=True) on all but the last day, saving the
+    # output is deferred while it is set
+    _fast_forward = False
+
+    # CropPool with CROP_POOLING in the model configuration
+    _crop_pool = None
+
     def __init__(self, parameterprovider: ParameterProvider, \
                  weatherdataprovider:WeatherDataProvider, agromanagement:BaseAgroManager, \
                     config: dict=None):
@@ -127,13 +390,19 @@ class Engine(BaseEngine):
         self.mconf = ConfigurationLoader(config)
         self.parameterprovider = parameterprovider
 
-        # Variable kiosk for registering and publishing variables
-        self.kiosk = VariableKiosk()
+        # Variable kiosk for registering and publishing variables. With
+        # COMPILED_STATES the Float states/rates are stored in a shared buffer
+        buffer = VariableBuffer() if getattr(self.mconf, "COMPILED_STATES", False) else None
+        self.kiosk = VariableKiosk(buffer=buffer)
 
         # Placeholder for variables to be saved during a model run
         self._saved_output = list()
         self._saved_summary_output = list()
         self._saved_terminal_output = dict()
+        if getattr(self.mconf, "OUTPUT_ARRAY", False):
+            self._output_array = np.full(len(self.mconf.OUTPUT_VARS), np.nan)
+        if getattr(self.mconf, "CROP_POOLING", False):
+            self._crop_pool = CropPool()
 
         # register handlers for starting/finishing the crop simulation, for
         # handling output and terminating the system
@@ -177,8 +446,9 @@ class Engine(BaseEngine):
         if self.soil is not None:
             self.soil.calc_rates(day, drv)
 
-        # Save state variables of the model
-        if self.flag_output:
+        # Save state variables of the model, unless the output is deferred
+        # to the last day of a fast-forward run
+        if self.flag_output and (self.flag_terminate or not self._fast_forward):
             self._save_output(day)
 
         # Check if flag is present to finish crop simulation
@@ -206,6 +476,15 @@ class Engine(BaseEngine):
         # Flush rate variables from the kiosk after state updates
         self.kiosk.flush_rates()
 
+    def zerofy(self):
+        """Zerofy the value of all rate variables of the SimulationObjects in
+        the execution schedule.
+        """
+        if self._schedule is None:
+            self._compile_schedule()
+        for rates in self._schedule_rates:
+            rates.zerofy()
+
     def _run(self):
         """Make one time step of the simulation.
         """
@@ -227,13 +506,128 @@ class Engine(BaseEngine):
             self._terminate_simulation(self.day)
 
     # Return the crop states, soil states, and day
-    def run(self, days: int=1):
-        """Advances the system state with given number of days"""
-
+    def run(self, days: int=1, fast_forward: bool=False):
+        """Advances the system state with given number of days
+
+        With `fast_forward` the output is only saved on the last day (or the
+        day the simulation terminates): OUTPUT signals received on the days
+        before are deferred instead of saving all OUTPUT_VARS every day. As
+        only the most recent output is kept, the saved output is the same as
+        without `fast_forward` for daily output. Summary and terminal output
+        are not affected.
+
+        :param days: number of days to advance
+        :param fast_forward: defer saving the output until the last day
+        """
         days_done = 0
-        while (days_done < days) and (self.flag_terminate is False):
-            days_done += 1
-            self._run()
+        try:
+            while (days_done < days) and (self.flag_terminate is False):
+                days_done += 1
+                self._fast_forward = fast_forward and days_done < days
+                self._run()
+        finally:
+            self._fast_forward = False
+
+    def snapshot(self):
+        """Returns an `EngineSnapshot` with the full simulation state.
+
+        The snapshot holds a copy of the states/rates and internal variables
+        of every SimulationObject, the timer, the agromanagement calendars,
+        the engine flags and saved output, the contents of the VariableKiosk
+        and the overridden parameters. Objects themselves are not copied, see
+        `restore()`.
+        """
+        memo = {}
+        objects = _save_objects(_find_state_objects(self), memo)
+        return EngineSnapshot(self, self.day, objects,
+                              _copy_state(self.kiosk.snapshot(), memo),
+                              self.parameterprovider.snapshot())
+
+    def restore(self, snapshot:EngineSnapshot):
+        """Rewinds the engine to the state stored in `snapshot`.
+
+        The values of all objects that existed at the time of the snapshot are
+        restored in place, so their kiosk registrations and signal connections
+        remain valid. Objects created after the snapshot was taken (e.g. a crop
+        started later on) are disconnected from all signals and dropped.
+
+        :param snapshot: an `EngineSnapshot` taken from this engine
+        """
+        if snapshot.engine is not self:
+            msg = "Cannot restore an EngineSnapshot that was taken from another Engine."
+            raise exc.PCSEError(msg)
+
+        # Finished crops are no longer reachable from the engine, but remain
+        # connected until they are garbage collected.
+        saved = set(id(obj) for obj, _, _ in snapshot.objects)
+        stale = [obj for obj in _find_state_objects(self) + self._connected_owners()
+                 if id(obj) not in saved]
+        if stale:
+            self._disconnect_receivers(stale)
+
+        memo = {}
+        _restore_objects(snapshot.objects, memo)
+        self.kiosk.restore(_copy_state(snapshot.kiosk, memo))
+        self.parameterprovider.restore(snapshot.parameters)
+        self._output_plan = None
+        self._schedule = None
+
+    def fork(self):
+        """Returns an independent Engine at the current state of this engine.
+
+        Immutable data is shared with the parent: the model configuration, the
+        weather data provider, the crop/site parameter sets and the parameter
+        objects (including Afgen tables) of all SimulationObjects. The
+        SimulationObjects themselves are cloned with a copy of their
+        states/rates and the fork gets its own VariableKiosk. As the kiosk is
+        the sender of all signals, signals in the fork never reach the parent
+        and vice versa.
+        """
+        kiosk = VariableKiosk(buffer=None if self.kiosk.buffer is None else VariableBuffer())
+        memo = {id(self.kiosk): kiosk, id(self.kiosk.buffer): kiosk.buffer,
+                id(self.parameterprovider): self.parameterprovider.copy()}
+        objects = _find_state_objects(self)
+        for obj in objects:
+            memo[id(obj)] = obj.__class__.__new__(obj.__class__)
+
+        for obj in objects:
+            clone = memo[id(obj)]
+            clone._trait_values.update(_copy_state(obj._trait_values, memo))
+            # Functions are bound methods set by the prepare_rates/prepare_states
+            # decorators, these are rebuilt on first use by the clone.
+            for k, v in obj.__dict__.items():
+                if k.startswith("_trait") or k == "_cross_validation_lock" \
+                        or type(v) is types.FunctionType:
+                    continue
+                clone.__dict__[k] = _copy_state(v, memo)
+            # Observers, e.g. for updating published variables in the kiosk
+            for name, handlers in obj._trait_notifiers.items():
+                for change_type, callables in handlers.items():
+                    for c in callables:
+                        owner = getattr(c, "__self__", None)
+                        if id(owner) in memo:
+                            clone.observe(getattr(memo[id(owner)], c.__name__),
+                                          names=name, type=change_type)
+
+            # States/rates stored in the buffer are bound to the buffer of the fork
+            if kiosk.buffer is not None and clone.__dict__.get("_buffer") is kiosk.buffer:
+                kiosk.buffer.attach(clone)
+
+        # Kiosk registrations refer to the id() of the states/rates objects
+        values, *registrations, buffered = _copy_state(self.kiosk.snapshot(), memo)
+        for reg in registrations:
+            for varname, oid in reg.items():
+                if oid in memo:
+                    reg[varname] = id(memo[oid])
+        kiosk.restore((values, *registrations, buffered))
+
+        self._connect_clones(kiosk, memo)
+        clone = memo[id(self)]
+        clone._output_plan = None
+        clone._schedule = None
+        if self._crop_pool is not None:
+            clone._crop_pool = CropPool()
+        return clone
 
     def _on_CROP_HARVEST(self, day:date):
         """When the crop harvest signal is recieved
@@ -273,7 +667,13 @@ class Engine(BaseEngine):
         self.parameterprovider.set_active_crop(crop_name, variety_name, crop_start_type,
                                                crop_end_type)  
                   
-        self.crop = self.mconf.CROP(day, self.kiosk, self.parameterprovider)
+        if self._crop_pool is not None:
+            key = (crop_name, variety_name, crop_start_type, crop_end_type)
+            self.crop = self._crop_pool.get_crop(self, day, key)
+        else:
+            self.crop = self.mconf.CROP(day, self.kiosk, self.parameterprovider)
+        self._compile_schedule()
+        self._compile_output_plan()
  
     def _on_SITE_START(self, day:date, site_name:str=None, variation_name:str=None):
         """Starts the site
@@ -291,6 +691,8 @@ class Engine(BaseEngine):
         self.parameterprovider.set_active_site(site_name, variation_name)  
 
         self.soil = self.mconf.SOIL(self.day, self.kiosk, self.parameterprovider)       
+        self._compile_schedule()
+        self._compile_output_plan()
 
     def _on_SITE_FINISH(self, day:date, site_delete:bool=False):
         """Sets the variable 'flag_site_finish' to True when the signal
@@ -347,6 +749,8 @@ class Engine(BaseEngine):
             self.flag_crop_delete = False
 
         self.crop = None
+        self._output_plan = None
+        self._schedule = None
 
     def _finish_sitesimulation(self, day:date):
         """Finishes the SiteSimulation object when variable 'flag_site_finish'
@@ -371,6 +775,8 @@ class Engine(BaseEngine):
             self.flag_site_delete = False
 
         self.soil = None
+        self._output_plan = None
+        self._schedule = None
 
     def _terminate_simulation(self, day:date):
         """Terminates the entire simulation.
@@ -396,6 +802,92 @@ class Engine(BaseEngine):
 
         return drv
 
+    def _compile_schedule(self):
+        """Builds the execution schedule: the flat list of all SimulationObjects
+        in the hierarchy, in the order of a recursive walk over subSimObjects,
+        and the list of their rates objects.
+
+        Tree-wide operations that run every day (e.g. `zerofy()`) iterate the
+        schedule instead of rediscovering the hierarchy. The schedule is
+        compiled on CROP_START/SITE_START and invalidated when the crop or soil
+        object is finished, or when the engine is restored.
+        """
+        schedule = []
+        tocheck = list(reversed(self.subSimObjects))
+        while tocheck:
+            simobj = tocheck.pop()
+            schedule.append(simobj)
+            tocheck.extend(reversed(simobj.subSimObjects))
+
+        self._schedule = schedule
+        self._schedule_rates = [simobj.rates for simobj in schedule
+                                if simobj.rates is not None]
+
+    def _compile_output_plan(self):
+        """Builds the resolution plan for the output variables.
+
+        For every variable in OUTPUT_VARS, SUMMARY_OUTPUT_VARS and
+        TERMINAL_OUTPUT_VARS the plan holds a getter that returns the same value
+        as `get_variable()`, without searching the kiosk and the hierarchy of
+        SimulationObjects each day:
+
+        * a variable owned by a states/rates object in the hierarchy is read
+          directly from that object;
+        * a variable registered by a SimulationObject itself (e.g. the fused
+          crop model, which has no states/rates objects) is read with its
+          `get_variable()`;
+        * a registered variable whose owner is not in the hierarchy (e.g. of a
+          finished crop) is read from the kiosk if it is published there;
+        * an unregistered variable is always None.
+
+        The plan is compiled on CROP_START/SITE_START and invalidated when the
+        crop or soil object is replaced. It is also recompiled when the number
+        of registered variables changed.
+        """
+        if self._schedule is None:
+            self._compile_schedule()
+        owners = {}
+        getters = {}
+        for simobj in self._schedule:
+            getters[id(simobj)] = simobj
+            for obj in (simobj.states, simobj.rates):
+                if obj is not None:
+                    owners[id(obj)] = obj
+
+        plan = {}
+        varnames = list(self.mconf.OUTPUT_VARS) + list(self.mconf.SUMMARY_OUTPUT_VARS) + \
+                   list(getattr(self.mconf, "TERMINAL_OUTPUT_VARS", []))
+        for varname in varnames:
+            if self.kiosk.variable_exists(varname):
+                v = varname
+            elif self.kiosk.variable_exists(varname.upper()):
+                v = varname.upper()
+            else:
+                plan[varname] = _get_none
+                continue
+            oid = self.kiosk.registered_states.get(v, self.kiosk.registered_rates.get(v))
+            if oid in owners:
+                plan[varname] = partial(getattr, owners[oid], v)
+            elif oid in getters:
+                plan[varname] = partial(getters[oid].get_variable, v)
+            else:
+                plan[varname] = partial(_get_published, self.kiosk, v)
+
+        self._output_plan = plan
+        self._output_plan_registrations = self._count_registrations()
+
+    def _count_registrations(self):
+        return len(self.kiosk.registered_states) + len(self.kiosk.registered_rates)
+
+    def _get_output_plan(self):
+        """Returns the resolution plan for the output variables, compiling it
+        first if it was invalidated.
+        """
+        if self._output_plan is None or \
+                self._output_plan_registrations != self._count_registrations():
+            self._compile_output_plan()
+        return self._output_plan
+
     def _save_output(self, day:date):
         """Appends selected model variables to self._saved_output for this day.
         """
@@ -403,26 +895,36 @@ class Engine(BaseEngine):
         self.flag_output = False
 
         # find current value of variables to are to be saved
+        plan = self._get_output_plan()
+        if self._output_array is not None:
+            row = self._output_array
+            for i, var in enumerate(self.mconf.OUTPUT_VARS):
+                row[i] = _to_float(plan[var]())
+            self._output_day = day
+            return
+
         states = {"day":day}
         for var in self.mconf.OUTPUT_VARS:
-            states[var] = self.get_variable(var)
+            states[var] = plan[var]()
         self._saved_output = [states]
 
     def _save_summary_output(self):
         """Appends selected model variables to self._saved_summary_output.
         """
         # find current value of variables to are to be saved
+        plan = self._get_output_plan()
         states = {}
         for var in self.mconf.SUMMARY_OUTPUT_VARS:
-            states[var] = self.get_variable(var)
+            states[var] = plan[var]()
         self._saved_summary_output = [states]
 
     def _save_terminal_output(self):
         """Appends selected model variables to self._saved_terminal_output.
         """
         # find current value of variables to are to be saved
+        plan = self._get_output_plan()
         for var in self.mconf.TERMINAL_OUTPUT_VARS:
-            self._saved_terminal_output[var] = self.get_variable(var)
+            self._saved_terminal_output[var] = plan[var]()
 
     def set_variable(self, varname:str, value:float):
         """Sets the value of the specified state or rate variable.
@@ -459,15 +961,66 @@ class Engine(BaseEngine):
 
         return increments
 
+    def set_output_variables(self, output_vars:list, summary_output_vars:list=None,
+                             terminal_output_vars:list=None):
+        """Changes the variables that are saved at OUTPUT, CROP_FINISH and
+        TERMINATE signals.
+
+        :param output_vars: list of variables to save at OUTPUT signals
+        :param summary_output_vars: list of variables to save at CROP_FINISH
+            signals, unchanged if None
+        :param terminal_output_vars: list of variables to save at TERMINATE
+            signals, unchanged if None
+
+        The model configuration is shared with forks of this engine, so the
+        engine gets its own copy of the configuration before it is changed.
+        The new variables are saved from the next OUTPUT signal onwards.
+        """
+        mconf = copy.copy(self.mconf)
+        mconf.OUTPUT_VARS = list(output_vars)
+        if summary_output_vars is not None:
+            mconf.SUMMARY_OUTPUT_VARS = list(summary_output_vars)
+        if terminal_output_vars is not None:
+            mconf.TERMINAL_OUTPUT_VARS = list(terminal_output_vars)
+        self.mconf = mconf
+        self._output_plan = None
+        if self._output_array is not None:
+            self._output_array = np.full(len(mconf.OUTPUT_VARS), np.nan)
+            self._output_day = None
+
     def get_output(self):
         """Returns the variables have have been stored during the simulation.
 
         If no output is stored an empty list is returned. Otherwise, the output is
         returned as a list of dictionaries in chronological order. Each dictionary is
-        a set of stored model variables for a certain date. """
+        a set of stored model variables for a certain date.
+
+        With OUTPUT_ARRAY the dictionary is built from the output array, so
+        missing values are NaN and dates are given as YYYYMMDD. """
 
+        if self._output_array is not None:
+            if self._output_day is None:
+                return []
+            states = {"day": self._output_day}
+            states.update(zip(self.mconf.OUTPUT_VARS, self._output_array.tolist()))
+            return [states]
         return self._saved_output
 
+    def get_output_array(self):
+        """Returns the day and the values of the variables saved at the last
+        OUTPUT signal when OUTPUT_ARRAY is set in the model configuration.
+
+        The values are returned as float64 array in the order of OUTPUT_VARS,
+        where missing values are NaN and dates are stored as YYYYMMDD. The
+        array is overwritten at each OUTPUT signal and replaced when the
+        engine is restored, so it should be retrieved again after running the
+        engine.
+        """
+        if self._output_array is None:
+            msg = "Output array not available, set OUTPUT_ARRAY in the model configuration."
+            raise exc.PCSEError(msg)
+        return self._output_day, self._output_array
+
     def get_summary_output(self):
         """Returns the summary variables have have been stored during the simulation.
         """
@@ -13,7 +13,12 @@ import yaml
 
 from ..base import MultiCropDataProvider
 from .. import exceptions as exc
-from ..util import version_tuple, get_working_directory
+from ..util import version_tuple, get_working_directory, Afgen, MultiAfgen
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 
 class YAMLCropDataProvider(MultiCropDataProvider):
@@ -82,8 +87,17 @@ class YAMLCropDataProvider(MultiCropDataProvider):
     def __init__(self, fpath=None, force_reload=False):
         """Initialize the YAMLCropDataProivder class by first inheriting from the 
         MultiCropDataProvider class
+
+        Crops are loaded lazily: only `crops.yaml` is read here and the YAML file
+        of a crop is parsed the first time one of its varieties is activated.
+        The cache file holds every crop as a separate pickle, so loading it only
+        unpickles the crops that are used.
         """
         MultiCropDataProvider.__init__(self)
+        self._fpath = fpath
+        # Parameter sets per (crop_name, variety_name), built once
+        self._compiled = {}
+        self._yaml_fnames = self._get_yaml_files(fpath) if fpath is not None else {}
 
         # either force a reload or load cache fails
         if force_reload is True or self._load_cache(fpath) is False:  
@@ -91,16 +105,11 @@ class YAMLCropDataProvider(MultiCropDataProvider):
             self.clear()
             self._store.clear()
 
-            if fpath is not None:
-                self.read_local_repository(fpath)
-            else:
+            if fpath is None:
                 msg = f"No path or URL specified where to find YAML crop parameter files" 
                 self.logger.info(msg)
                 exc.PCSEError(msg)
 
-            with open(self._get_cache_fname(fpath), "wb") as fp:
-                pickle.dump((self.compatible_version, self._store), fp, pickle.HIGHEST_PROTOCOL)
-
     def read_local_repository(self, fpath):
         """Reads the crop YAML files on the local file system
 
@@ -108,10 +117,58 @@ class YAMLCropDataProvider(MultiCropDataProvider):
         """
         yaml_file_names = self._get_yaml_files(fpath)
         for crop_name, yaml_fname in yaml_file_names.items():
-            with open(yaml_fname) as fp:
-                parameters = yaml.safe_load(fp)
-            self._check_version(parameters, crop_fname=yaml_fname)
-            self._add_crop(crop_name, parameters)
+            self._read_crop(crop_name, yaml_fname)
+
+    def _read_crop(self, crop_name, yaml_fname):
+        """Reads the YAML file of a single crop and stores its parameter sets.
+
+        :param crop_name: the name of the crop
+        :param yaml_fname: the YAML file with the parameters of the crop
+        """
+        with open(yaml_fname) as fp:
+            parameters = yaml.load(fp, Loader=SafeLoader)
+        self._check_version(parameters, crop_fname=yaml_fname)
+        self._add_crop(crop_name, parameters)
+
+    def _get_variety_sets(self, crop_name):
+        """Returns the parameter sets of all varieties of the given crop, reading
+        the crop from the cache or its YAML file if it was not loaded before.
+
+        :param crop_name: the name of the crop
+        """
+        if crop_name not in self._store:
+            if crop_name not in self._yaml_fnames:
+                msg = "Crop name '%s' not available in %s " % (crop_name, self.__class__.__name__)
+                raise exc.PCSEError(msg)
+            self._read_crop(crop_name, self._yaml_fnames[crop_name])
+            self._save_cache(self._fpath)
+        variety_sets = self._store[crop_name]
+        if isinstance(variety_sets, bytes):
+            variety_sets = self._store[crop_name] = pickle.loads(variety_sets)
+        return variety_sets
+
+    def _compile_parameters(self, variety_set):
+        """Returns the parameter name/values of a variety (ignoring description
+        and units) with the tables converted to Afgen and MultiAfgen instances.
+
+        :param variety_set: the parameter set of a variety as loaded from YAML
+        """
+        parameters = {}
+        for k, v in variety_set.items():
+            if k == "Metadata":
+                continue
+            value = v[0]
+            if isinstance(value, list) and len(value) > 0:
+                try:
+                    if all(isinstance(x, (int, float)) for x in value):
+                        value = Afgen.interned(value)
+                    elif all(isinstance(x, list) for x in value[1::2]):
+                        value = MultiAfgen(value)
+                except (ValueError, TypeError, ZeroDivisionError):
+                    # Not a valid table, let the parameter template report it
+                    value = v[0]
+            parameters[k] = value
+        return parameters
 
     def _get_cache_fname(self, fpath):
         """Returns the name of the cache file for the CropDataProvider.
@@ -125,6 +182,25 @@ class YAMLCropDataProvider(MultiCropDataProvider):
             cache_fname_fp = os.path.join(fpath, cache_fname)
         return cache_fname_fp
 
+    def _save_cache(self, fpath):
+        """Writes the crops that are loaded to the cache file, every crop is
+        pickled separately so that it can be unpickled on its own.
+        """
+        store = {crop_name: variety_sets if isinstance(variety_sets, bytes) else
+                 pickle.dumps(variety_sets, pickle.HIGHEST_PROTOCOL)
+                 for crop_name, variety_sets in self._store.items()}
+        cache_fname_fp = self._get_cache_fname(fpath)
+        tmp_fname = "%s.%i.tmp" % (cache_fname_fp, os.getpid())
+        try:
+            # Write to a temporary file first so that other processes never
+            # read a partially written cache file
+            with open(tmp_fname, "wb") as fp:
+                pickle.dump((self.compatible_version, store), fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fname, cache_fname_fp)
+        except OSError as e:
+            msg = "%s - Failed to write cache file: %s" % (self.__class__.__name__, e)
+            self.logger.info(msg)
+
     def _load_cache(self, fpath):
         """Loads the cache file if possible and returns True, else False.
         """
@@ -135,8 +211,7 @@ class YAMLCropDataProvider(MultiCropDataProvider):
                 # First we check that the cache file reflects the contents of the YAML files.
                 # This only works for files not for github repos
                 if fpath is not None:
-                    yaml_file_names = self._get_yaml_files(fpath)
-                    yaml_file_dates = [os.stat(fn).st_mtime for crop,fn in yaml_file_names.items()]
+                    yaml_file_dates = [os.stat(fn).st_mtime for crop,fn in self._yaml_fnames.items()]
                     # retrieve modification date of cache file
                     cache_date = os.stat(cache_fname_fp).st_mtime
                     # Ensure cache file is more recent then any of the YAML files
@@ -204,23 +279,21 @@ class YAMLCropDataProvider(MultiCropDataProvider):
         :param variety_name: the variety for the given crop
         """
         self.clear()
-        if crop_name not in self._store:
-            msg = "Crop name '%s' not available in %s " % (crop_name, self.__class__.__name__)
-            raise exc.PCSEError(msg)
-        variety_sets = self._store[crop_name]
-        if variety_name not in variety_sets:
-            msg = "Variety name '%s' not available for crop '%s' in " \
-                  "%s " % (variety_name, crop_name, self.__class__.__name__)
-            sys.exit(0)
-            raise exc.PCSEError(msg)
+        key = (crop_name, variety_name)
+        if key not in self._compiled:
+            variety_sets = self._get_variety_sets(crop_name)
+            if variety_name not in variety_sets:
+                msg = "Variety name '%s' not available for crop '%s' in " \
+                      "%s " % (variety_name, crop_name, self.__class__.__name__)
+                sys.exit(0)
+                raise exc.PCSEError(msg)
+            self._compiled[key] = self._compile_parameters(variety_sets[variety_name])
 
         self.current_crop_name = crop_name
         self.current_variety_name = variety_name
 
-        # Retrieve parameter name/values from input (ignore description and units)
-        parameters = {k: v[0] for k, v in variety_sets[variety_name].items() if k != "Metadata"}
         # update internal dict with parameter values for this variety
-        self.update(parameters)
+        self.update(self._compiled[key])
 
     def get_crops_varieties(self):
         """Return the names of available crops and varieties per crop.
@@ -228,7 +301,8 @@ class YAMLCropDataProvider(MultiCropDataProvider):
         :return: a dict of type {'crop_name1': ['variety_name1', 'variety_name1', ...],
                                  'crop_name2': [...]}
         """
-        return {k: v.keys() for k, v in self._store.items()}
+        crop_names = list(self._yaml_fnames) + [k for k in self._store if k not in self._yaml_fnames]
+        return {k: self._get_variety_sets(k).keys() for k in crop_names}
 
     def print_crops_varieties(self):
         """Gives a printed list of crops and varieties on screen.
@@ -12,9 +12,13 @@ import pandas as pd
 import requests
 import logging
 import pickle
+import json
+import struct
+from collections import OrderedDict
 
-from .util import reference_ET, check_angstromAB
+from .util import reference_ET, reference_ET_array, check_angstromAB
 from .utils import exceptions as exc
+from .utils import validation
 from math import exp
 
 # Define some lambdas to take care of unit conversions.
@@ -23,6 +27,11 @@ mm_to_cm = lambda x: x / 10.
 tdew_to_hpa = lambda x: ea_from_tdew(x) * 10.
 to_date = lambda d: d.date()
 
+# Layout of binary weather files: magic, length of the JSON header, header and
+# the data starting at an offset that is a multiple of BINARY_ALIGNMENT
+BINARY_MAGIC = b"PCSEWDB1"
+BINARY_ALIGNMENT = 64
+
 
 def ea_from_tdew(tdew):
     """
@@ -189,7 +198,7 @@ class WeatherDataContainer(SlotPickleMixin):
     def __setattr__(self, key, value):
 
         # Range checking on known meteo variables.
-        if key in self.ranges:
+        if key in self.ranges and validation.level != validation.FAST:
             vmin, vmax = self.ranges[key]
             if not vmin <= value <= vmax:
                 msg = "Value (%s) for meteo variable '%s' outside allowed range (%s, %s)." % (
@@ -230,6 +239,284 @@ class WeatherDataContainer(SlotPickleMixin):
             self.units[varname] = unit
         setattr(self, varname, value)
 
+class WeatherDataRow(object):
+    """Lightweight view on one day of a `WeatherDataStore`.
+
+    Provides the same attribute access as a `WeatherDataContainer` (e.g.
+    `drv.TMAX`) but reads the values from the columns of the store. A variable
+    that is missing for this day (stored as NaN) raises an AttributeError, just
+    like an unset attribute on a WeatherDataContainer.
+    """
+    __slots__ = ["_store", "_index"]
+
+    required = WeatherDataContainer.required
+    optional = WeatherDataContainer.optional
+    units = WeatherDataContainer.units
+
+    def __init__(self, store, index):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_index", index)
+
+    def __getattr__(self, varname):
+        if varname.startswith("_"):
+            raise AttributeError(varname)
+        try:
+            value = self._store.columns[varname][self._index]
+        except KeyError:
+            msg = "'%s' object has no attribute '%s'" % (self.__class__.__name__, varname)
+            raise AttributeError(msg)
+        if value != value:
+            msg = "Weather variable '%s' missing on %s" % (varname, self.DAY)
+            raise AttributeError(msg)
+        return float(value)
+
+    def __setattr__(self, varname, value):
+        self._store.set_value(varname, self._index, value)
+
+    @property
+    def DAY(self):
+        return self._store.day(self._index)
+
+    __str__ = WeatherDataContainer.__str__
+
+    def add_variable(self, varname, value, unit):
+        """Adds variable <varname> with <value> and given <unit> for this day.
+
+        :param varname: Name of variable to be set as attribute name (string)
+        :param value: value of variable (attribute) to be added.
+        :param unit: string representation of the unit of the variable. Is
+            only use for printing the contents of the WeatherDataContainer.
+        """
+        if varname not in self.units:
+            self.units[varname] = unit
+        self._store.set_value(varname, self._index, value)
+
+class WeatherDataStore(object):
+    """Columnar storage of daily weather data.
+
+    Each weather variable is stored in a contiguous float64 array indexed by
+    the day offset from `first_date`, missing values are stored as NaN. Days
+    are retrieved as `WeatherDataRow` views which have the same attribute
+    access as a `WeatherDataContainer`.
+
+    The store supports the parts of the dict interface that the
+    WeatherDataProvider uses, with keys given as (date, member_id) tuples. The
+    columns hold member 0, the WeatherDataContainers of other ensemble members
+    are kept in a dict.
+
+    The arrays grow geometrically when days are added outside the current
+    range, so that days can be added one by one in amortized constant time.
+    The days of the unused capacity are not present.
+    """
+
+    def __init__(self):
+        self.first_date = None
+        self.columns = {}
+        self.present = np.zeros(0, dtype=bool)
+        self._first_ordinal = 0
+        self._members = {}
+
+    def __len__(self):
+        return int(self.present.sum()) + len(self._members)
+
+    def __setstate__(self, state):
+        # Stores pickled before ensemble members were kept have no _members
+        state.setdefault("_members", {})
+        self.__dict__.update(state)
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used by the weather data arrays.
+        """
+        return self.present.nbytes + sum(c.nbytes for c in self.columns.values())
+
+    def __contains__(self, key):
+        return key in self._members or self._find_index(key) is not None
+
+    @classmethod
+    def from_array(cls, data, first_ordinal, varnames):
+        """Creates a store on top of a 2D array as written by `to_array()`.
+
+        The columns of the store are views on the rows of `data`, so a store can
+        be created from a numpy.memmap without copying the weather data.
+        """
+        store = cls()
+        store._first_ordinal = int(first_ordinal)
+        store.first_date = dt.date.fromordinal(store._first_ordinal)
+        store.present = data[0] != 0.
+        store.columns = {varname: data[i + 1] for i, varname in enumerate(varnames)}
+        return store
+
+    def to_array(self):
+        """Returns the variable names and a 2D float64 array with the presence
+        flags on the first row and the columns for these variables on the
+        following rows.
+
+        Only member 0 can be stored as an array, a PCSEError is raised when the
+        store holds other ensemble members.
+        """
+        if self._members:
+            msg = "Weather data of ensemble members cannot be stored as an array."
+            raise exc.PCSEError(msg)
+        varnames = list(self.columns.keys())
+        data = np.empty((len(varnames) + 1, len(self.present)), dtype=np.float64)
+        data[0] = self.present
+        for i, varname in enumerate(varnames):
+            data[i + 1] = self.columns[varname]
+        return varnames, data
+
+    def __getitem__(self, key):
+        if key in self._members:
+            return self._members[key]
+        index = self._find_index(key)
+        if index is None:
+            raise KeyError(key)
+        return WeatherDataRow(self, index)
+
+    def __setitem__(self, key, wdc):
+        keydate, member_id = key
+        if member_id != 0:
+            self._members[key] = wdc
+            return
+        values = {varname: [getattr(wdc, varname, np.nan)] for varname in
+                  WeatherDataContainer.sitevar + WeatherDataContainer.required +
+                  WeatherDataContainer.optional}
+        self.add_columns([keydate], values)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return [(self.day(i), 0) for i in np.flatnonzero(self.present)] + \
+            sorted(self._members.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, other):
+        """Adds the days from <other>, either a WeatherDataStore or a dict of
+        WeatherDataContainers keyed by (date, member_id).
+        """
+        if isinstance(other, WeatherDataStore):
+            index = np.flatnonzero(other.present)
+            days = [other.day(i) for i in index]
+            self.add_columns(days, {k: v[index] for k, v in other.columns.items()})
+            self._members.update(other._members)
+        else:
+            self._members.update({k: v for k, v in other.items() if k[1] != 0})
+            days = [k[0] for k in other.keys() if k[1] == 0]
+            wdcs = [v for k, v in other.items() if k[1] == 0]
+            values = {}
+            for varname in WeatherDataContainer.sitevar + WeatherDataContainer.required + \
+                           WeatherDataContainer.optional:
+                values[varname] = [getattr(wdc, varname, np.nan) for wdc in wdcs]
+            self.add_columns(days, values)
+
+    def day(self, index):
+        """Returns the date of the given row index.
+        """
+        return dt.date.fromordinal(self._first_ordinal + int(index))
+
+    def _find_index(self, key):
+        """Returns the row index for key (date, member_id) or None if there is no
+        data for that day.
+        """
+        keydate, member_id = key
+        if member_id != 0:
+            return None
+        index = keydate.toordinal() - self._first_ordinal
+        if 0 <= index < len(self.present) and self.present[index]:
+            return index
+        return None
+
+    def add_columns(self, days, values):
+        """Stores the weather data given as columns for a sequence of days.
+
+        :param days: sequence of dates
+        :param values: dict with the variable name as key and a sequence of values
+            with the same length as days, missing values should be NaN.
+
+        Values are range checked against `WeatherDataContainer.ranges`, unless
+        the validation level is "fast". Existing data for any of the given days
+        is replaced.
+        """
+        if len(days) == 0:
+            return
+        ordinals = np.array([d.toordinal() for d in days], dtype=np.int64)
+        values = {k: np.asarray(v, dtype=np.float64) for k, v in values.items()}
+
+        for varname, column in values.items():
+            if varname not in WeatherDataContainer.ranges or \
+                    validation.level == validation.FAST:
+                continue
+            vmin, vmax = WeatherDataContainer.ranges[varname]
+            invalid = (column < vmin) | (column > vmax)
+            if invalid.any():
+                i = np.flatnonzero(invalid)[0]
+                msg = "Value (%s) for meteo variable '%s' outside allowed range (%s, %s)." % (
+                    column[i], varname, vmin, vmax)
+                raise exc.PCSEError(msg)
+
+        # Grow the arrays when the new days fall outside the current range,
+        # at least doubling their size on the side where days are added
+        if self.first_date is None:
+            start, end = ordinals.min(), ordinals.max() + 1
+        else:
+            size = len(self.present)
+            first, last = self._first_ordinal, self._first_ordinal + size
+            start, end = min(ordinals.min(), first), max(ordinals.max() + 1, last)
+            if start < first:
+                start = min(start, first - size)
+            if end > last:
+                end = max(end, last + size)
+        if self.first_date is None or start != self._first_ordinal or \
+                end != self._first_ordinal + len(self.present):
+            offset = self._first_ordinal - start
+            present = np.zeros(end - start, dtype=bool)
+            present[offset:offset + len(self.present)] = self.present
+            for varname, column in self.columns.items():
+                new = np.full(end - start, np.nan)
+                new[offset:offset + len(column)] = column
+                self.columns[varname] = new
+            self.present = present
+            self._first_ordinal = int(start)
+            self.first_date = dt.date.fromordinal(self._first_ordinal)
+
+        index = ordinals - self._first_ordinal
+        for varname, column in self.columns.items():
+            column[index] = np.nan
+        for varname, column in values.items():
+            if varname not in self.columns:
+                self.columns[varname] = np.full(len(self.present), np.nan)
+            self.columns[varname][index] = column
+        self.present[index] = True
+
+    def trim(self):
+        """Releases the unused capacity, the arrays are shrunk to the range from
+        the first to the last day that is present.
+        """
+        index = np.flatnonzero(self.present)
+        if len(index) == 0 or (index[0] == 0 and index[-1] == len(self.present) - 1):
+            return
+        lo, hi = index[0], index[-1] + 1
+        self.present = self.present[lo:hi].copy()
+        self.columns = {k: v[lo:hi].copy() for k, v in self.columns.items()}
+        self._first_ordinal += int(lo)
+        self.first_date = dt.date.fromordinal(self._first_ordinal)
+
+    def set_value(self, varname, index, value):
+        """Sets the value of <varname> for the day at row <index>.
+        """
+        if varname in WeatherDataContainer.ranges and validation.level != validation.FAST:
+            vmin, vmax = WeatherDataContainer.ranges[varname]
+            if not vmin <= value <= vmax:
+                msg = "Value (%s) for meteo variable '%s' outside allowed range (%s, %s)." % (
+                value, varname, vmin, vmax)
+                raise exc.PCSEError(msg)
+        if varname not in self.columns:
+            self.columns[varname] = np.full(len(self.present), np.nan)
+        self.columns[varname][index] = value
+
 
 class WeatherDataProvider(object):
     """Base class for all weather data providers.
@@ -262,7 +549,7 @@ class WeatherDataProvider(object):
     ETmodel = "PM"
 
     def __init__(self):
-        self.store = {}
+        self.store = WeatherDataStore()
 
     @property
     def logger(self):
@@ -297,6 +584,73 @@ class WeatherDataProvider(object):
 
         self.store.update(store)
 
+    def _dump_binary(self, cache_fname):
+        """Dumps the contents into cache_fname as a binary weather file.
+
+        The file starts with a small JSON header with the values of longitude,
+        latitude, elevation, description, the Angstrom A/B values and ETmodel,
+        followed by the weather data as fixed width float64 arrays that can be
+        opened with numpy.memmap. The file is written under a temporary name
+        and then moved into place, so that other processes never open a partially
+        written file.
+        """
+        self.store.trim()
+        varnames, data = self.store.to_array()
+        header = {"elevation": self.elevation, "longitude": self.longitude,
+                  "latitude": self.latitude, "description": self.description,
+                  "angstA": self.angstA, "angstB": self.angstB, "ETmodel": self.ETmodel,
+                  "first_ordinal": self.store._first_ordinal, "ndays": data.shape[1],
+                  "variables": varnames}
+        header = json.dumps(header).encode("utf-8")
+        offset = len(BINARY_MAGIC) + 8 + len(header)
+        header += b" " * (-offset % BINARY_ALIGNMENT)
+
+        tmp_fname = "%s.%i.tmp" % (cache_fname, os.getpid())
+        with open(tmp_fname, "wb") as fp:
+            fp.write(BINARY_MAGIC)
+            fp.write(struct.pack("<Q", len(header)))
+            fp.write(header)
+            fp.write(np.ascontiguousarray(data, dtype="<f8").tobytes())
+        os.replace(tmp_fname, cache_fname)
+
+    def _load_binary(self, cache_fname):
+        """Loads the contents from the binary weather file cache_fname.
+
+        The weather data are memory mapped copy-on-write, so processes that load
+        the same file share the pages through the OS page cache, while values
+        added or changed later on only affect this WeatherDataProvider.
+        """
+        with open(cache_fname, "rb") as fp:
+            magic = fp.read(len(BINARY_MAGIC))
+            if magic != BINARY_MAGIC:
+                msg = "File '%s' is not a binary weather file." % cache_fname
+                raise IOError(msg)
+            (header_length,) = struct.unpack("<Q", fp.read(8))
+            header = json.loads(fp.read(header_length).decode("utf-8"))
+        offset = len(BINARY_MAGIC) + 8 + header_length
+
+        # Check if the reference ET from the cache file is calculated with the same model as
+        # specified by self.ETmodel
+        if header["ETmodel"] != self.ETmodel:
+            msg = "Mismatch in reference ET from cache file."
+            raise exc.PCSEError(msg)
+
+        shape = (len(header["variables"]) + 1, header["ndays"])
+        data = np.memmap(cache_fname, dtype="<f8", mode="c", offset=offset, shape=shape)
+        store = WeatherDataStore.from_array(np.asarray(data), header["first_ordinal"],
+                                            header["variables"])
+
+        self.elevation = header["elevation"]
+        self.longitude = header["longitude"]
+        self.latitude = header["latitude"]
+        self.description = header["description"]
+        self.angstA = header["angstA"]
+        self.angstB = header["angstB"]
+        if len(self.store) == 0:
+            self.store = store
+        else:
+            self.store.update(store)
+
     def export(self):
         """Exports the contents of the WeatherDataProvider as a list of dictionaries.
 
@@ -311,7 +665,8 @@ class WeatherDataProvider(object):
             days = sorted([r[0] for r in self.store.keys()])
             for day in days:
                 wdc = self(day)
-                r = {key: getattr(wdc, key) for key in wdc.__slots__ if hasattr(wdc, key)}
+                r = {key: getattr(wdc, key) for key in WeatherDataContainer.__slots__
+                     if hasattr(wdc, key)}
                 weather_data.append(r)
         return weather_data
 
@@ -466,6 +821,12 @@ class NASAPowerWeatherDataProvider(WeatherDataProvider):
     same location, the cache file is loaded instead of a full request to the
     NASA Power server.
 
+    Cache files are written as fixed width float64 arrays (`.wdb`) which are
+    memory mapped when loaded, so that processes using the same location share
+    the weather data through the OS page cache. Pickled cache files (`.cache`)
+    written by earlier versions are converted the first time they are loaded,
+    `convert_cache_files()` converts all of them at once.
+
     Cache files are used until they are older then 90 days. After 90 days
     the NASAPowerWeatherDataProvider will make a new request to obtain
     more recent data from the NASA POWER server. If this request fails
@@ -567,12 +928,12 @@ class NASAPowerWeatherDataProvider(WeatherDataProvider):
         df_pcse = self._POWER_to_PCSE(df_power)
 
         # Start building the weather data containers
-        self._make_WeatherDataContainers(df_pcse.to_dict(orient="records"))
+        self._make_WeatherDataContainers(df_pcse)
 
         # dump contents to a cache file
-        cache_filename = self._get_cache_filename(latitude, longitude)
+        cache_filename = self._get_binary_cache_filename(latitude, longitude)
         print(cache_filename)
-        self._dump(cache_filename)
+        self._dump_binary(cache_filename)
 
     def _estimate_AngstAB(self, df_power):
         """Determine Angstrom A/B parameters from Top-of-Atmosphere (ALLSKY_TOA_SW_DWN) and
@@ -656,13 +1017,13 @@ class NASAPowerWeatherDataProvider(WeatherDataProvider):
         """Try to find a cache file for given latitude/longitude.
 
         Returns None if the cache file does not exist, else it returns the full path
-        to the cache file.
+        to the cache file. Binary cache files are preferred over pickled cache files.
         """
-        cache_filename = self._get_cache_filename(latitude, longitude)
-        if os.path.exists(cache_filename):
-            return cache_filename
-        else:
-            return None
+        for cache_filename in [self._get_binary_cache_filename(latitude, longitude),
+                               self._get_cache_filename(latitude, longitude)]:
+            if os.path.exists(cache_filename):
+                return cache_filename
+        return None
 
     def _get_cache_filename(self, latitude, longitude):
         """Constructs the filename used for cache files given latitude and longitude
@@ -680,53 +1041,95 @@ class NASAPowerWeatherDataProvider(WeatherDataProvider):
         cache_filename = os.path.join(METEO_CACHE_DIR, fname)
         return cache_filename
 
+    def _get_binary_cache_filename(self, latitude, longitude):
+        """Constructs the filename used for binary cache files, which is the
+        name of the pickled cache file with the extension `.wdb`.
+        """
+        return os.path.splitext(self._get_cache_filename(latitude, longitude))[0] + ".wdb"
+
     def _write_cache_file(self):
         """Writes the meteo data from NASA Power to a cache file.
         """
-        cache_filename = self._get_cache_filename(self.latitude, self.longitude)
+        cache_filename = self._get_binary_cache_filename(self.latitude, self.longitude)
         try:
-            self._dump(cache_filename)
+            self._dump_binary(cache_filename)
         except (IOError, EnvironmentError) as e:
             msg = "Failed to write cache to file '%s' due to: %s" % (cache_filename, e)
             self.logger.warning(msg)
 
     def _load_cache_file(self):
         """Loads the data from the cache file. Return True if successful.
+
+        If only a pickled cache file exists, it is converted to a binary cache file
+        with the same modification time after loading.
         """
-        cache_filename = self._get_cache_filename(self.latitude, self.longitude)
+        cache_filename = self._find_cache_file(self.latitude, self.longitude)
         try:
-            self._load(cache_filename)
+            if cache_filename is None:
+                msg = "No cache file found for lat/lon: (%f, %f)." % (self.latitude, self.longitude)
+                raise IOError(msg)
+            if cache_filename.endswith(".wdb"):
+                self._load_binary(cache_filename)
+            else:
+                self._load(cache_filename)
+                self._convert_cache_file(cache_filename)
             msg = "Cache file successfully loaded."
             self.logger.debug(msg)
             return True
-        except (IOError, EnvironmentError, EOFError) as e:
+        except (IOError, EnvironmentError, EOFError, ValueError, struct.error) as e:
             msg = "Failed to load cache from file '%s' due to: %s" % (cache_filename, e)
             self.logger.warning(msg)
             return False
 
-    def _make_WeatherDataContainers(self, recs):
-        """Create a WeatherDataContainers from recs, compute ET and store the WDC's.
+    def _convert_cache_file(self, cache_filename):
+        """Writes the data loaded from the pickled cache file to a binary cache
+        file with the same modification time.
+
+        As the data are already loaded, a failure to write the binary cache file
+        is only logged.
         """
+        binary_filename = os.path.splitext(cache_filename)[0] + ".wdb"
+        try:
+            self._dump_binary(binary_filename)
+            r = os.stat(cache_filename)
+            os.utime(binary_filename, (r.st_atime, r.st_mtime))
+        except (IOError, EnvironmentError) as e:
+            msg = "Failed to convert cache file '%s' due to: %s" % (cache_filename, e)
+            self.logger.warning(msg)
 
-        for rec in recs:
-            # Reference evapotranspiration in mm/day
+    def _make_WeatherDataContainers(self, df_pcse):
+        """Compute ET for the records in df_pcse and add them to the columnar
+        weather store.
+        """
+        # Reference evapotranspiration in mm/day for all records at once
+        E0, ES0, ET0 = reference_ET_array(df_pcse.DAY, df_pcse.LAT.values, df_pcse.ELEV.values,
+                                          df_pcse.TMIN.values, df_pcse.TMAX.values,
+                                          df_pcse.IRRAD.values, df_pcse.VAP.values,
+                                          df_pcse.WIND.values, self.angstA, self.angstB,
+                                          self.ETmodel)
+
+        # Report the first record for which ET could not be calculated using
+        # the error raised by the scalar routine
+        invalid = np.flatnonzero(~(np.isfinite(E0) & np.isfinite(ES0) & np.isfinite(ET0)))
+        if len(invalid) > 0:
+            rec = df_pcse.iloc[invalid[0]].to_dict()
             try:
-                E0, ES0, ET0 = reference_ET(rec["DAY"], rec["LAT"], rec["ELEV"], rec["TMIN"], rec["TMAX"], rec["IRRAD"],
-                                            rec["VAP"], rec["WIND"], self.angstA, self.angstB, self.ETmodel)
-            except ValueError as e:
-                msg = (("Failed to calculate reference ET values on %s. " % rec["DAY"]) +
-                       ("With input values:\n %s.\n" % str(rec)) +
-                       ("Due to error: %s" % e))
-                raise exc.PCSEError(msg)
-
-            # update record with ET values value convert to cm/day
-            rec.update({"E0": E0/10., "ES0": ES0/10., "ET0": ET0/10.})
-
-            # Build weather data container from dict 't'
-            wdc = WeatherDataContainer(**rec)
+                reference_ET(rec["DAY"], rec["LAT"], rec["ELEV"], rec["TMIN"], rec["TMAX"], rec["IRRAD"],
+                             rec["VAP"], rec["WIND"], self.angstA, self.angstB, self.ETmodel)
+                e = "non-finite reference ET values"
+            except ValueError as err:
+                e = err
+            msg = (("Failed to calculate reference ET values on %s. " % rec["DAY"]) +
+                   ("With input values:\n %s.\n" % str(rec)) +
+                   ("Due to error: %s" % e))
+            raise exc.PCSEError(msg)
 
-            # add wdc to dictionary for thisdate
-            self._store_WeatherDataContainer(wdc, wdc.DAY)
+        # Store all records at once as columns, ET values converted to cm/day
+        values = {varname: df_pcse[varname].values for varname in
+                  WeatherDataContainer.sitevar + WeatherDataContainer.required +
+                  WeatherDataContainer.optional if varname in df_pcse}
+        values.update({"E0": E0/10., "ES0": ES0/10., "ET0": ET0/10.})
+        self.store.add_columns(list(df_pcse.DAY), values)
 
     def _process_POWER_records(self, powerdata):
         """Process the meteorological records returned by NASA POWER
@@ -767,3 +1170,153 @@ class NASAPowerWeatherDataProvider(WeatherDataProvider):
                                 "ELEV": self.elevation})
 
         return df_pcse
+
+
+def convert_cache_file(cache_fname):
+    """Converts a pickled cache file into a binary cache file that can be memory
+    mapped. Returns the name of the binary cache file.
+
+    The binary cache file gets the modification time of the pickled cache file,
+    so that the age of the cached data is unchanged. The pickled cache file is
+    left in place.
+    """
+    with open(cache_fname, "rb") as fp:
+        (store, elevation, longitude, latitude, description, ETmodel) = pickle.load(fp)
+
+    wdp = WeatherDataProvider()
+    wdp.store.update(store)
+    wdp.elevation, wdp.longitude, wdp.latitude = elevation, longitude, latitude
+    wdp.description, wdp.ETmodel = description, ETmodel
+    wdp.angstA, wdp.angstB = NASAPowerWeatherDataProvider.angstA, NASAPowerWeatherDataProvider.angstB
+
+    binary_fname = os.path.splitext(cache_fname)[0] + ".wdb"
+    wdp._dump_binary(binary_fname)
+    r = os.stat(cache_fname)
+    os.utime(binary_fname, (r.st_atime, r.st_mtime))
+    return binary_fname
+
+
+def convert_cache_files(cache_dir=None):
+    """One-time conversion of all pickled cache files in cache_dir into binary
+    cache files. Returns the list of binary cache files that were written.
+
+    :param cache_dir: directory with the cache files, defaults to .pcse/meteo_cache
+        in the current working directory.
+
+    Pickled cache files that already have a binary counterpart are skipped.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.getcwd(), ".pcse", "meteo_cache")
+
+    converted = []
+    for fname in sorted(os.listdir(cache_dir)):
+        cache_fname = os.path.join(cache_dir, fname)
+        if not fname.endswith(".cache") or \
+                os.path.exists(os.path.splitext(cache_fname)[0] + ".wdb"):
+            continue
+        converted.append(convert_cache_file(cache_fname))
+    return converted
+
+
+class NASAPowerProviderRegistry(object):
+    """Process-wide registry of NASAPowerWeatherDataProvider instances.
+
+    :keyword max_bytes: memory budget in bytes for the weather data held by
+        the registered providers. Defaults to 256 MB.
+
+    Providers are keyed on the latitude/longitude truncated on 0.1 degree, the
+    same truncation that is used for the cache filenames, and on the ETmodel.
+    Requesting weather data for a location that was already loaded in this
+    process returns the existing provider instead of loading the cache file
+    again.
+
+    When the total size of the weather data exceeds `max_bytes`, the least
+    recently used providers are removed from the registry. The most recently
+    requested provider is always kept, even if it alone exceeds the budget.
+    Providers that are removed remain valid for the engines that use them.
+    """
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = self.DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._providers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def logger(self):
+        loggername = "%s.%s" % (self.__class__.__module__,
+                                self.__class__.__name__)
+        return logging.getLogger(loggername)
+
+    @staticmethod
+    def _get_key(latitude, longitude, ETmodel):
+        """Returns the registry key for the given location, truncated on 0.1
+        degree as in `NASAPowerWeatherDataProvider._get_cache_filename`.
+        """
+        return (int(latitude*10), int(longitude*10), ETmodel)
+
+    def __call__(self, latitude, longitude, force_update=False, ETmodel="PM"):
+        """Returns the NASAPowerWeatherDataProvider for the given location,
+        creating it if it is not in the registry.
+
+        :param latitude: latitude to request weather data for
+        :param longitude: longitude to request weather data for
+        :keyword force_update: Set to True to replace the registered provider
+            with fresh data from the POWER website.
+        :keyword ETmodel: "PM"|"P" for selecting penman-monteith or Penman
+            method for reference evapotranspiration. Defaults to "PM".
+        """
+        key = self._get_key(latitude, longitude, ETmodel)
+        if key in self._providers and force_update is False:
+            self.hits += 1
+            self._providers.move_to_end(key)
+            return self._providers[key]
+
+        self.misses += 1
+        provider = NASAPowerWeatherDataProvider(latitude, longitude,
+                                                force_update=force_update, ETmodel=ETmodel)
+        self._providers[key] = provider
+        self._providers.move_to_end(key)
+        self._evict()
+        return provider
+
+    def __contains__(self, location):
+        latitude, longitude = location[:2]
+        ETmodel = location[2] if len(location) > 2 else "PM"
+        return self._get_key(latitude, longitude, ETmodel) in self._providers
+
+    def __len__(self):
+        return len(self._providers)
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes of weather data held by the registry.
+        """
+        return sum(p.store.nbytes for p in self._providers.values())
+
+    def set_memory_budget(self, max_bytes):
+        """Sets the memory budget in bytes and evicts providers if needed.
+        """
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        """Removes the least recently used providers until the weather data
+        fits within the memory budget.
+        """
+        nbytes = self.nbytes
+        while nbytes > self.max_bytes and len(self._providers) > 1:
+            key, provider = self._providers.popitem(last=False)
+            nbytes -= provider.store.nbytes
+            msg = "Removed weather data for lat/lon %s from registry." % (key[:2],)
+            self.logger.debug(msg)
+
+    def clear(self):
+        """Removes all providers from the registry.
+        """
+        self._providers.clear()
+
+
+#: Registry shared by all users of NASA POWER weather data in this process
+provider_registry = NASAPowerProviderRegistry()
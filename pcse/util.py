@@ -7,7 +7,7 @@ import os
 from pathlib import Path
 import datetime
 from math import cos, sin, asin, sqrt, exp, pi, radians
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from bisect import bisect_left
 import textwrap
 from collections.abc import Iterable
@@ -135,7 +135,20 @@ class Afgen(object):
         10.0
         >>> f(-1)
         0.0
+
+    The table is immutable, so identical tables can share one instance through
+    `Afgen.interned(tbl_xy)`. Arrays of abscissa values are evaluated at once
+    with `eval_many`::
+
+        >>> Afgen.interned(tbl_xy) is Afgen.interned([0., 0., 1., 1., 5., 10.])
+        True
+        >>> f.eval_many(np.array([0.5, 1.5, 6.]))
+        array([ 0.5  ,  2.125, 10.   ])
     """
+
+    # Interned instances keyed by the table contents
+    _interned = {}
+    MAX_INTERNED = 4096
     
     def _check_x_ascending(self, tbl_xy):
         """Checks that the x values are strictly ascending.
@@ -174,10 +187,31 @@ class Afgen(object):
     def __init__(self, tbl_xy):
         
         x_list, y_list = self._check_x_ascending(tbl_xy)
-        x_list = self.x_list = list(map(float, x_list))
-        y_list = self.y_list = list(map(float, y_list))
+        x_list = self.x_list = tuple(map(float, x_list))
+        y_list = self.y_list = tuple(map(float, y_list))
         intervals = list(zip(x_list, x_list[1:], y_list, y_list[1:]))
-        self.slopes = [(y2 - y1)/(x2 - x1) for x1, x2, y1, y2 in intervals]
+        self.slopes = tuple((y2 - y1)/(x2 - x1) for x1, x2, y1, y2 in intervals)
+        self._arrays = None
+
+    @classmethod
+    def interned(cls, tbl_xy):
+        """Returns the shared Afgen instance for the given table, tables with
+        the same contents give the same instance.
+
+        :param tbl_xy: List or array of XY value pairs or an Afgen instance
+        """
+        if isinstance(tbl_xy, Afgen):
+            return tbl_xy
+        try:
+            key = tuple(map(float, tbl_xy))
+        except (TypeError, ValueError):
+            return cls(tbl_xy)
+        afgen = cls._interned.get(key)
+        if afgen is None:
+            afgen = cls(tbl_xy)
+            if len(cls._interned) < cls.MAX_INTERNED:
+                cls._interned[key] = afgen
+        return afgen
 
     def __call__(self, x):
 
@@ -190,9 +224,31 @@ class Afgen(object):
         v = self.y_list[i] + self.slopes[i] * (x - self.x_list[i])
 
         return v
+
+    def eval_many(self, xs):
+        """Evaluates the table for an array of x values, giving the same
+        results as calling the table for every value.
+
+        :param xs: array of x values
+        :return: array of interpolated values with the shape of xs
+        """
+        if self._arrays is None:
+            self._arrays = (np.array(self.x_list), np.array(self.y_list),
+                            np.array(self.slopes + (0.,)))
+        x_arr, y_arr, slopes = self._arrays
+        xs = np.asarray(xs, dtype=np.float64)
+        i = np.clip(np.searchsorted(x_arr, xs, side="left") - 1, 0, len(x_arr) - 1)
+        v = y_arr[i] + slopes[i] * (xs - x_arr[i])
+        v = np.where(xs >= x_arr[-1], y_arr[-1], v)
+        return np.where(xs <= x_arr[0], y_arr[0], v)
     
 class MultiAfgen(object):
     """Emulates the AFGEN function in WOFOST for multi dimensional trait tables
+
+    The XY tables of all z values share the same x values. For every segment
+    between two z values the y values and their slopes in z are precomputed,
+    so evaluation interpolates only the two y values around x without
+    building an intermediate table.
     """
 
     def _check_x_ascending(self, tbl_xyz):
@@ -211,7 +267,7 @@ class MultiAfgen(object):
         # Check that all sub afgens are valid
         xy_afgen = []
         for xy in xy_table:
-            xy_afgen.append(Afgen(xy))
+            xy_afgen.append(Afgen.interned(xy))
         
         xy_first = xy_afgen[0]
         for xy in xy_afgen[1:]:
@@ -248,18 +304,39 @@ class MultiAfgen(object):
         intervals = list(zip(z_list, z_list[1:], xy_list, xy_list[1:]))
         self.slopes = [(y2 - y1)/(x2 - x1) for x1, x2, y1, y2 in intervals]
 
+        # The XY tables at the first and last z value
+        self.afgen_first = Afgen.interned(xy_list[0])
+        self.afgen_last = Afgen.interned(xy_list[-1])
+        # Positions in the XY tables of the pairs kept by Afgen, found by
+        # giving the positions as y values
+        xy = xy_list[0]
+        positions = Afgen(np.ravel(np.column_stack([xy[0::2], np.arange(len(xy) // 2)])))
+        y_pos = [2 * int(p) + 1 for p in positions.y_list]
+        self.x_tbl = self.afgen_first.x_list
+        # Y values and their slopes in z of the kept pairs for every segment
+        self.y_tbl = [tuple(map(float, y[y_pos])) for y in xy_list]
+        self.y_slopes = [tuple(map(float, s[y_pos])) for s in self.slopes]
+
     def __call__(self, z, x):
 
         if z <= self.z_list[0]:
-            return Afgen(self.xy_list[0])(x)
+            return self.afgen_first(x)
         if z >= self.z_list[-1]:
-            return Afgen(self.xy_list[-1])(x)
+            return self.afgen_last(x)
 
         i = bisect_left(self.z_list, z) - 1
+        dz = z - self.z_list[i]
+        y_tbl, y_slopes, x_tbl = self.y_tbl[i], self.y_slopes[i], self.x_tbl
 
-        v = self.xy_list[i] + self.slopes[i] * (z - self.z_list[i])
+        if x <= x_tbl[0]:
+            return y_tbl[0] + y_slopes[0] * dz
+        if x >= x_tbl[-1]:
+            return y_tbl[-1] + y_slopes[-1] * dz
 
-        return Afgen(v)(x)
+        k = bisect_left(x_tbl, x) - 1
+        y1 = y_tbl[k] + y_slopes[k] * dz
+        y2 = y_tbl[k+1] + y_slopes[k+1] * dz
+        return y1 + (y2 - y1)/(x_tbl[k+1] - x_tbl[k]) * (x - x_tbl[k])
 
 class AfgenTrait(TraitType):
     """An AFGEN table trait"""
@@ -270,7 +347,7 @@ class AfgenTrait(TraitType):
         if isinstance(value, Afgen):
            return value
         elif isinstance(value, Iterable):
-           return Afgen(value)
+           return Afgen.interned(value)
         self.error(obj, value)
 
 class MultiAfgenTrait(TraitType):
@@ -367,56 +444,79 @@ def doy(day):
             msg = "Parameter day is not a date or datetime object."
             raise RuntimeError(msg)
         
-def astro(day, latitude, radiation, _cache={}):
-    """python version of ASTRO routine by Daniel van Kraalingen.
-    
-    This subroutine calculates astronomic daylength, diurnal radiation
-    characteristics such as the atmospheric transmission, diffuse radiation etc.
+class LRUCache(object):
+    """Bounded cache that removes the least recently used entries and counts
+    its hits and misses.
 
-    :param day:         date/datetime object
-    :param latitude:    latitude of location
-    :param radiation:   daily global incoming radiation (J/m2/day)
+    :param maxsize: the maximum number of entries held by the cache
+    """
 
-    output is a `namedtuple` in the following order and tags::
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
-        DAYL      Astronomical daylength (base = 0 degrees)     h      
-        DAYLP     Astronomical daylength (base =-4 degrees)     h      
-        SINLD     Seasonal offset of sine of solar height       -      
-        COSLD     Amplitude of sine of solar height             -      
-        DIFPP     Diffuse irradiation perpendicular to
-                  direction of light                         J m-2 s-1 
-        ATMTR     Daily atmospheric transmission                -      
-        DSINBE    Daily total of effective solar height         s
-        ANGOT     Angot radiation at top of atmosphere       J m-2 d-1
- 
-    Authors: Daniel van Kraalingen
-    Date   : April 1991
- 
-    Python version
-    Author      : Allard de Wit
-    Date        : January 2011
-    """
+    def get(self, key):
+        """Returns the value for key or None if key is not in the cache.
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Stores the value for key and removes the least recently used
+        entries when the cache is full.
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
 
-    # Check for range of latitude
-    if abs(latitude) > 90.:
-        msg = "Latitude not between -90 and 90"
-        raise RuntimeError(msg)
-    LAT = latitude
-        
-    # Determine day-of-year (IDAY) from day
-    IDAY = doy(day)
-    
-    # reassign radiation
-    AVRAD = radiation
+    def clear(self):
+        """Removes all entries and resets the hit and miss counts.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
 
-    # Test if variables for given (day, latitude, radiation) were already calculated
-    # in a previous run. If not (e.g. KeyError) calculate the variables, store
-    # in cache and return the value.
-    try:
-        return _cache[(IDAY, LAT, AVRAD)]
-    except KeyError:
-        pass
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """Fraction of the lookups that were found in the cache.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.
+
+    def info(self):
+        """Returns a dict with the hits, misses, hit rate, size and maximum size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "size": len(self), "maxsize": self.maxsize}
 
+# Tables with the radiation independent astronomic variables for each day of
+# the year, per latitude for astro() and per (latitude, angle) for daylength()
+_astro_tables = LRUCache(maxsize=256)
+_daylength_tables = LRUCache(maxsize=256)
+
+def astro_cache_info():
+    """Returns the statistics of the astro() and daylength() table caches.
+    """
+    return {"astro": _astro_tables.info(), "daylength": _daylength_tables.info()}
+
+def _astro_day(IDAY, LAT):
+    """Calculates the radiation independent part of ASTRO for a day of the
+    year and latitude.
+
+    Returns a tuple (DAYL, DAYLP, SINLD, COSLD, DSINBE, ANGOT, SC)
+    """
     # constants
     RAD = radians(1.)
     ANGLE = -4.
@@ -458,8 +558,70 @@ def astro(day, latitude, radiation, _cache={}):
     elif AOB_CORR < -1.0:
         DAYLP = 0.0
 
-    # extraterrestrial radiation and atmospheric transmission
+    # extraterrestrial radiation
     ANGOT = SC*DSINB
+
+    return (DAYL, DAYLP, SINLD, COSLD, DSINBE, ANGOT, SC)
+
+def _get_astro_table(LAT):
+    """Returns the radiation independent part of ASTRO for day-of-year 1 to
+    366 at the given latitude, the table is computed once per latitude.
+    """
+    table = _astro_tables.get(LAT)
+    if table is None:
+        table = [_astro_day(IDAY, LAT) for IDAY in range(1, 367)]
+        _astro_tables.put(LAT, table)
+    return table
+
+def astro(day, latitude, radiation):
+    """python version of ASTRO routine by Daniel van Kraalingen.
+    
+    This subroutine calculates astronomic daylength, diurnal radiation
+    characteristics such as the atmospheric transmission, diffuse radiation etc.
+
+    :param day:         date/datetime object
+    :param latitude:    latitude of location
+    :param radiation:   daily global incoming radiation (J/m2/day)
+
+    output is a `namedtuple` in the following order and tags::
+
+        DAYL      Astronomical daylength (base = 0 degrees)     h      
+        DAYLP     Astronomical daylength (base =-4 degrees)     h      
+        SINLD     Seasonal offset of sine of solar height       -      
+        COSLD     Amplitude of sine of solar height             -      
+        DIFPP     Diffuse irradiation perpendicular to
+                  direction of light                         J m-2 s-1 
+        ATMTR     Daily atmospheric transmission                -      
+        DSINBE    Daily total of effective solar height         s
+        ANGOT     Angot radiation at top of atmosphere       J m-2 d-1
+
+    The radiation independent variables are taken from a table with all days
+    of the year that is computed once per latitude and held in a bounded
+    cache, see `astro_cache_info()`.
+ 
+    Authors: Daniel van Kraalingen
+    Date   : April 1991
+ 
+    Python version
+    Author      : Allard de Wit
+    Date        : January 2011
+    """
+
+    # Check for range of latitude
+    if abs(latitude) > 90.:
+        msg = "Latitude not between -90 and 90"
+        raise RuntimeError(msg)
+    LAT = latitude
+        
+    # Determine day-of-year (IDAY) from day
+    IDAY = doy(day)
+    
+    # reassign radiation
+    AVRAD = radiation
+
+    DAYL, DAYLP, SINLD, COSLD, DSINBE, ANGOT, SC = _get_astro_table(LAT)[IDAY-1]
+
+    # atmospheric transmission
     # Check for DAYL=0 as in that case the angot radiation is 0 as well
     if DAYL > 0.0:
         ATMTR = AVRAD/ANGOT
@@ -478,40 +640,85 @@ def astro(day, latitude, radiation, _cache={}):
 
     DIFPP = FRDIF*ATMTR*0.5*SC
 
-    retvalue = astro_nt(DAYL, DAYLP, SINLD, COSLD, DIFPP, ATMTR, DSINBE, ANGOT)
-    _cache[(IDAY, LAT, AVRAD)] = retvalue
+    return astro_nt(DAYL, DAYLP, SINLD, COSLD, DIFPP, ATMTR, DSINBE, ANGOT)
 
-    return retvalue
+def doy_array(days):
+    """Converts a sequence of date or datetime objects to an array of day-of-year
+    values. Integer arrays are assumed to be day-of-year already.
+    """
+    days = np.asarray(days)
+    if np.issubdtype(days.dtype, np.integer):
+        return days.astype(np.float64)
+    return np.fromiter((doy(day) for day in days), dtype=np.float64, count=len(days))
 
-def daylength(day, latitude, angle=-4, _cache={}):
-    """Calculates the daylength for a given day, altitude and base.
+def astro_array(days, latitude, radiation):
+    """Array version of `astro()` for computing the astronomic variables for
+    many days at once.
 
-    :param day:         date/datetime object
-    :param latitude:    latitude of location
-    :param angle:       The photoperiodic daylength starts/ends when the sun
-        is `angle` degrees under the horizon. Default is -4 degrees.
-    
-    Derived from the WOFOST routine ASTRO.FOR and simplified to include only
-    daylength calculation. Results are being cached for performance
-    """
-    #from unum.units import h
+    :param days:        sequence of date/datetime objects or day-of-year values
+    :param latitude:    latitude of location, scalar or array
+    :param radiation:   daily global incoming radiation (J/m2/day), scalar or array
 
+    Returns an `astro_nt` namedtuple with arrays. Results match those of `astro()`
+    up to floating point round-off.
+    """
+    LAT = np.asarray(latitude, dtype=np.float64)
     # Check for range of latitude
-    if abs(latitude) > 90.:
+    if np.any(np.abs(LAT) > 90.):
         msg = "Latitude not between -90 and 90"
         raise RuntimeError(msg)
-    
-    # Calculate day-of-year from date object day
-    IDAY = doy(day)
-    
-    # Test if daylength for given (day, latitude, angle) was already calculated
-    # in a previous run. If not (e.g. KeyError) calculate the daylength, store
-    # in cache and return the value.
-    try:
-        return _cache[(IDAY, latitude, angle)]
-    except KeyError:
-        pass
-    
+
+    IDAY = doy_array(days)
+    AVRAD = np.asarray(radiation, dtype=np.float64)
+
+    # constants
+    RAD = radians(1.)
+    ANGLE = -4.
+
+    # Declination and solar constant for this day
+    DEC = -np.arcsin(sin(23.45*RAD)*np.cos(2.*pi*(IDAY+10.)/365.))
+    SC  = 1370.*(1.+0.033*np.cos(2.*pi*IDAY/365.))
+
+    # calculation of daylength from intermediate variables
+    # SINLD, COSLD and AOB
+    SINLD = np.sin(RAD*LAT)*np.sin(DEC)
+    COSLD = np.cos(RAD*LAT)*np.cos(DEC)
+    AOB = SINLD/COSLD
+
+    # Solution for base=0 degrees, daylength is limited to 0 and 24 hours
+    # where abs(AOB) > 1, in which case the square root terms vanish.
+    AOB_LIM = np.clip(AOB, -1., 1.)
+    DAYL = np.where(np.abs(AOB) <= 1.0, 12.0*(1.+2.*np.arcsin(AOB_LIM)/pi),
+                    np.where(AOB > 1.0, 24.0, 0.0))
+    # integrals of sine of solar height
+    SQRT_AOB = np.sqrt(1.-AOB_LIM**2)
+    DSINB  = 3600.*(DAYL*SINLD+24.*COSLD*SQRT_AOB/pi)
+    DSINBE = 3600.*(DAYL*(SINLD+0.4*(SINLD**2+COSLD**2*0.5))+
+             12.*COSLD*(2.+3.*0.4*SINLD)*SQRT_AOB/pi)
+
+    # Calculate solution for base=-4 (ANGLE) degrees
+    AOB_CORR = (-sin(ANGLE*RAD)+SINLD)/COSLD
+    DAYLP = np.where(np.abs(AOB_CORR) <= 1.0,
+                     12.0*(1.+2.*np.arcsin(np.clip(AOB_CORR, -1., 1.))/pi),
+                     np.where(AOB_CORR > 1.0, 24.0, 0.0))
+
+    # extraterrestrial radiation and atmospheric transmission
+    ANGOT = SC*DSINB
+    # Check for DAYL=0 as in that case the angot radiation is 0 as well
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ATMTR = np.where(DAYL > 0.0, AVRAD/ANGOT, 0.)
+
+    # estimate fraction diffuse irradiation
+    FRDIF = np.select([ATMTR > 0.75, ATMTR > 0.35, ATMTR > 0.07],
+                      [0.23, 1.33-1.46*ATMTR, 1.-2.3*(ATMTR-0.07)**2], 1.)
+
+    DIFPP = FRDIF*ATMTR*0.5*SC
+
+    return astro_nt(DAYL, DAYLP, SINLD, COSLD, DIFPP, ATMTR, DSINBE, ANGOT)
+
+def _daylength_day(IDAY, latitude, angle):
+    """Calculates the daylength for a day of the year, latitude and base.
+    """
     # constants
     RAD = radians(1.)
 
@@ -531,11 +738,37 @@ def daylength(day, latitude, angle=-4, _cache={}):
     else:
         DAYLP =  0.0
 
-    # store results in cache
-    _cache[(IDAY, latitude, angle)] = DAYLP
-    
     return DAYLP
 
+def daylength(day, latitude, angle=-4):
+    """Calculates the daylength for a given day, altitude and base.
+
+    :param day:         date/datetime object
+    :param latitude:    latitude of location
+    :param angle:       The photoperiodic daylength starts/ends when the sun
+        is `angle` degrees under the horizon. Default is -4 degrees.
+    
+    Derived from the WOFOST routine ASTRO.FOR and simplified to include only
+    daylength calculation. The daylength of all days of the year is computed
+    once per (latitude, angle) and held in a bounded cache for performance
+    """
+    #from unum.units import h
+
+    # Check for range of latitude
+    if abs(latitude) > 90.:
+        msg = "Latitude not between -90 and 90"
+        raise RuntimeError(msg)
+    
+    # Calculate day-of-year from date object day
+    IDAY = doy(day)
+
+    table = _daylength_tables.get((latitude, angle))
+    if table is None:
+        table = [_daylength_day(i, latitude, angle) for i in range(1, 367)]
+        _daylength_tables.put((latitude, angle), table)
+
+    return table[IDAY-1]
+
 """ Used for NASA POWER the first time that a location is loaded"""
 
 Celsius2Kelvin = lambda x: x + 273.16
@@ -814,6 +1047,145 @@ def penman_monteith(DAY, LAT, ELEV, TMIN, TMAX, AVRAD, VAP, WIND2):
 
     return ET0
 
+def reference_ET_array(DAY, LAT, ELEV, TMIN, TMAX, IRRAD, VAP, WIND,
+                       ANGSTA, ANGSTB, ETMODEL="PM", **kwargs):
+    """Array version of `reference_ET()` for computing E0, ES0 and ET0 for many
+    days at once, e.g. for the columns of a DataFrame with weather records.
+
+    DAY is a sequence of date objects (or day-of-year values), the other inputs
+    are arrays of the same length or scalars. See `reference_ET()` for the
+    description of the inputs and outputs. Results match those of
+    `reference_ET()` up to floating point round-off. Days for which the scalar
+    routine raises an error (e.g. negative vapour pressure) yield NaN.
+    """
+    if ETMODEL not in ["PM", "P"]:
+        msg = "Variable ETMODEL can have values 'PM'|'P' only."
+        raise RuntimeError(msg)
+
+    r = astro_array(DAY, LAT, IRRAD)
+    E0, ES0, ET0 = penman_array(DAY, LAT, ELEV, TMIN, TMAX, IRRAD, VAP, WIND,
+                                ANGSTA, ANGSTB, astro_results=r)
+    if ETMODEL == "PM":
+        ET0 = penman_monteith_array(DAY, LAT, ELEV, TMIN, TMAX, IRRAD, VAP, WIND,
+                                    astro_results=r)
+
+    return E0, ES0, ET0
+
+def penman_array(DAY, LAT, ELEV, TMIN, TMAX, AVRAD, VAP, WIND2, ANGSTA, ANGSTB,
+                 astro_results=None):
+    """Array version of `penman()`, returns a tuple of arrays (E0, ES0, ET0).
+
+    The results of `astro_array()` can be passed as `astro_results` to avoid
+    computing them twice.
+    """
+    TMIN, TMAX, AVRAD, VAP, WIND2, ELEV = [np.asarray(x, dtype=np.float64) for x in
+                                           (TMIN, TMAX, AVRAD, VAP, WIND2, ELEV)]
+    PSYCON = 0.67; REFCFW = 0.05; REFCFS = 0.15; REFCFC = 0.25
+    LHVAP = 2.45E6; STBC =  5.670373E-8 * 24*60*60 # (=4.9E-3)
+
+    # preparatory calculations
+    TMPA = (TMIN+TMAX)/2.
+    TDIF = TMAX - TMIN
+    BU = 0.54 + 0.35 * np.clip((TDIF-12.)/4., 0., 1.)
+
+    # barometric pressure (mbar) and psychrometric constant (mbar/Celsius)
+    PBAR = 1013.*np.exp(-0.034*ELEV/(TMPA+273.))
+    GAMMA = PSYCON*PBAR/1013.
+
+    # saturated vapour pressure, its derivative with respect to temperature
+    # and measured vapour pressure not to exceed saturated vapour pressure
+    SVAP = 6.10588 * np.exp(17.32491*TMPA/(TMPA+238.102))
+    DELTA = 238.102*17.32491*SVAP/(TMPA+238.102)**2
+    VAP = np.minimum(VAP, SVAP)
+
+    # relative sunshine duration from the Angstrom formula
+    r = astro_array(DAY, LAT, AVRAD) if astro_results is None else astro_results
+    RELSSD = np.clip((r.ATMTR-abs(ANGSTA))/abs(ANGSTB), 0., 1.)
+
+    # net outgoing long-wave radiation (J/m2/d) acc. to Brunt (1932)
+    with np.errstate(invalid="ignore"):
+        RB = STBC*(TMPA+273.)**4*(0.56-0.079*np.sqrt(VAP))*(0.1+0.9*RELSSD)
+
+    # net absorbed radiation, expressed in mm/d
+    RNW = (AVRAD*(1.-REFCFW)-RB)/LHVAP
+    RNS = (AVRAD*(1.-REFCFS)-RB)/LHVAP
+    RNC = (AVRAD*(1.-REFCFC)-RB)/LHVAP
+
+    # evaporative demand of the atmosphere (mm/d)
+    EA  = 0.26 * np.maximum(0., (SVAP-VAP)) * (0.5+BU*WIND2)
+    EAC = 0.26 * np.maximum(0., (SVAP-VAP)) * (1.0+BU*WIND2)
+
+    # Penman formula (1948), reference evaporation >= 0.
+    E0  = np.maximum(0., (DELTA*RNW+GAMMA*EA)/(DELTA+GAMMA))
+    ES0 = np.maximum(0., (DELTA*RNS+GAMMA*EA)/(DELTA+GAMMA))
+    ET0 = np.maximum(0., (DELTA*RNC+GAMMA*EAC)/(DELTA+GAMMA))
+
+    return E0, ES0, ET0
+
+def penman_monteith_array(DAY, LAT, ELEV, TMIN, TMAX, AVRAD, VAP, WIND2,
+                          astro_results=None):
+    """Array version of `penman_monteith()`, returns an array with ET0.
+
+    The results of `astro_array()` can be passed as `astro_results` to avoid
+    computing them twice.
+    """
+    TMIN, TMAX, AVRAD, VAP, WIND2, ELEV = [np.asarray(x, dtype=np.float64) for x in
+                                           (TMIN, TMAX, AVRAD, VAP, WIND2, ELEV)]
+    PSYCON = 0.665
+    REFCFC = 0.23; CRES = 70.
+    LHVAP = 2.45E6
+    STBC = 4.903E-3
+    G = 0.
+
+    # mean daily temperature (Celsius) and vapour pressure to kPa
+    TMPA = (TMIN+TMAX)/2.
+    VAP = hPa2kPa(VAP)
+
+    # atmospheric pressure at standard temperature of 293K (kPa)
+    T = 293.0
+    PATM = 101.3 * np.power((T - (0.0065*ELEV))/T, 5.26)
+
+    # psychrometric constant (kPa/Celsius)
+    GAMMA = PSYCON * PATM * 1.0E-3
+
+    # slope of the SVAP-temperature curve (kPa/Celsius)
+    SVAP_TMPA = 0.6108 * np.exp((17.27 * TMPA) / (237.3 + TMPA))
+    DELTA = (4098. * SVAP_TMPA)/np.power((TMPA + 237.3), 2)
+
+    # Daily average saturated vapour pressure [kPa] from min/max temperature
+    SVAP_TMAX = 0.6108 * np.exp((17.27 * TMAX) / (237.3 + TMAX))
+    SVAP_TMIN = 0.6108 * np.exp((17.27 * TMIN) / (237.3 + TMIN))
+    SVAP = (SVAP_TMAX + SVAP_TMIN) / 2.
+
+    # measured vapour pressure not to exceed saturated vapour pressure
+    VAP = np.minimum(VAP, SVAP)
+
+    # preliminary net outgoing long-wave radiation (J/m2/d)
+    STB_TMAX = STBC * np.power(Celsius2Kelvin(TMAX), 4)
+    STB_TMIN = STBC * np.power(Celsius2Kelvin(TMIN), 4)
+    with np.errstate(invalid="ignore"):
+        RNL_TMP = ((STB_TMAX + STB_TMIN) / 2.) * (0.34 - 0.14 * np.sqrt(VAP))
+
+    # Clear Sky radiation [J/m2/DAY] from Angot TOA radiation
+    r = astro_array(DAY, LAT, AVRAD) if astro_results is None else astro_results
+    CSKYRAD = (0.75 + (2e-05 * ELEV)) * r.ANGOT
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Final net outgoing longwave radiation [J/m2/day]
+        RNL = RNL_TMP * (1.35 * (AVRAD/CSKYRAD) - 0.35)
+
+        # radiative and aerodynamic evaporation equivalent [mm/day]
+        RN = ((1-REFCFC) * AVRAD - RNL)/LHVAP
+        EA = ((900./(TMPA + 273)) * WIND2 * (SVAP - VAP))
+
+        # Modified psychometric constant (gamma*)[kPa/C]
+        MGAMMA = GAMMA * (1. + (CRES/208.*WIND2))
+
+        # Reference ET in mm/day
+        ET0 = (DELTA * (RN-G))/(DELTA + MGAMMA) + (GAMMA * EA)/(DELTA + MGAMMA)
+
+    return np.where(CSKYRAD > 0, np.maximum(0., ET0), 0.)
+
 def check_angstromAB(xA, xB):
     """Routine checks validity of Angstrom coefficients.
     
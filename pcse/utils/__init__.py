@@ -6,5 +6,6 @@ Modified by Will Solow, 2024
 from . import decorators
 from . import signals
 from . import traitlets
+from . import validation
 
 
@@ -12,28 +12,40 @@ Modified by Will Solow, 2024
 from traitlets_pcse import *
 import traitlets_pcse as tr
 
-class Instance(tr.Instance):
+from . import validation
+
+class FastValidation(object):
+    """Mixin for traits that skips the validation of assigned values when
+    the validation level is "fast", see `pcse.utils.validation`.
+    """
+
+    def _validate(self, obj, value):
+        if validation.level == validation.FAST:
+            return value
+        return super()._validate(obj, value)
+
+class Instance(FastValidation, tr.Instance):
 
     def __init__(self, *args, **kwargs):
         if 'allow_none' not in kwargs:
             kwargs['allow_none'] = True
         tr.Instance.__init__(self, *args, **kwargs)
 
-class Enum(tr.Enum):
+class Enum(FastValidation, tr.Enum):
 
     def __init__(self, *args, **kwargs):
         if 'allow_none' not in kwargs:
             kwargs['allow_none'] = True
         tr.Enum.__init__(self, *args, **kwargs)
 
-class Unicode(tr.Unicode):
+class Unicode(FastValidation, tr.Unicode):
 
     def __init__(self, *args, **kwargs):
         if 'allow_none' not in kwargs:
             kwargs['allow_none'] = True
         tr.Unicode.__init__(self, *args, **kwargs)
 
-class Bool(tr.Bool):
+class Bool(FastValidation, tr.Bool):
 
     def __init__(self, *args, **kwargs):
         if 'allow_none' not in kwargs:
@@ -54,7 +66,13 @@ class Float(tr.Float):
             self.error(obj, value)
         return value
 
-class Int(tr.Int):
+    def _validate(self, obj, value):
+        # Values are coerced to float at all validation levels
+        if validation.level == validation.FAST and value is not None:
+            return self.validate(obj, value)
+        return tr.Float._validate(self, obj, value)
+
+class Int(FastValidation, tr.Int):
 
     def __init__(self, *args, **kwargs):
         if 'allow_none' not in kwargs:
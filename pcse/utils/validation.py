@@ -0,0 +1,66 @@
+"""Process-wide validation level of PCSE
+
+Several defensive checks in PCSE run on every simulated day or for every
+assignment to a state or rate variable. The validation level determines which
+of these checks are carried out:
+
+* "strict": all checks of "default", plus the checks that are switched off
+  by default because they are too strict for some parameter sets: the carbon
+  balance of the crop raises a CarbonBalanceError when it does not close.
+  This check is only carried out at the strict level.
+* "default": the checks as they always ran in PCSE, the carbon balance of
+  the crop is not checked.
+* "fast": for trusted production runs, skips the checks that only guard
+  against invalid input or programming errors and never change the results:
+    - the range checks on weather variables (WeatherDataContainer,
+      WeatherDataStore);
+    - the registration and ownership checks when a variable is published in
+      the VariableKiosk;
+    - the type validation of traitlets on assignment, Float values are still
+      coerced to float;
+    - the water balance checks in `WaterbalanceFD` and `WaterbalancePP`
+      (WBALRT/WBALTT are still computed);
+    - the uniqueness test of parameter names in the ParameterProvider.
+
+The simulation results are identical at all levels as long as the checks
+pass. The level applies to the whole process and can be changed at any time
+with `set_validation_level()`. The initial level is taken from the
+environment variable PCSE_VALIDATION_LEVEL if it is set, which also applies
+it to worker processes, e.g. of vectorized environments.
+
+Written by Will Solow, 2024
+"""
+import os
+
+from . import exceptions as exc
+
+STRICT = "strict"
+DEFAULT = "default"
+FAST = "fast"
+LEVELS = (STRICT, DEFAULT, FAST)
+
+def _check_level(level:str):
+    """Returns level if it is a valid validation level, raises a PCSEError
+    otherwise.
+    """
+    if level not in LEVELS:
+        msg = "Unknown validation level '%s', should be one of %s." % (level, LEVELS)
+        raise exc.PCSEError(msg)
+    return level
+
+# Current validation level, consulted by the checks. Use set_validation_level()
+# to change it.
+level = _check_level(os.environ.get("PCSE_VALIDATION_LEVEL", DEFAULT))
+
+def set_validation_level(new_level:str):
+    """Sets the process-wide validation level.
+
+    :param new_level: One of "strict", "default" or "fast"
+    """
+    global level
+    level = _check_level(new_level)
+
+def get_validation_level():
+    """Returns the current process-wide validation level.
+    """
+    return level
@@ -0,0 +1,1199 @@
+"""Structure-of-arrays implementation of the WOFOST 8.0 crop model for
+simulating many fields in lockstep.
+
+The `Wofost8VectorEngine` simulates N fields with the `Wofost80` crop model,
+the `SoilModuleWrapper_LNPKW` soil model and the `AgroManagerAnnual`
+agromanager. Every state and rate variable is stored as a row of a 2D NumPy
+array with one column per field, so a simulation day is a fixed sequence of
+array operations over all fields instead of N walks over the
+SimulationObject tree. Fields may differ in parameters, weather, sowing and
+end dates and are kept apart by boolean masks: a field only integrates its
+crop when it has one, only runs the full crop model once its crop has
+emerged and stops when its own site end date is reached.
+
+The order of the computations follows the object model step by step, so the
+results agree with the `Wofost8Engine` up to floating point round-off.
+Not supported are the `dormant` crop start type, harvest signals, frost
+damage and the water and nutrient balance checks at the end of a season.
+
+Written by Will Solow, 2024
+"""
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from .util import Afgen, ConfigurationLoader, astro_array
+from .nasapower import WeatherDataStore
+from .crop.wofost8 import Wofost80
+from .crop.assimilation import totass_array
+from .soil.soil_wrappers import SoilModuleWrapper_LNPKW
+from .agromanager import AgroManagerAnnual
+from . import exceptions as exc
+
+# Phenological stages of an annual crop
+EMERGING, VEGETATIVE, REPRODUCTIVE, MATURE, DEAD = range(1, 6)
+# Crop end types
+_END_TYPES = {"emergence": 0, "maturity": 1, "harvest": 2, "death": 3, "max_duration": 4}
+
+
+_CROP_PARAMETERS = ("TSUMEM", "TBASEM", "TEFFMX", "TSUM1", "TSUM2", "TSUM3", "IDSL",
+    "DLO", "DLC", "DVSI", "DVSM", "DVSEND", "CVL", "CVO", "CVR", "CVS", "CO2", "Q10",
+    "RMR", "RML", "RMS", "RMO", "CFET", "DEPNR", "IAIRDU", "IOX", "NPART", "NTHRESH",
+    "PTHRESH", "KTHRESH", "RDI", "RRI", "RDMCR", "TDWI", "RGRLAI", "SPAN", "TBASE",
+    "PERDL", "RDRLV_NPK", "NSLA_NPK", "NLAI_NPK", "NMAXST_FR", "NMAXRT_FR", "PMAXST_FR",
+    "PMAXRT_FR", "KMAXST_FR", "KMAXRT_FR", "NRESIDLV", "NRESIDST", "NRESIDRT",
+    "PRESIDLV", "PRESIDST", "PRESIDRT", "KRESIDLV", "KRESIDST", "KRESIDRT", "NCRIT_FR",
+    "PCRIT_FR", "KCRIT_FR", "NLUE_NPK", "NMAXSO", "PMAXSO", "KMAXSO", "TCNT", "TCPT",
+    "TCKT", "NFIX_FR", "RNUPTAKEMAX", "RPUPTAKEMAX", "RKUPTAKEMAX", "DVS_NPK_STOP",
+    "DVS_NPK_TRANSL")
+_VERN_PARAMETERS = ("VERNSAT", "VERNBASE", "VERNDVS")
+_CROP_TABLES = ("DTSMTB", "AMAXTB", "EFFTB", "KDIFTB", "TMPFTB", "TMNFTB", "CO2AMAXTB",
+    "CO2EFFTB", "CO2TRATB", "RFSETB", "FRTB", "FLTB", "FSTB", "FOTB", "RDRRTB", "RDRROS",
+    "RDRRNPK", "RDRSTB", "SSATB", "SPA", "RDRSOB", "RDRSOF", "SLATB", "NMAXLV_TB",
+    "PMAXLV_TB", "KMAXLV_TB")
+_VERN_TABLES = ("VERNRTB",)
+_SOIL_PARAMETERS = ("SMFCF", "SM0", "SMW", "CRAIRC", "SOPE", "KSUB", "RDMSOL", "SMLIM",
+    "IFUNRN", "SSMAX", "SSI", "WAV", "NOTINF", "NSOILBASE", "NSOILBASE_FR", "PSOILBASE",
+    "PSOILBASE_FR", "KSOILBASE", "KSOILBASE_FR", "NAVAILI", "PAVAILI", "KAVAILI", "NMAX",
+    "PMAX", "KMAX", "BG_N_SUPPLY", "BG_P_SUPPLY", "BG_K_SUPPLY", "RNSOILMAX", "RPSOILMAX",
+    "RKSOILMAX", "RNABSORPTION", "RPABSORPTION", "RKABSORPTION")
+_SOIL_TABLES = ("RNPKRUNOFF",)
+
+_WEATHER_VARS = ("LAT", "IRRAD", "TMIN", "TMAX", "RAIN", "E0", "ES0", "ET0", "TEMP", "DTEMP")
+
+# Published variables, stored as rows of the blocks of the same name
+_PHENO_STATES = ("DVS", "TSUM", "TSUME", "DATBE", "VERN", "ISVERNALISED")
+_PHENO_RATES = ("DTSUME", "DTSUM", "DVR", "RDEM", "VERNR", "VERNFAC")
+_CROP_STATES = ("TAGP", "GASST", "MREST", "CTRAT", "CEVST", "FIN", "FR", "FL", "FS", "FO",
+    "RD", "RDM", "WRT", "DWRT", "TWRT", "WST", "DWST", "TWST", "SAI", "WSO", "DWSO", "TWSO",
+    "HWSO", "PAI", "LHW", "LAIEM", "LASUM", "LAIEXP", "LAIMAX", "LAI", "WLV", "DWLV", "TWLV",
+    "NamountLV", "PamountLV", "KamountLV", "NamountST", "PamountST", "KamountST",
+    "NamountSO", "PamountSO", "KamountSO", "NamountRT", "PamountRT", "KamountRT",
+    "NuptakeTotal", "PuptakeTotal", "KuptakeTotal", "NfixTotal", "NlossesTotal",
+    "PlossesTotal", "KlossesTotal", "NtranslocatableLV", "NtranslocatableST",
+    "NtranslocatableRT", "PtranslocatableLV", "PtranslocatableST", "PtranslocatableRT",
+    "KtranslocatableLV", "KtranslocatableST", "KtranslocatableRT", "Ntranslocatable",
+    "Ptranslocatable", "Ktranslocatable")
+_CROP_RATES = ("GASS", "PGASS", "MRES", "ASRC", "DMI", "ADMI", "PMRES", "EVWMX", "EVSMX",
+    "TRAMX", "TRA", "RFWS", "RFOS", "RFTRA", "NNI", "PNI", "KNI", "NPKI", "RFNPK", "RR",
+    "GRRT", "DRRT1", "DRRT2", "DRRT3", "DRRT", "GWRT", "GRST", "DRST", "GWST", "GRSO",
+    "DRSO", "GWSO", "DHSO", "GRLV", "DSLV1", "DSLV2", "DSLV3", "DSLV4", "DSLV", "DALV",
+    "DRLV", "SLAT", "FYSAGE", "GLAIEX", "GLASOL", "RNamountLV", "RPamountLV", "RKamountLV",
+    "RNamountST", "RPamountST", "RKamountST", "RNamountRT", "RPamountRT", "RKamountRT",
+    "RNamountSO", "RPamountSO", "RKamountSO", "RNdeathLV", "RNdeathST", "RNdeathRT",
+    "RPdeathLV", "RPdeathST", "RPdeathRT", "RKdeathLV", "RKdeathST", "RKdeathRT", "RNloss",
+    "RPloss", "RKloss", "RNtranslocationLV", "RNtranslocationST", "RNtranslocationRT",
+    "RPtranslocationLV", "RPtranslocationST", "RPtranslocationRT", "RKtranslocationLV",
+    "RKtranslocationST", "RKtranslocationRT", "RNuptakeLV", "RNuptakeST", "RNuptakeRT",
+    "RNuptakeSO", "RPuptakeLV", "RPuptakeST", "RPuptakeRT", "RPuptakeSO", "RKuptakeLV",
+    "RKuptakeST", "RKuptakeRT", "RKuptakeSO", "RNuptake", "RPuptake", "RKuptake",
+    "RNfixation", "NdemandLV", "NdemandST", "NdemandRT", "NdemandSO", "PdemandLV",
+    "PdemandST", "PdemandRT", "PdemandSO", "KdemandLV", "KdemandST", "KdemandRT",
+    "KdemandSO", "Ndemand", "Pdemand", "Kdemand")
+_SOIL_STATES = ("SM", "SS", "SSI", "WC", "WI", "WLOW", "WLOWI", "WWLOW", "WTRAT", "EVST",
+    "EVWT", "TSR", "RAINT", "WART", "TOTINF", "TOTIRR", "TOTIRRIG", "PERCT", "LOSST",
+    "WBALRT", "WBALTT", "DSOS", "SURFACE_N", "SURFACE_P", "SURFACE_K", "TOTN_RUNOFF",
+    "TOTP_RUNOFF", "TOTK_RUNOFF", "NSOIL", "PSOIL", "KSOIL", "NAVAIL", "PAVAIL", "KAVAIL",
+    "TOTN", "TOTP", "TOTK")
+_SOIL_RATES = ("EVS", "EVW", "WTRA", "RIN", "RIRR", "PERC", "LOSS", "DW", "DWLOW", "DTSR",
+    "DSS", "DRAINT", "RNSOIL", "RPSOIL", "RKSOIL", "RNAVAIL", "RPAVAIL", "RKAVAIL",
+    "FERT_N_SUPPLY", "FERT_P_SUPPLY", "FERT_K_SUPPLY", "RRUNOFF_N", "RRUNOFF_P", "RRUNOFF_K",
+    "RNSUBSOIL", "RPSUBSOIL", "RKSUBSOIL")
+
+# Internal variables of the crop and soil components
+_CROP_INTERNALS = ("STAGE", "FORCEVERN", "THRESHOLD_N_FLAG", "THRESHOLD_N")
+_SOIL_INTERNALS = ("RDold", "RDM", "DSLR", "RINold", "IN_CROP_CYCLE", "RIRR", "FERT_N",
+    "FERT_P", "FERT_K")
+
+
+def _limit(vmin, vmax, v):
+    """Element-wise version of `pcse.util.limit()`.
+    """
+    return np.where(v < vmin, vmin, np.where(v < vmax, v, vmax))
+
+
+def _broadcast(arg, n, name):
+    """Returns arg as a list of n items, arg is either a list with an item
+    per field or a single item used for all fields.
+    """
+    if not isinstance(arg, (list, tuple)):
+        return [arg] * n
+    if len(arg) == 1:
+        return list(arg) * n
+    if len(arg) != n:
+        msg = "Expected 1 or %i %s, got %i." % (n, name, len(arg))
+        raise exc.PCSEError(msg)
+    return list(arg)
+
+
+class _ArrayBlock(object):
+    """Stores a group of variables as the rows of one 2D float64 array.
+
+    Every variable is available as an attribute that is a view on its row,
+    assigning to the attribute writes into the row. The whole block can be
+    copied and restored at once through `data`.
+    """
+
+    def __init__(self, names, n):
+        object.__setattr__(self, "names", tuple(names))
+        object.__setattr__(self, "data", np.zeros((len(names), n)))
+        for i, name in enumerate(names):
+            object.__setattr__(self, name, self.data[i])
+
+    def __setattr__(self, name, value):
+        getattr(self, name)[...] = value
+
+
+class _AfgenArray(object):
+    """Evaluates an AFGEN table per field for an array with one x value per
+    field, giving the same results as `pcse.util.Afgen`.
+
+    :param tables: list with an Afgen table or XY list for each field
+    """
+
+    def __init__(self, tables):
+        afgens = [Afgen.interned(t) for t in tables]
+        first = afgens[0]
+        self.shared = all(a is first or (a.x_list == first.x_list and a.y_list == first.y_list)
+                          for a in afgens)
+        if self.shared:
+            afgens = [first]
+        n = max(len(a.x_list) for a in afgens)
+        self.x = np.full((len(afgens), n), np.inf)
+        self.y = np.zeros((len(afgens), n))
+        self.slopes = np.zeros((len(afgens), max(n - 1, 1)))
+        self.nmax = np.zeros(len(afgens), dtype=np.int64)
+        for i, a in enumerate(afgens):
+            k = len(a.x_list)
+            self.x[i, :k] = a.x_list
+            self.y[i, :k] = a.y_list
+            self.y[i, k:] = a.y_list[-1]
+            self.slopes[i, :k - 1] = a.slopes
+            self.nmax[i] = max(k - 2, 0)
+        last = self.nmax + np.minimum(np.array([len(a.x_list) for a in afgens]) - 1, 1)
+        rows = np.arange(len(afgens))
+        self.x0, self.xn = self.x[:, 0], self.x[rows, last]
+        self.y0, self.yn = self.y[:, 0], self.y[rows, last]
+        if self.shared:
+            self.x, self.y, self.slopes = self.x[0, :n], self.y[0], self.slopes[0]
+            self.x0, self.xn, self.y0, self.yn = self.x0[0], self.xn[0], self.y0[0], self.yn[0]
+            self.nmax = self.nmax[0]
+        else:
+            self._rows = rows
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if self.shared:
+            i = np.clip(np.searchsorted(self.x, x, side="left") - 1, 0, self.nmax)
+            v = self.y[i] + self.slopes[i] * (x - self.x[i])
+        else:
+            x = np.broadcast_to(x, self._rows.shape)
+            i = np.clip((self.x < x[:, None]).sum(axis=1) - 1, 0, self.nmax)
+            r = self._rows
+            v = self.y[r, i] + self.slopes[r, i] * (x - self.x[r, i])
+        return np.where(x <= self.x0, self.y0, np.where(x >= self.xn, self.yn, v))
+
+
+def _sweaf(ET0, DEPNR):
+    """Element-wise version of `pcse.crop.evapotranspiration.SWEAF()`.
+    """
+    sweaf = 1.0 / (0.76 + 1.5 * ET0) - (5.0 - DEPNR) * 0.1
+    sweaf = np.where(DEPNR < 3.0, sweaf + (ET0 - 0.6) / (DEPNR * (DEPNR + 3.0)), sweaf)
+    return _limit(0.1, 0.95, sweaf)
+
+
+class Wofost8VectorEngine(object):
+    """Simulates N fields with the Wofost80 crop model and the
+    SoilModuleWrapper_LNPKW soil model in lockstep.
+
+    Each field has its own parameter provider, weather data provider and
+    agromanagement, given either as a list with an item per field or as a
+    single object shared by all fields. The weather of every field is read
+    once for its whole site calendar at initialization.
+
+    All fields are advanced one day per step. A field whose site calendar
+    ends is terminated and keeps its final states while the other fields
+    continue. Variables of the crop are NaN for fields that have no crop,
+    just like the Engine returns None for them.
+
+    :param parameterproviders: ParameterProvider or list of ParameterProviders
+    :param weatherdataproviders: WeatherDataProvider or list of them
+    :param agromanagements: agromanagement dict or list of dicts as accepted
+        by `AgroManagerAnnual`
+    :param config: model configuration dict or file as accepted by the
+        Engine. CROP, SOIL and AGROMANAGEMENT must be Wofost80,
+        SoilModuleWrapper_LNPKW and AgroManagerAnnual and only daily output
+        is supported.
+    """
+
+    def __init__(self, parameterproviders, weatherdataproviders, agromanagements, config):
+        self.mconf = ConfigurationLoader(config)
+        self._check_config()
+
+        n = 1
+        for arg in (parameterproviders, weatherdataproviders, agromanagements):
+            if isinstance(arg, (list, tuple)):
+                n = max(n, len(arg))
+        pps = _broadcast(parameterproviders, n, "parameter providers")
+        wdps = _broadcast(weatherdataproviders, n, "weather data providers")
+        agros = _broadcast(agromanagements, n, "agromanagements")
+        self.n_fields = n
+
+        self._read_agromanagement(agros)
+        self._read_parameters(pps)
+        self._read_weather(wdps)
+
+        # States, rates and internal variables
+        self.ps = _ArrayBlock(_PHENO_STATES, n)
+        self.pr = _ArrayBlock(_PHENO_RATES, n)
+        self.cs = _ArrayBlock(_CROP_STATES, n)
+        self.cr = _ArrayBlock(_CROP_RATES, n)
+        self.ss = _ArrayBlock(_SOIL_STATES, n)
+        self.sr = _ArrayBlock(_SOIL_RATES, n)
+        self.cx = _ArrayBlock(_CROP_INTERNALS, n)
+        self.sx = _ArrayBlock(_SOIL_INTERNALS, n)
+
+        # Leaf classes ordered from old to new, with the oldest living class
+        # at column _lv_lo and the next new class at column _lv_hi
+        ncols = int(self._ndays.max()) + 2
+        self._lv = np.zeros((n, ncols))
+        self._sla = np.zeros((n, ncols))
+        self._lvage = np.zeros((n, ncols))
+        self._lv_lo = np.zeros(n, dtype=np.int64)
+        self._lv_hi = np.zeros(n, dtype=np.int64)
+        # Ring buffer with the minimum temperatures of the last 7 days
+        self._tmin = np.zeros((n, 7))
+        self._tmin_pos = np.zeros(n, dtype=np.int64)
+        self._tmin_count = np.zeros(n, dtype=np.int64)
+
+        self.crop = np.zeros(n, dtype=bool)
+        self._crop_published = np.zeros(n, dtype=bool)
+        self._rd_published = np.zeros(n, dtype=bool)
+        self.terminated = np.zeros(n, dtype=bool)
+        self._in_crop_cycle = np.zeros(n, dtype=bool)
+        self._duration = np.zeros(n, dtype=np.int64)
+        self._crop_finish = np.zeros(n, dtype=bool)
+        self._t = 0
+
+        self._compile_output()
+        self._output_array = np.full((n, len(self._output_vars)), np.nan)
+
+        with np.errstate(all="ignore"):
+            self._start_site()
+            self._agromanagement(self._t)
+            self._calc_rates(self._t)
+            self._finish_step()
+
+    def _check_config(self):
+        """Checks that the configuration uses the models simulated by this
+        engine.
+        """
+        m = self.mconf
+        if m.CROP is not Wofost80 or m.SOIL is not SoilModuleWrapper_LNPKW or \
+                m.AGROMANAGEMENT is not AgroManagerAnnual:
+            msg = "Wofost8VectorEngine only simulates CROP=Wofost80, " \
+                  "SOIL=SoilModuleWrapper_LNPKW and AGROMANAGEMENT=AgroManagerAnnual."
+            raise exc.PCSEError(msg)
+        if m.OUTPUT_INTERVAL != "daily":
+            msg = "Wofost8VectorEngine only supports daily output, got '%s'." % m.OUTPUT_INTERVAL
+            raise exc.PCSEError(msg)
+
+    def _read_agromanagement(self, agros):
+        """Reads the site and crop calendars of all fields.
+        """
+        n = self.n_fields
+        self._site_calendars = []
+        self._crop_calendars = []
+        self._start_date = []
+        self._ndays = np.zeros(n, dtype=np.int64)
+        self._crop_start_t = np.full(n, -1, dtype=np.int64)
+        self._crop_end_t = np.full(n, -1, dtype=np.int64)
+        self._max_duration = np.full(n, -1, dtype=np.int64)
+        self._end_type = np.full(n, -1, dtype=np.int64)
+        self._emergence_start = np.zeros(n, dtype=bool)
+        for i, agro in enumerate(agros):
+            if "AgroManagement" in agro:
+                agro = agro["AgroManagement"]
+            sc, cc = agro["SiteCalendar"], agro.get("CropCalendar")
+            if sc is None:
+                msg = "Wofost8VectorEngine requires a SiteCalendar for every field."
+                raise exc.PCSEError(msg)
+            if sc["site_start_date"] >= sc["site_end_date"]:
+                msg = "site_end_date before or equal to site_start_date for field %i!" % i
+                raise exc.PCSEError(msg)
+            self._site_calendars.append(sc)
+            self._crop_calendars.append(cc)
+            start = sc["site_start_date"]
+            self._start_date.append(start)
+            self._ndays[i] = (sc["site_end_date"] - start).days
+            if cc is None:
+                continue
+            if cc["crop_start_type"] not in ("sowing", "emergence") or \
+                    cc["crop_end_type"] not in _END_TYPES:
+                msg = "Unsupported crop start type '%s' or end type '%s' for field %i." % \
+                      (cc["crop_start_type"], cc["crop_end_type"], i)
+                raise exc.PCSEError(msg)
+            self._crop_start_t[i] = (cc["crop_start_date"] - start).days
+            self._crop_end_t[i] = (cc["crop_end_date"] - start).days
+            self._max_duration[i] = cc["max_duration"]
+            self._end_type[i] = _END_TYPES[cc["crop_end_type"]]
+            self._emergence_start[i] = cc["crop_start_type"] == "emergence"
+
+    def _read_parameters(self, pps):
+        """Reads the site, soil and crop parameters of all fields into arrays
+        and AFGEN tables.
+        """
+        values = {}
+        for i, pp in enumerate(pps):
+            sc, cc = self._site_calendars[i], self._crop_calendars[i]
+            pp.set_active_site(sc.get("site_name"), sc.get("variation_name"))
+            names = _SOIL_PARAMETERS + _SOIL_TABLES
+            if cc is not None:
+                pp.set_active_crop(cc["crop_name"], cc["variety_name"],
+                                   cc["crop_start_type"], cc["crop_end_type"])
+                names = names + _CROP_PARAMETERS + _CROP_TABLES
+                if pp["IDSL"] >= 2:
+                    names = names + _VERN_PARAMETERS + _VERN_TABLES
+            for name in names:
+                if name not in pp:
+                    msg = "Value for parameter %s missing for field %i." % (name, i)
+                    raise exc.ParameterError(msg)
+                values.setdefault(name, {})[i] = pp[name]
+
+        n = self.n_fields
+        p = self.params = SimpleNamespace()
+        for name in _SOIL_PARAMETERS + _CROP_PARAMETERS + _VERN_PARAMETERS:
+            v = values.get(name, {})
+            setattr(p, name, np.array([float(v.get(i, np.nan)) for i in range(n)]))
+        dummy = Afgen([0., 0., 1., 0.])
+        for name in _SOIL_TABLES + _CROP_TABLES + _VERN_TABLES:
+            v = values.get(name, {})
+            setattr(p, name, _AfgenArray([v.get(i, dummy) for i in range(n)]))
+        p.IDSL = np.nan_to_num(p.IDSL)
+        p.NINFTB = _AfgenArray([[0.0, 0.0, 0.5, 0.0, 1.5, 1.0]])
+        # Tables that only depend on parameters
+        p.AMAX_CO2 = p.CO2AMAXTB(p.CO2)
+        p.EFF_CO2 = p.CO2EFFTB(p.CO2)
+        p.TRAMX_CO2 = p.CO2TRATB(p.CO2)
+
+    def _read_weather(self, wdps):
+        """Reads the weather of every field for its site calendar into (T, N)
+        arrays, with the last day repeated for fields with a shorter season.
+        """
+        n = self.n_fields
+        ntimes = int(self._ndays.max()) + 1
+        w = self.weather = SimpleNamespace()
+        for name in _WEATHER_VARS:
+            setattr(w, name, np.full((ntimes, n), np.nan))
+        for i, wdp in enumerate(wdps):
+            ndays = int(self._ndays[i]) + 1
+            columns = self._weather_columns(wdp, self._start_date[i], ndays)
+            if np.isnan(columns["TEMP"]).any():
+                columns["TEMP"] = np.where(np.isnan(columns["TEMP"]),
+                                           (columns["TMIN"] + columns["TMAX"]) / 2.0, columns["TEMP"])
+            if np.isnan(columns["DTEMP"]).any():
+                columns["DTEMP"] = np.where(np.isnan(columns["DTEMP"]),
+                                            (columns["TEMP"] + columns["TMAX"]) / 2.0, columns["DTEMP"])
+            for name in _WEATHER_VARS:
+                if np.isnan(columns[name]).any():
+                    day = self._start_date[i] + datetime.timedelta(days=int(np.isnan(columns[name]).argmax()))
+                    msg = "No value for weather variable %s on %s for field %i." % (name, day, i)
+                    raise exc.WeatherDataProviderError(msg)
+                column = getattr(w, name)[:, i]
+                column[:ndays] = columns[name]
+                column[ndays:] = columns[name][-1]
+
+        # Astronomical variables for every day and field
+        days = np.array([[self._start_date[i] + datetime.timedelta(days=min(t, int(self._ndays[i])))
+                          for i in range(n)] for t in range(ntimes)])
+        astro = astro_array(days.ravel(), w.LAT.ravel(), w.IRRAD.ravel())
+        for name in ("DAYL", "DAYLP", "SINLD", "COSLD", "DIFPP", "DSINBE"):
+            setattr(w, name, getattr(astro, name).reshape(ntimes, n))
+
+    @staticmethod
+    def _weather_columns(wdp, start, ndays):
+        """Returns a dict with arrays of the weather variables of ndays days
+        from the given start date.
+        """
+        store = getattr(wdp, "store", None)
+        if isinstance(store, WeatherDataStore):
+            index = start.toordinal() - store._first_ordinal
+            if index < 0 or index + ndays > len(store.present) or \
+                    not store.present[index:index + ndays].all():
+                msg = "No weather data for (part of) %s - %s." % \
+                      (start, start + datetime.timedelta(days=ndays - 1))
+                raise exc.WeatherDataProviderError(msg)
+            return {name: np.array(store.columns[name][index:index + ndays], dtype=np.float64)
+                    if name in store.columns else np.full(ndays, np.nan) for name in _WEATHER_VARS}
+        rows = [wdp(start + datetime.timedelta(days=t)) for t in range(ndays)]
+        return {name: np.array([getattr(row, name, np.nan) for row in rows], dtype=np.float64)
+                for name in _WEATHER_VARS}
+
+    def _compile_output(self):
+        """Maps the variable names to the rows of the blocks together with the
+        kind of component they belong to.
+        """
+        self._variables = {}
+        for block, kind in ((self.ps, "crop"), (self.pr, "crop"), (self.cs, "crop"),
+                            (self.cr, "crop"), (self.ss, "soil"), (self.sr, "soil")):
+            for name in block.names:
+                self._variables[name] = (getattr(block, name), kind)
+        for name in _PHENO_STATES[-2:] + _PHENO_RATES[-2:]:
+            self._variables[name] = (self._variables[name][0], "vern")
+
+        self._output_vars = list(self.mconf.OUTPUT_VARS)
+        missing = [v for v in self._output_vars if self._find_variable(v) is None]
+        if missing:
+            msg = "Output variables not simulated by Wofost8VectorEngine: %s" % missing
+            raise exc.PCSEError(msg)
+        self._output_rows = [self._variables[self._find_variable(v)][0] for v in self._output_vars]
+        kinds = [self._variables[self._find_variable(v)][1] for v in self._output_vars]
+        self._output_crop = np.array([k == "crop" for k in kinds], dtype=bool)
+        self._output_vern = np.array([k == "vern" for k in kinds], dtype=bool)
+
+    def _find_variable(self, varname):
+        if varname in self._variables:
+            return varname
+        if varname.upper() in self._variables:
+            return varname.upper()
+        return None
+
+    def _backup(self, *blocks):
+        return [b.data.copy() for b in blocks]
+
+    def _restore(self, blocks, backups, keep):
+        """Restores the fields in mask keep of the blocks from the backups.
+        """
+        if keep.any():
+            for block, backup in zip(blocks, backups):
+                block.data[:, keep] = backup[:, keep]
+
+    def run(self, days: int=1):
+        """Advances all fields that are not terminated by the given number of
+        days.
+
+        :param days: number of days to simulate
+        """
+        days_done = 0
+        while days_done < days and not self.terminated.all():
+            days_done += 1
+            self._run()
+
+    def _run(self):
+        """Simulates one day for all fields in the same order as Engine._run()
+        """
+        self._t += 1
+        t = self._t
+        active = ~self.terminated
+        blocks = (self.ss, self.sr, self.sx)
+        backups = self._backup(*blocks) if not active.all() else None
+        with np.errstate(all="ignore"):
+            self._integrate(t)
+            self._agromanagement(t, active)
+            self._calc_rates(t)
+            self._finish_step(active)
+        if backups is not None:
+            self._restore(blocks, backups, ~active)
+
+    def _finish_step(self, active=None):
+        """Saves the output, removes finished crops and terminates fields that
+        reached the end of their site calendar.
+
+        Like the variables in the kiosk of an Engine, the crop variables of a
+        finished crop can still be retrieved until the next step flushes them.
+        """
+        active = ~self.terminated if active is None else active
+        self._save_output(active)
+        self._crop_published = np.where(active, self.crop, self._crop_published)
+        self.crop &= ~self._crop_finish
+        self._rd_published &= self.crop
+        self._crop_finish[:] = False
+        self.terminated |= self._t >= self._ndays
+
+    def _start_site(self):
+        """Initializes the water balance and the soil nutrients.
+        """
+        p, s, x = self.params, self.ss, self.sx
+        SMLIM = _limit(p.SMW, p.SM0, p.SMLIM)
+        RD = 10.0
+        RDM = np.maximum(RD, p.RDMSOL)
+        x.RDold = RD
+        x.RDM = RDM
+        SM = _limit(p.SMW, SMLIM, p.SMW + p.WAV / RD)
+        WC = SM * RD
+        WLOW = _limit(0.0, p.SM0 * (RDM - RD), p.WAV + RDM * p.SMW - WC)
+        x.DSLR = np.where(SM >= p.SMW + 0.5 * (p.SMFCF - p.SMW), 1.0, 5.0)
+        x.RINold = 0.0
+        s.data[:] = 0.0
+        s.SM = SM
+        s.SS = p.SSI
+        s.SSI = p.SSI
+        s.WC = s.WI = WC
+        s.WLOW = s.WLOWI = WLOW
+        s.WWLOW = WC + WLOW
+        s.WBALRT = s.WBALTT = -999.0
+        s.NSOIL, s.PSOIL, s.KSOIL = p.NSOILBASE, p.PSOILBASE, p.KSOILBASE
+        s.NAVAIL, s.PAVAIL, s.KAVAIL = p.NAVAILI, p.PAVAILI, p.KAVAILI
+
+    def _start_crop(self, new):
+        """Initializes the crop of the fields in mask new.
+        """
+        p, ps, cs, cx = self.params, self.ps, self.cs, self.cx
+        blocks = (ps, self.pr, cs, self.cr, cx)
+        backups = self._backup(*blocks)
+        for block in blocks:
+            block.data[:] = 0.0
+
+        DVS = np.where(self._emergence_start, p.DVSI, -0.1)
+        cx.STAGE = np.where(self._emergence_start, VEGETATIVE, EMERGING)
+        ps.DVS = DVS
+        cs.FR = FR = p.FRTB(DVS)
+        cs.FL = p.FLTB(DVS)
+        cs.FS = p.FSTB(DVS)
+        cs.FO = p.FOTB(DVS)
+        cs.RD = p.RDI
+        cs.RDM = np.maximum(p.RDI, np.minimum(p.RDMCR, p.RDMSOL))
+        cs.WRT = cs.TWRT = p.TDWI * FR
+        cs.WST = cs.TWST = p.TDWI * (1 - FR) * cs.FS
+        cs.SAI = cs.WST * p.SSATB(DVS)
+        cs.WSO = cs.TWSO = p.TDWI * (1 - FR) * cs.FO
+        cs.PAI = cs.WSO * p.SPA(DVS)
+        cs.WLV = cs.TWLV = p.TDWI * (1 - FR) * cs.FL
+        SLA = p.SLATB(DVS)
+        cs.LAIEM = cs.LASUM = cs.LAIEXP = cs.LAIMAX = cs.WLV * SLA
+        cs.LAI = cs.LASUM + cs.SAI + cs.PAI
+        for nut, MAXLV_TB in (("N", p.NMAXLV_TB), ("P", p.PMAXLV_TB), ("K", p.KMAXLV_TB)):
+            MAXLV = MAXLV_TB(DVS)
+            setattr(cs, nut + "amountLV", cs.WLV * MAXLV)
+            setattr(cs, nut + "amountST", cs.WST * MAXLV * getattr(p, nut + "MAXST_FR"))
+            setattr(cs, nut + "amountRT", cs.WRT * MAXLV * getattr(p, nut + "MAXRT_FR"))
+        cs.TAGP = cs.TWLV + cs.TWST + cs.TWSO
+
+        checksum = np.abs(p.TDWI - cs.TAGP - cs.TWRT)
+        self._restore(blocks, backups, ~new)
+        if (checksum[new] > 0.0001).any():
+            msg = "Error in partitioning of initial biomass (TDWI)!"
+            raise exc.PartitioningError(msg)
+
+        rows = np.flatnonzero(new)
+        self._lv[rows] = 0.0
+        self._sla[rows] = 0.0
+        self._lvage[rows] = 0.0
+        self._lv[rows, 0] = cs.WLV[rows]
+        self._sla[rows, 0] = SLA[rows]
+        self._lv_lo[rows] = 0
+        self._lv_hi[rows] = 1
+        self._tmin_pos[rows] = 6
+        self._tmin_count[rows] = 0
+        self.crop |= new
+        self._rd_published |= new
+
+    def _agromanagement(self, t, active=None):
+        """Runs the site and crop calendars of all fields for day t.
+        """
+        active = ~self.terminated if active is None else active
+        # Site calendar, the end of the site also finishes the crop
+        site_end = active & (t == self._ndays)
+        self._finish_crop(site_end & self.crop)
+        self._in_crop_cycle &= ~site_end
+
+        # Crop calendar
+        self._duration += self._in_crop_cycle
+        start = active & (t == self._crop_start_t)
+        if start.any():
+            self._start_crop(start)
+            self._in_crop_cycle |= start
+            self._duration[start] = 0
+            self.sx.IN_CROP_CYCLE = np.where(start, 1.0, self.sx.IN_CROP_CYCLE)
+        finish = self._in_crop_cycle & (((self._end_type == _END_TYPES["harvest"]) &
+                                         (t == self._crop_end_t)) |
+                                        (self._duration == self._max_duration))
+        self._finish_crop(finish)
+
+    def _finish_crop(self, finish):
+        """Handles the crop_finish signal for the fields in mask finish, the
+        crops are removed at the end of the day.
+        """
+        if finish.any():
+            self.cs.FIN = np.where(finish, 1.0, self.cs.FIN)
+            self._in_crop_cycle &= ~finish
+            self.sx.IN_CROP_CYCLE = np.where(finish, 0.0, self.sx.IN_CROP_CYCLE)
+            self._crop_finish |= finish
+
+    def _integrate(self, t):
+        """Integrates the crop and soil states of all fields.
+        """
+        crop = self.crop.copy()
+        # Like the kiosk after flushing the states, the soil only sees the
+        # rooting depth of crops that integrated their roots today
+        self._rd_published[:] = False
+        if crop.any():
+            stage = self._integrate_phenology(crop)
+            full = crop & (stage != EMERGING)
+            if full.any():
+                blocks = (self.cs,)
+                backups = self._backup(*blocks)
+                self._integrate_crop(full)
+                self._restore(blocks, backups, ~full)
+                self._rd_published |= full
+            self.cs.FIN = np.where(self._crop_finish, 1.0, self.cs.FIN)
+        self._integrate_soil()
+
+    def _integrate_phenology(self, crop):
+        """Integrates the phenology and vernalisation, returns the stages at
+        the start of the integration.
+        """
+        p, s, r, x = self.params, self.ps, self.pr, self.cx
+        stage = x.STAGE.copy()
+        vern = (p.IDSL >= 2) & (stage == VEGETATIVE)
+        VERN = s.VERN + r.VERNR
+        ISVERNALISED = np.where(VERN >= p.VERNSAT, 1.0, np.where(x.FORCEVERN > 0, 1.0, 0.0))
+        s.VERN = np.where(vern, VERN, s.VERN)
+        s.ISVERNALISED = np.where(vern, ISVERNALISED, s.ISVERNALISED)
+
+        s.TSUME = s.TSUME + r.DTSUME
+        s.DVS = s.DVS + r.DVR
+        s.TSUM = s.TSUM + r.DTSUM
+        DVS = s.DVS.copy()
+        to_vegetative = (stage == EMERGING) & (DVS >= 0.0)
+        to_reproductive = (stage == VEGETATIVE) & (DVS >= 1.0)
+        to_mature = (stage == REPRODUCTIVE) & (DVS >= p.DVSM)
+        to_dead = (stage == MATURE) & (DVS >= p.DVSEND)
+        s.DVS = np.select([to_vegetative, to_reproductive, to_mature, to_dead],
+                          [0.0, 1.0, p.DVSM, p.DVSEND], DVS)
+        x.STAGE = stage + (to_vegetative | to_reproductive | to_mature | to_dead)
+
+        end = self._end_type
+        finish = crop & ((to_vegetative & (end == _END_TYPES["emergence"])) |
+                         (to_mature & (end == _END_TYPES["maturity"])) |
+                         (to_dead & (end == _END_TYPES["death"])))
+        self._finish_crop(finish)
+        return stage
+
+    def _integrate_crop(self, full):
+        """Integrates the states of the crop components after phenology for the
+        fields in mask full. Other fields are restored by the caller.
+        """
+        p, s, r, x = self.params, self.cs, self.cr, self.cx
+        DVS = self.ps.DVS
+
+        # Partitioning
+        FRTB, FLTB, FSTB, FOTB = p.FRTB(DVS), p.FLTB(DVS), p.FSTB(DVS), p.FOTB(DVS)
+        water = r.RFTRA < r.NNI
+        FRTMOD = np.maximum(1.0, 1.0 / (r.RFTRA + 0.5))
+        FLVMOD = np.exp(-p.NPART * (1.0 - r.NNI))
+        FL = FLTB * FLVMOD
+        s.FR = np.where(water, np.minimum(0.6, FRTB * FRTMOD), FRTB)
+        s.FL = np.where(water, FLTB, FL)
+        s.FS = np.where(water, FSTB, FSTB + FLTB - FL)
+        s.FO = FOTB
+        threshold = x.THRESHOLD_N_FLAG > 0
+        FLVMOD = 1 / np.exp(-p.NPART * (1.0 - x.THRESHOLD_N / p.NTHRESH))
+        FO = FOTB * FLVMOD
+        s.FO = np.where(threshold, FO, s.FO)
+        s.FL = np.where(threshold, FLTB + FOTB - FO, s.FL)
+        s.FS = np.where(threshold, FSTB, s.FS)
+        s.FR = np.where(threshold, FRTB, s.FR)
+
+        # Roots
+        s.WRT = s.WRT + r.GWRT
+        s.DWRT = s.DWRT + r.DRRT
+        s.TWRT = s.WRT + s.DWRT
+        s.RD = s.RD + r.RR
+
+        # Storage organs
+        s.WSO = s.WSO + r.GWSO
+        s.HWSO = s.HWSO + (r.GRSO - r.DHSO)
+        s.DWSO = s.DWSO + r.DRSO
+        s.TWSO = s.WSO + s.DWSO
+        s.HWSO = _limit(0, s.WSO, s.HWSO)
+        s.PAI = s.WSO * p.SPA(DVS)
+
+        # Stems
+        s.WST = s.WST + r.GWST
+        s.DWST = s.DWST + r.DRST
+        s.TWST = s.WST + s.DWST
+        s.SAI = s.WST * p.SSATB(DVS)
+
+        # Leaves
+        self._integrate_leaf_classes(np.flatnonzero(full))
+        s.LAI = s.LASUM + s.SAI + s.PAI
+        s.LAIMAX = np.maximum(s.LAI, s.LAIMAX)
+        s.LAIEXP = s.LAIEXP + r.GLAIEX
+        s.DWLV = s.DWLV + r.DRLV
+        s.TWLV = s.WLV + s.DWLV
+
+        # Nutrients
+        for nut in "NPK":
+            for organ in ("LV", "ST", "RT", "SO"):
+                name = nut + "amount" + organ
+                setattr(s, name, getattr(s, name) + getattr(r, "R" + name))
+        for nut in "NPK":
+            for organ, weight in (("LV", s.WLV), ("ST", s.WST), ("RT", s.WRT)):
+                setattr(s, nut + "translocatable" + organ,
+                        np.maximum(0.0, getattr(s, nut + "amount" + organ) -
+                                   weight * getattr(p, nut + "RESID" + organ)))
+            total = getattr(s, nut + "translocatableLV") + getattr(s, nut + "translocatableST") + \
+                getattr(s, nut + "translocatableRT")
+            setattr(s, nut + "translocatable", np.where(DVS > p.DVS_NPK_TRANSL, total, 0.0))
+        s.NuptakeTotal = s.NuptakeTotal + r.RNuptake
+        s.PuptakeTotal = s.PuptakeTotal + r.RPuptake
+        s.KuptakeTotal = s.KuptakeTotal + r.RKuptake
+        s.NfixTotal = s.NfixTotal + r.RNfixation
+        s.NlossesTotal = s.NlossesTotal + r.RNloss
+        s.PlossesTotal = s.PlossesTotal + r.RPloss
+        s.KlossesTotal = s.KlossesTotal + r.RKloss
+
+        s.TAGP = s.TWLV + s.TWST + s.TWSO
+        s.GASST = s.GASST + r.GASS
+        s.MREST = s.MREST + r.MRES
+        s.CTRAT = s.CTRAT + r.TRA
+        s.CEVST = s.CEVST + self.sr.EVS
+
+    def _integrate_leaf_classes(self, rows):
+        """Removes the dying leaf biomass starting at the oldest leaf class,
+        ages the leaf classes and adds the new leaf class for the given rows.
+        """
+        s, r = self.cs, self.cr
+        LV, SLA, LVAGE = self._lv, self._sla, self._lvage
+        lo, hi = self._lv_lo, self._lv_hi
+
+        tDRLV = r.DRLV[rows].copy()
+        dying = (tDRLV > 0.0) & (lo[rows] < hi[rows])
+        while dying.any():
+            idx = np.flatnonzero(dying)
+            ri = rows[idx]
+            weight = LV[ri, lo[ri]]
+            remove = tDRLV[idx] >= weight
+            removed, kept = ri[remove], ri[~remove]
+            tDRLV[idx[remove]] -= weight[remove]
+            LV[removed, lo[removed]] = 0.0
+            lo[removed] += 1
+            LV[kept, lo[kept]] -= tDRLV[idx[~remove]]
+            tDRLV[idx[~remove]] = 0.0
+            dying = (tDRLV > 0.0) & (lo[rows] < hi[rows])
+
+        first, last = int(lo[rows].min()), int(hi[rows].max())
+        LVAGE[rows, first:last] += r.FYSAGE[rows, None]
+        new = hi[rows]
+        LV[rows, new] = r.GRLV[rows]
+        SLA[rows, new] = r.SLAT[rows]
+        LVAGE[rows, new] = 0.0
+        hi[rows] += 1
+        s.LASUM[rows] = (LV[rows, first:last + 1] * SLA[rows, first:last + 1]).sum(axis=1)
+        s.WLV[rows] = LV[rows, first:last + 1].sum(axis=1)
+
+    def _integrate_soil(self):
+        """Integrates the water balance and the soil nutrients.
+        """
+        p, s, r, x = self.params, self.ss, self.sr, self.sx
+        s.WTRAT = s.WTRAT + r.WTRA
+        s.EVWT = s.EVWT + r.EVW
+        s.EVST = s.EVST + r.EVS
+        s.RAINT = s.RAINT + r.DRAINT
+        s.TOTINF = s.TOTINF + r.RIN
+        s.TOTIRR = s.TOTIRR + r.RIRR
+        s.SS = s.SS + r.DSS
+        s.TSR = s.TSR + r.DTSR
+        s.WC = s.WC + r.DW
+        s.PERCT = s.PERCT + r.PERC
+        s.LOSST = s.LOSST + r.LOSS
+        s.WLOW = s.WLOW + r.DWLOW
+        s.WWLOW = s.WC + s.WLOW
+
+        RD = np.where(self._rd_published, self.cs.RD, 10.0)
+        RDchange = RD - x.RDold
+        WDR = np.where(RDchange > 0.001,
+                       np.minimum(s.WLOW, s.WLOW * RDchange / (p.RDMSOL - x.RDold)),
+                       s.WC * RDchange / x.RDold)
+        s.WLOW = s.WLOW - WDR
+        s.WC = s.WC + WDR
+        s.WART = s.WART + WDR
+        s.SM = s.WC / RD
+        s.DSOS = np.where((s.SM >= p.SM0 - p.CRAIRC) & (x.IN_CROP_CYCLE > 0), s.DSOS + 1, 0.0)
+        x.RDold = RD
+
+        s.SURFACE_N = s.SURFACE_N + (r.FERT_N_SUPPLY - r.RNSUBSOIL - r.RRUNOFF_N)
+        s.SURFACE_P = s.SURFACE_P + (r.FERT_P_SUPPLY - r.RPSUBSOIL - r.RRUNOFF_P)
+        s.SURFACE_K = s.SURFACE_K + (r.FERT_K_SUPPLY - r.RKSUBSOIL - r.RRUNOFF_K)
+        s.TOTN_RUNOFF = s.TOTN_RUNOFF + r.RRUNOFF_N
+        s.TOTP_RUNOFF = s.TOTP_RUNOFF + r.RRUNOFF_P
+        s.TOTK_RUNOFF = s.TOTK_RUNOFF + r.RRUNOFF_K
+        s.NSOIL = s.NSOIL + r.RNSOIL
+        s.PSOIL = s.PSOIL + r.RPSOIL
+        s.KSOIL = s.KSOIL + r.RKSOIL
+        s.NAVAIL = np.minimum(s.NAVAIL + r.RNAVAIL, p.NMAX)
+        s.PAVAIL = np.minimum(s.PAVAIL + r.RPAVAIL, p.PMAX)
+        s.KAVAIL = np.minimum(s.KAVAIL + r.RKAVAIL, p.KMAX)
+
+    def _calc_rates(self, t):
+        """Calculates the crop and soil rates of all fields for day t.
+        """
+        crop = self.crop
+        full = np.zeros_like(crop)
+        if crop.any():
+            self._calc_phenology_rates(t)
+            full = crop & (self.cx.STAGE != EMERGING)
+            if full.any():
+                self._calc_crop_rates(t, full)
+        self.cr.data[:, ~full] = 0.0
+        self._calc_soil_rates(t, full)
+
+    def _calc_phenology_rates(self, t):
+        """Calculates the development rates and vernalisation rates.
+        """
+        p, s, r, x, w = self.params, self.ps, self.pr, self.cx, self.weather
+        TEMP = w.TEMP[t]
+        stage = x.STAGE
+        DVRED = np.where(p.IDSL >= 1, _limit(0.0, 1.0, (w.DAYLP[t] - p.DLC) / (p.DLO - p.DLC)), 1.0)
+
+        vern = (p.IDSL >= 2) & (stage == VEGETATIVE)
+        active = (s.ISVERNALISED == 0) & (s.DVS < p.VERNDVS)
+        VERNFAC = np.where(active, _limit(0.0, 1.0, (s.VERN - p.VERNBASE) / (p.VERNSAT - p.VERNBASE)), 1.0)
+        r.VERNR = np.where(vern & active, p.VERNRTB(TEMP), 0.0)
+        r.VERNFAC = np.where(vern, VERNFAC, 0.0)
+        x.FORCEVERN = np.where(vern & (s.ISVERNALISED == 0) & ~active, 1.0, x.FORCEVERN)
+        VERNFAC = np.where(vern, VERNFAC, 1.0)
+
+        DTSMTB = p.DTSMTB(TEMP)
+        emerging = stage == EMERGING
+        r.DTSUME = np.where(emerging, _limit(0.0, p.TEFFMX - p.TBASEM, TEMP - p.TBASEM), 0.0)
+        r.DTSUM = np.select([stage == VEGETATIVE, stage == REPRODUCTIVE, stage == MATURE],
+                            [DTSMTB * VERNFAC * DVRED, DTSMTB, DTSMTB], 0.0)
+        r.DVR = np.select([emerging, stage == VEGETATIVE, stage == REPRODUCTIVE, stage == MATURE],
+                          [0.1 * r.DTSUME / p.TSUMEM, r.DTSUM / p.TSUM1, r.DTSUM / p.TSUM2,
+                           r.DTSUM / p.TSUM3], 0.0)
+
+    def _calc_crop_rates(self, t, full):
+        """Calculates the rates of the crop components after phenology, only
+        the rates of the fields in mask full are kept by the caller.
+        """
+        p, s, r, x, w = self.params, self.cs, self.cr, self.cx, self.weather
+        ss = self.ss
+        DVS = self.ps.DVS
+        TEMP = w.TEMP[t]
+
+        # Assimilation, with the running average of the minimum temperature
+        rows = np.flatnonzero(full)
+        self._tmin_pos[rows] = (self._tmin_pos[rows] + 1) % 7
+        self._tmin[rows, self._tmin_pos[rows]] = w.TMIN[t, rows]
+        self._tmin_count[rows] = np.minimum(self._tmin_count[rows] + 1, 7)
+        total = np.zeros(self.n_fields)
+        index = np.arange(self.n_fields)
+        for j in range(7):
+            value = self._tmin[index, (self._tmin_pos - j) % 7]
+            total = total + np.where(j < self._tmin_count, value, 0.0)
+        TMINRA = total / self._tmin_count
+        AMAX = p.AMAXTB(DVS)
+        AMAX = AMAX * p.AMAX_CO2
+        AMAX = AMAX * p.TMPFTB(w.DTEMP[t])
+        KDIF = p.KDIFTB(DVS)
+        EFF = p.EFFTB(w.DTEMP[t]) * p.EFF_CO2
+        DTGA = totass_array(w.DAYL[t], AMAX, EFF, s.LAI, KDIF, w.IRRAD[t], w.DIFPP[t],
+                            w.DSINBE[t], w.SINLD[t], w.COSLD[t])
+        DTGA = DTGA * p.TMNFTB(TMINRA)
+        r.PGASS = DTGA * 30.0 / 44.0
+
+        # Evapotranspiration
+        ET0_CROP = np.maximum(0.0, p.CFET * w.ET0[t])
+        EKL = np.exp(-(0.75 * KDIF) * s.LAI)
+        r.EVWMX = w.E0[t] * EKL
+        r.EVSMX = np.maximum(0.0, w.ES0[t] * EKL)
+        r.TRAMX = ET0_CROP * (1.0 - EKL) * p.TRAMX_CO2
+        SWDEP = _sweaf(ET0_CROP, p.DEPNR)
+        SMCR = (1.0 - SWDEP) * (p.SMFCF - p.SMW) + p.SMW
+        r.RFWS = _limit(0.0, 1.0, (ss.SM - p.SMW) / (SMCR - p.SMW))
+        RFOSMX = _limit(0.0, 1.0, (p.SM0 - ss.SM) / p.CRAIRC)
+        RFOS = RFOSMX + (1.0 - np.minimum(ss.DSOS, 4) / 4.0) * (1.0 - RFOSMX)
+        r.RFOS = np.where((p.IAIRDU == 0) & (p.IOX == 1), RFOS, 1.0)
+        r.RFTRA = r.RFOS * r.RFWS
+        r.TRA = r.TRAMX * r.RFTRA
+
+        # Nutrient stress
+        MAXLV = {"N": p.NMAXLV_TB(DVS), "P": p.PMAXLV_TB(DVS), "K": p.KMAXLV_TB(DVS)}
+        MAXST = {"N": p.NMAXST_FR * MAXLV["N"], "P": p.PMAXRT_FR * MAXLV["P"],
+                 "K": p.KMAXST_FR * MAXLV["K"]}
+        VBM = s.WLV + s.WST
+        for nut in "NPK":
+            CRIT_FR = getattr(p, nut + "CRIT_FR")
+            criticalLV = CRIT_FR * MAXLV[nut] * s.WLV
+            criticalST = CRIT_FR * MAXST[nut] * s.WST
+            criticalVBM = np.where(VBM > 0.0, (criticalLV + criticalST) / VBM, 0.0)
+            concentrationVBM = np.where(VBM > 0.0, (getattr(s, nut + "amountLV") +
+                                                    getattr(s, nut + "amountST")) / VBM, 0.0)
+            residualVBM = np.where(VBM > 0.0, (s.WLV * getattr(p, nut + "RESIDLV") +
+                                               s.WST * getattr(p, nut + "RESIDST")) / VBM, 0.0)
+            NI = _limit(0.001, 1.0, (concentrationVBM - residualVBM) / (criticalVBM - residualVBM))
+            setattr(r, nut + "NI", np.where(criticalVBM - residualVBM > 0.0, NI, 0.001))
+        r.NPKI = np.minimum(np.minimum(r.NNI, r.PNI), r.KNI)
+        r.RFNPK = _limit(0.0, 1.0, 1.0 - p.NLUE_NPK * (1.0001 - r.NPKI) ** 2)
+
+        # Gross assimilation and maintenance respiration
+        reduction = np.minimum(r.RFNPK, r.RFTRA)
+        r.GASS = r.PGASS * reduction
+        RMRES = p.RMR * s.WRT + p.RML * s.WLV + p.RMS * s.WST + p.RMO * s.WSO
+        RMRES = RMRES * p.RFSETB(DVS)
+        TEFF = p.Q10 ** ((TEMP - 25.0) / 10.0)
+        r.PMRES = RMRES * TEFF
+        r.MRES = np.minimum(r.GASS, r.PMRES)
+        r.ASRC = r.GASS - r.MRES
+
+        # Partitioning and dry matter increase
+        x.THRESHOLD_N_FLAG = np.where(ss.SURFACE_N > p.NTHRESH, 1.0, 0.0)
+        x.THRESHOLD_N = np.where(ss.SURFACE_N > p.NTHRESH, ss.SURFACE_N, 0.0)
+        CVF = 1.0 / ((s.FL / p.CVL + s.FS / p.CVS + s.FO / p.CVO) * (1.0 - s.FR) + s.FR / p.CVR)
+        r.DMI = CVF * r.ASRC
+
+        # Roots
+        r.GRRT = s.FR * r.DMI
+        RDRNPK = np.maximum(np.maximum(ss.SURFACE_N / p.NTHRESH, ss.SURFACE_P / p.PTHRESH),
+                            ss.SURFACE_K / p.KTHRESH)
+        r.DRRT1 = p.RDRRTB(DVS)
+        r.DRRT2 = p.RDRROS(r.RFOS)
+        r.DRRT3 = p.RDRRNPK(RDRNPK)
+        r.DRRT = s.WRT * _limit(0, 1, np.maximum(r.DRRT1, r.DRRT2 + r.DRRT3))
+        r.GWRT = r.GRRT - r.DRRT
+        r.RR = np.where(s.FR == 0.0, 0.0, np.minimum(s.RDM - s.RD, p.RRI))
+        r.ADMI = (1.0 - s.FR) * r.DMI
+
+        # Stems
+        r.GRST = r.ADMI * s.FS
+        r.DRST = p.RDRSTB(DVS) * s.WST
+        r.GWST = r.GRST - r.DRST
+
+        # Storage organs
+        RDRSO = _limit(0, 1, p.RDRSOB(DVS) + p.RDRSOF(TEMP))
+        r.GRSO = r.ADMI * s.FO
+        r.DRSO = s.WSO * RDRSO
+        r.DHSO = s.HWSO * RDRSO
+        r.GWSO = r.GRSO - r.DRSO
+
+        # Leaves
+        r.GRLV = r.ADMI * s.FL
+        r.DSLV1 = s.WLV * (1.0 - r.RFTRA) * p.PERDL
+        LAICR = 3.2 / KDIF
+        r.DSLV2 = s.WLV * _limit(0.0, 0.03, 0.03 * (s.LAI - LAICR) / LAICR)
+        r.DSLV3 = 0.0
+        r.DSLV4 = s.WLV * p.RDRLV_NPK * (1.0 - r.NPKI)
+        r.DSLV = np.maximum(np.maximum(r.DSLV1, r.DSLV2), r.DSLV3) + r.DSLV4
+        first, last = int(self._lv_lo[rows].min()), int(self._lv_hi[rows].max())
+        LV = self._lv[:, first:last]
+        r.DALV = np.where(self._lvage[:, first:last] > p.SPAN[:, None], LV, 0.0).sum(axis=1)
+        r.DRLV = np.maximum(r.DSLV, r.DALV)
+        r.FYSAGE = np.maximum(0.0, (TEMP - p.TBASE) / (35.0 - p.TBASE))
+        r.SLAT = p.SLATB(DVS) * np.exp(-p.NSLA_NPK * (1.0 - r.NPKI))
+        expanding = s.LAIEXP < 6.0
+        DTEFF = np.maximum(0.0, TEMP - p.TBASE)
+        factor = np.where((DVS < 0.2) & (s.LAI < 0.75),
+                          r.RFTRA * np.exp(-p.NLAI_NPK * (1.0 - r.NPKI)), 1.0)
+        r.GLAIEX = np.where(expanding, s.LAIEXP * p.RGRLAI * DTEFF * factor, 0.0)
+        r.GLASOL = np.where(expanding, r.GRLV * r.SLAT, 0.0)
+        GLA = np.minimum(r.GLAIEX, r.GLASOL)
+        r.SLAT = np.where(expanding & (r.GRLV > 0.0), GLA / r.GRLV, r.SLAT)
+
+        # Nutrient demand and uptake
+        MAXRT = {nut: getattr(p, nut + "MAXRT_FR") * MAXLV[nut] for nut in "NPK"}
+        MAXST = {nut: getattr(p, nut + "MAXST_FR") * MAXLV[nut] for nut in "NPK"}
+        LIMIT = np.where(r.RFTRA > 0.01, 1.0, 0.0)
+        for nut in "NPK":
+            demandLV = np.maximum(MAXLV[nut] * s.WLV - getattr(s, nut + "amountLV"), 0.0) + \
+                np.maximum(r.GRLV * MAXLV[nut], 0) * 1.0
+            demandST = np.maximum(MAXST[nut] * s.WST - getattr(s, nut + "amountST"), 0.0) + \
+                np.maximum(r.GRST * MAXST[nut], 0) * 1.0
+            demandRT = np.maximum(MAXRT[nut] * s.WRT - getattr(s, nut + "amountRT"), 0.0) + \
+                np.maximum(r.GRRT * MAXRT[nut], 0) * 1.0
+            demandSO = np.maximum(getattr(p, nut + "MAXSO") * s.WSO - getattr(s, nut + "amountSO"), 0.0)
+            setattr(r, nut + "demandLV", demandLV)
+            setattr(r, nut + "demandST", demandST)
+            setattr(r, nut + "demandRT", demandRT)
+            setattr(r, nut + "demandSO", demandSO)
+            setattr(r, nut + "demand", demandLV + demandST + demandRT)
+            setattr(r, "R" + nut + "uptakeSO", np.minimum(demandSO, getattr(s, nut + "translocatable")) /
+                    getattr(p, "TC" + nut + "T"))
+        r.RNfixation = np.maximum(0.0, p.NFIX_FR * r.Ndemand) * LIMIT
+        uptake = DVS < p.DVS_NPK_STOP
+        r.RNuptake = np.where(uptake, np.maximum(0.0, np.minimum(np.minimum(
+            r.Ndemand - r.RNfixation, ss.NAVAIL), p.RNUPTAKEMAX)) * LIMIT, 0.0)
+        r.RPuptake = np.where(uptake, np.maximum(0.0, np.minimum(np.minimum(
+            r.Pdemand, ss.PAVAIL), p.RPUPTAKEMAX)) * LIMIT, 0.0)
+        r.RKuptake = np.where(uptake, np.maximum(0.0, np.minimum(np.minimum(
+            r.Kdemand, ss.KAVAIL), p.RKUPTAKEMAX)) * LIMIT, 0.0)
+        for nut in "NPK":
+            demand = getattr(r, nut + "demand")
+            uptake = getattr(r, "R" + nut + "uptake")
+            if nut == "N":
+                uptake = uptake + r.RNfixation
+            for organ in ("LV", "ST", "RT"):
+                setattr(r, "R" + nut + "uptake" + organ, np.where(
+                    demand == 0.0, 0.0, getattr(r, nut + "demand" + organ) / demand * uptake))
+
+        # Nutrient translocation and crop nutrient amounts
+        for nut in "NPK":
+            translocatable = getattr(s, nut + "translocatable")
+            uptakeSO = getattr(r, "R" + nut + "uptakeSO")
+            for organ in ("LV", "ST", "RT"):
+                setattr(r, "R" + nut + "translocation" + organ, np.where(
+                    translocatable > 0.0, uptakeSO * getattr(s, nut + "translocatable" + organ) /
+                    translocatable, 0.0))
+        for nut in "NPK":
+            for organ, DR in (("LV", r.DRLV), ("ST", r.DRST), ("RT", r.DRRT)):
+                death = getattr(p, nut + "RESID" + organ) * DR
+                setattr(r, "R" + nut + "death" + organ, death)
+                setattr(r, "R" + nut + "amount" + organ, getattr(r, "R" + nut + "uptake" + organ) -
+                        getattr(r, "R" + nut + "translocation" + organ) - death)
+            setattr(r, "R" + nut + "amountSO", getattr(r, "R" + nut + "uptakeSO"))
+            setattr(r, "R" + nut + "loss", getattr(r, "R" + nut + "deathLV") +
+                    getattr(r, "R" + nut + "deathST") + getattr(r, "R" + nut + "deathRT"))
+
+    def _calc_soil_rates(self, t, full):
+        """Calculates the rates of the water balance and the soil nutrients,
+        the crop rates are only used for the fields in mask full where the
+        crop has emerged.
+        """
+        p, s, r, x, w = self.params, self.ss, self.sr, self.sx, self.weather
+        cr = self.cr
+        RAIN = w.RAIN[t]
+
+        # Water balance
+        r.RIRR = x.RIRR
+        x.RIRR = 0.0
+        r.WTRA = np.where(full, cr.TRA, 0.0)
+        EVWMX = np.where(full, cr.EVWMX, w.E0[t])
+        EVSMX = np.where(full, cr.EVSMX, w.ES0[t])
+        ponded = s.SS > 1.0
+        wet = ~ponded & (x.RINold >= 1)
+        dry = ~ponded & ~wet
+        EVSMXT = EVSMX * (np.sqrt(x.DSLR + 1) - np.sqrt(x.DSLR))
+        r.EVW = np.where(ponded, EVWMX, 0.0)
+        r.EVS = np.select([wet, dry], [EVSMX, np.minimum(EVSMX, EVSMXT + x.RINold)], 0.0)
+        x.DSLR = np.select([wet, dry], [1.0, x.DSLR + 1], x.DSLR)
+        RINPRE = np.where(p.IFUNRN == 0, (1.0 - p.NOTINF) * RAIN,
+                          (1.0 - p.NOTINF * p.NINFTB(RAIN)) * RAIN)
+        RINPRE = RINPRE + r.RIRR + s.SS
+        AVAIL = RINPRE + r.RIRR - r.EVW
+        RINPRE = np.where(s.SS > 0.1, np.minimum(p.SOPE, AVAIL), RINPRE)
+        RD = np.where(self._rd_published, self.cs.RD, 10.0)
+        WE = p.SMFCF * RD
+        PERC1 = _limit(0.0, p.SOPE, s.WC - WE - r.WTRA - r.EVS)
+        WELOW = p.SMFCF * (x.RDM - RD)
+        r.LOSS = _limit(0.0, p.KSUB, s.WLOW - WELOW + PERC1)
+        PERC2 = (x.RDM - RD) * p.SM0 - s.WLOW + r.LOSS
+        r.PERC = np.minimum(PERC1, PERC2)
+        r.RIN = np.minimum(RINPRE, (p.SM0 - s.SM) * RD + r.WTRA + r.EVS + r.PERC)
+        x.RINold = r.RIN
+        r.DW = r.RIN - r.WTRA - r.EVS - r.PERC
+        r.DWLOW = r.PERC - r.LOSS
+        Wtmp = s.WC + r.DW
+        r.EVS = np.where(Wtmp < 0.0, r.EVS + Wtmp, r.EVS)
+        r.DW = np.where(Wtmp < 0.0, -s.WC, r.DW)
+        SStmp = RAIN + r.RIRR - r.EVW - r.RIN
+        r.DSS = np.minimum(SStmp, p.SSMAX - s.SS)
+        r.DTSR = SStmp - r.DSS
+        r.DRAINT = RAIN
+
+        # Soil nutrients
+        RUNOFF = p.RNPKRUNOFF(r.DTSR)
+        for nut in "NPK":
+            setattr(r, "FERT_%s_SUPPLY" % nut, getattr(x, "FERT_" + nut))
+            setattr(x, "FERT_" + nut, 0.0)
+            SURFACE = getattr(s, "SURFACE_" + nut)
+            setattr(r, "RRUNOFF_" + nut, SURFACE * RUNOFF)
+            SUBSOIL = np.minimum(getattr(p, "R%sSOILMAX" % nut), SURFACE * getattr(p, "R%sABSORPTION" % nut))
+            setattr(r, "R%sSUBSOIL" % nut, SUBSOIL)
+            RSOIL = -np.maximum(0.0, np.minimum(getattr(p, nut + "SOILBASE_FR") * getattr(p, nut + "SOILBASE"),
+                                                getattr(s, nut + "SOIL")))
+            setattr(r, "R%sSOIL" % nut, RSOIL)
+            uptake = np.where(full, getattr(cr, "R%suptake" % nut), 0.0)
+            setattr(r, "R%sAVAIL" % nut, SUBSOIL + getattr(p, "BG_%s_SUPPLY" % nut) - uptake - RSOIL)
+
+    def _save_output(self, active):
+        """Writes the output variables of the active fields into the output
+        array.
+        """
+        if not self._output_vars:
+            return
+        values = np.stack(self._output_rows, axis=1)
+        values[:, self._output_crop] = np.where(self.crop[:, None], values[:, self._output_crop], np.nan)
+        vern = (self.crop & (self.params.IDSL >= 2))[:, None]
+        values[:, self._output_vern] = np.where(vern, values[:, self._output_vern], np.nan)
+        if active.all():
+            self._output_array[:] = values
+        else:
+            self._output_array[active] = values[active]
+
+    @property
+    def day(self):
+        """Returns the current date of every field.
+        """
+        return [start + datetime.timedelta(days=int(min(self._t, ndays)))
+                for start, ndays in zip(self._start_date, self._ndays)]
+
+    @property
+    def flag_terminate(self):
+        return bool(self.terminated.all())
+
+    def get_variable(self, varname: str):
+        """Returns an array with the value of varname for every field, NaN for
+        fields that do not have the component the variable belongs to. As with
+        an Engine, the variables of a crop are still returned on the day it
+        finishes.
+
+        Returns None if the variable is not simulated by this engine.
+
+        :param varname: Name of the variable to retrieve
+        """
+        name = self._find_variable(varname)
+        if name is None:
+            return None
+        row, kind = self._variables[name]
+        value = row.copy()
+        if kind == "crop":
+            value[~self._crop_published] = np.nan
+        elif kind == "vern":
+            value[~(self._crop_published & (self.params.IDSL >= 2))] = np.nan
+        return value
+
+    def get_output_array(self):
+        """Returns the dates of the fields and a (N, len(OUTPUT_VARS)) array
+        with the output variables of the last simulated day. The array is
+        overwritten by the next day.
+        """
+        return self.day, self._output_array
+
+    def _field_values(self, value):
+        """Returns value as an array with a value per field, fields with NaN or
+        that are terminated are masked out.
+        """
+        value = np.broadcast_to(np.asarray(value, dtype=np.float64), (self.n_fields,))
+        return value, ~np.isnan(value) & ~self.terminated
+
+    def apply_npk(self, N_amount=None, P_amount=None, K_amount=None, N_recovery=1.0,
+                  P_recovery=1.0, K_recovery=1.0):
+        """Applies fertilizer to the fields, the counterpart of sending the
+        apply_npk signal to an Engine.
+
+        Amounts and recoveries are a single value for all fields or an array
+        with a value per field. Fields with an amount of NaN receive nothing,
+        just like an amount of None.
+        """
+        s, x = self.ss, self.sx
+        for nut, amount, recovery in (("N", N_amount, N_recovery), ("P", P_amount, P_recovery),
+                                      ("K", K_amount, K_recovery)):
+            if amount is None:
+                continue
+            amount, apply = self._field_values(amount)
+            setattr(x, "FERT_" + nut, np.where(apply, amount * recovery, getattr(x, "FERT_" + nut)))
+            setattr(s, "TOT" + nut, np.where(apply, getattr(s, "TOT" + nut) + amount, getattr(s, "TOT" + nut)))
+
+    def irrigate(self, amount, efficiency=1.0):
+        """Irrigates the fields, the counterpart of sending the irrigate
+        signal to an Engine.
+
+        The amount and efficiency are a single value for all fields or an
+        array with a value per field. Fields with an amount of NaN are not
+        irrigated.
+        """
+        amount, apply = self._field_values(amount)
+        self.ss.TOTIRRIG = np.where(apply, self.ss.TOTIRRIG + amount, self.ss.TOTIRRIG)
+        self.sx.RIRR = np.where(apply, amount * efficiency, self.sx.RIRR)
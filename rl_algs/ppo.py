@@ -80,6 +80,9 @@ class Args:
     """the target KL divergence threshold"""
     checkpoint_frequency: int = 50
     """How often to save the agent during training"""
+    async_envs: bool = False
+    """if toggled, the environments are stepped in worker processes with shared memory.
+    The forecast noise then depends on the number of workers"""
 
     # to be filled in runtime
     batch_size: int = 0
@@ -128,7 +131,7 @@ class Agent(nn.Module):
             action = probs.sample()
         return action, probs.log_prob(action), probs.entropy(), self.critic(x)
 
-def make_env(kwargs, idx, capture_video, run_name):
+def make_env(kwargs, idx, capture_video, run_name, async_envs=False):
     env_id, env_kwargs = utils.get_gym_args(kwargs)
     def thunk():
         if capture_video and idx == 0:
@@ -137,6 +140,10 @@ def make_env(kwargs, idx, capture_video, run_name):
         else:
             env = gym.make(env_id, **env_kwargs)
         env = utils.wrap_env_reward(env, kwargs)
+        # The async vector env only applies the reward wrapper and records the
+        # episode statistics itself, rewards are normalized on the vector env
+        if async_envs:
+            return env
         env = gym.wrappers.RecordEpisodeStatistics(env)
         env = gym.wrappers.NormalizeReward(env)
         return env
@@ -180,9 +187,12 @@ def main(kwargs):
     device = torch.device("cuda" if torch.cuda.is_available() and args.cuda else "cpu")
 
     # env setup
-    envs = gym.vector.SyncVectorEnv(
-        [make_env(kwargs, i, args.capture_video, run_name) for i in range(args.num_envs)],
+    envs = utils.make_vector_env(
+        [make_env(kwargs, i, args.capture_video, run_name, args.async_envs) for i in range(args.num_envs)],
+        args.async_envs
     )
+    if args.async_envs:
+        envs = gym.wrappers.NormalizeReward(envs)
     assert isinstance(envs.single_action_space, gym.spaces.Discrete), "only discrete action space is supported"
 
     agent = Agent(envs).to(device)
@@ -90,9 +90,12 @@ class Args:
     """coefficient for scaling the autotune entropy target"""
     checkpoint_frequency: int = 50
     """How often to save the agent during training"""
+    async_envs: bool = False
+    """if toggled, the environments are stepped in worker processes with shared memory.
+    The forecast noise then depends on the number of workers"""
 
 
-def make_env(kwargs, seed, idx, capture_video, run_name):
+def make_env(kwargs, seed, idx, capture_video, run_name, async_envs=False):
     env_id, env_kwargs = utils.get_gym_args(kwargs)
     def thunk():
         if capture_video and idx == 0:
@@ -100,6 +103,10 @@ def make_env(kwargs, seed, idx, capture_video, run_name):
             env = gym.wrappers.RecordVideo(env, f"videos/{run_name}")
         else:
             env = gym.make(env_id,  **env_kwargs)
+        # The async vector env records the episode statistics itself and
+        # its action space is seeded in main()
+        if async_envs:
+            return env
         env = gym.wrappers.RecordEpisodeStatistics(env)
     
         env.action_space.seed(seed)
@@ -187,7 +194,10 @@ def main(args):
     device = torch.device("cuda" if torch.cuda.is_available() and args.cuda else "cpu")
 
     # env setup
-    envs = gym.vector.SyncVectorEnv([make_env(args, args.seed, 0, args.capture_video, run_name)])
+    envs = utils.make_vector_env([make_env(args, args.seed, 0, args.capture_video, run_name, args.async_envs)],
+                                 args.async_envs)
+    if args.async_envs:
+        envs.single_action_space.seed(args.seed)
     assert isinstance(envs.single_action_space, gym.spaces.Discrete), "only discrete action space is supported"
 
     actor = Actor(envs).to(device)
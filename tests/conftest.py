@@ -0,0 +1,110 @@
+"""Shared fixtures for the tests of PCSE and the WOFOST Gym. The weather is
+generated from a fixed seed so that the tests run offline and are
+reproducible.
+
+Written by Will Solow, 2024
+"""
+import os
+import sys
+import copy
+import datetime as dt
+
+import numpy as np
+import pytest
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in [ROOT, os.path.join(ROOT, "wofost_gym")]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pcse
+from pcse.nasapower import WeatherDataProvider, ea_from_tdew
+from pcse.util import reference_ET_array
+
+class SyntheticWeatherDataProvider(WeatherDataProvider):
+    """Seeded synthetic daily weather with a seasonal cycle, a stand-in for
+    the NASA POWER weather which requires network access.
+    """
+    angstA = 0.29
+    angstB = 0.49
+
+    def __init__(self, latitude:float, longitude:float, start_date:dt.date,
+                 end_date:dt.date, seed:int=0):
+        """
+        :param latitude: latitude of the site
+        :param longitude: longitude of the site
+        :param start_date: first day with weather
+        :param end_date: last day with weather
+        :param seed: seed of the random weather
+        """
+        WeatherDataProvider.__init__(self)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.elevation = 10.
+        self.description = ["Synthetic weather for testing, seed %i" % seed]
+
+        rng = np.random.default_rng(seed)
+        n = (end_date - start_date).days + 1
+        days = [start_date + dt.timedelta(days=i) for i in range(n)]
+        doy = np.array([day.timetuple().tm_yday for day in days])
+        season = -np.cos(2 * np.pi * (doy - 15) / 365.)
+        tmean = 10 + 9 * season + rng.normal(0, 2.5, n)
+        trange = 4 + 2 * rng.random(n)
+        tdew = tmean - 3 - 2 * rng.random(n)
+        values = {"LAT": np.full(n, float(latitude)),
+                  "LON": np.full(n, float(longitude)),
+                  "ELEV": np.full(n, self.elevation),
+                  "TMIN": tmean - trange,
+                  "TMAX": tmean + trange,
+                  "IRRAD": (25 + 15 * season) * (0.3 + 0.45 * rng.random(n)) * 1e6,
+                  "VAP": np.array([ea_from_tdew(t) for t in tdew]) * 10.,
+                  "WIND": 1 + 3 * rng.random(n),
+                  "RAIN": np.where(rng.random(n) < 0.35, rng.exponential(0.5, n), 0.)}
+        E0, ES0, ET0 = reference_ET_array(days, values["LAT"], values["ELEV"], values["TMIN"],
+                                          values["TMAX"], values["IRRAD"], values["VAP"],
+                                          values["WIND"], self.angstA, self.angstB)
+        values.update({"E0": E0/10., "ES0": ES0/10., "ET0": ET0/10.})
+        self.store.add_columns(days, values)
+
+def shift_season(agromanagement, years, sowing_delay=0):
+    """Returns a copy of the agromanagement shifted by a number of years, with
+    the sowing delayed by a number of days
+    """
+    agro = copy.deepcopy(agromanagement)
+    shift = lambda day: day.replace(year=day.year + years)
+    site, crop = agro["SiteCalendar"], agro["CropCalendar"]
+    site["site_start_date"] = shift(site["site_start_date"])
+    site["site_end_date"] = shift(site["site_end_date"])
+    crop["crop_start_date"] = shift(crop["crop_start_date"]) + dt.timedelta(days=sowing_delay)
+    crop["crop_end_date"] = shift(crop["crop_end_date"])
+    return agro
+
+@pytest.fixture
+def parameterprovider():
+    """ParameterProvider with the crop and site parameters of the gym
+    """
+    crop = pcse.fileinput.YAMLCropDataProvider(fpath=os.path.join(ROOT, "env_config/crop_config"))
+    site = pcse.fileinput.YAMLSiteDataProvider(fpath=os.path.join(ROOT, "env_config/site_config"))
+    return pcse.base.ParameterProvider(sitedata=site, cropdata=crop)
+
+@pytest.fixture
+def agromanagement():
+    """Agromanagement of a wheat season, ending with crop death
+    """
+    with open(os.path.join(ROOT, "env_config/agro_config/annual_agro_npk.yaml")) as f:
+        return yaml.load(f, Loader=yaml.SafeLoader)["AgroManagement"]
+
+@pytest.fixture
+def weather():
+    """Synthetic weather covering the site calendar of the agromanagement and
+    the four following years
+    """
+    return SyntheticWeatherDataProvider(52, 5, dt.date(1984, 12, 1), dt.date(1990, 1, 31), seed=42)
+
+@pytest.fixture
+def config():
+    """Model configuration of the gym
+    """
+    from wofost_gym.utils import make_config
+    return make_config()
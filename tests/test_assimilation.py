@@ -0,0 +1,49 @@
+"""Tests for the array version of the daily total gross assimilation
+
+Written by Will Solow, 2024
+"""
+import datetime as dt
+import itertools
+import warnings
+
+import numpy as np
+
+from pcse.util import astro
+from pcse.crop.assimilation import totass, totass_array
+
+EFF = 0.45
+KDIF = 0.6
+
+def astro_grid():
+    """Returns the astronomical variables of a range of days and latitudes,
+    including polar nights where DAYL and DSINBE are zero
+    """
+    rows = []
+    for lat in (-60., 0., 52., 75.):
+        for day in (dt.date(2000, 3, 21), dt.date(2000, 6, 21), dt.date(2000, 12, 21)):
+            for irrad in (0., 2e6, 2.5e7):
+                r = astro(day, lat, irrad)
+                rows.append((r.DAYL, irrad, r.DIFPP, r.DSINBE, r.SINLD, r.COSLD))
+    return rows
+
+def test_totass_array_matches_totass():
+    rows = []
+    for (DAYL, AVRAD, DIFPP, DSINBE, SINLD, COSLD), AMAX, LAI in itertools.product(
+            astro_grid(), (0., 1.5, 40.), (0., 0.01, 2.5, 7.)):
+        rows.append((DAYL, AMAX, EFF, LAI, KDIF, AVRAD, DIFPP, DSINBE, SINLD, COSLD))
+    # DAYL, AMAX, LAI or DSINBE zero on their own, which totass() does not
+    # divide by when the assimilation is zero
+    for DAYL, AMAX, LAI, DSINBE in itertools.product((0., 12.), (0., 30.), (0., 3.), (0., 30000.)):
+        if DSINBE == 0. and DAYL > 0. and AMAX > 0. and LAI > 0.:
+            continue
+        rows.append((DAYL, AMAX, EFF, LAI, KDIF, 1.5e7, 100., DSINBE, 0.2, 0.5))
+    rows = np.array(rows)
+    assert (rows[:, 0] == 0.).any() and (rows[:, 7] == 0.).any()
+
+    expected = np.array([totass(*row) for row in rows])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        values = totass_array(*rows.T)
+    assert values.shape == expected.shape
+    np.testing.assert_allclose(values, expected, rtol=1e-10, atol=1e-10)
+    assert (expected > 0.).any() and (expected == 0.).any()
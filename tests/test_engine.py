@@ -0,0 +1,94 @@
+"""Tests for rewinding and branching the engine with snapshot(), restore()
+and fork()
+
+Written by Will Solow, 2024
+"""
+import copy
+
+import numpy as np
+import pytest
+
+import pcse
+from pcse.engine import Wofost8Engine
+from pcse.crop.wofost8_fused import Wofost80Fused
+
+VARS = ["DVS", "LAI", "WSO", "WLV", "TWRT", "SM", "NAVAIL", "PAVAIL", "TRA", "RD", "FIN",
+        "NNI", "TAGP", "WC", "SURFACE_N", "TOTN", "TOTIRRIG", "RNuptake"]
+SNAPSHOT_DAY = 100
+
+CONFIGS = {
+    "default": {},
+    "compiled_states": {"COMPILED_STATES": True},
+    "crop_pooling": {"CROP_POOLING": True},
+    "output_array": {"OUTPUT_ARRAY": True},
+    "fused": {"CROP": Wofost80Fused},
+    "all": {"COMPILED_STATES": True, "CROP_POOLING": True, "OUTPUT_ARRAY": True,
+            "CROP": Wofost80Fused},
+}
+
+@pytest.fixture(params=list(CONFIGS))
+def make_engine(request, parameterprovider, weather, agromanagement, config):
+    """Returns a function that creates an engine with one of the configurations
+    """
+    config = dict(config, OUTPUT_VARS=VARS, **CONFIGS[request.param])
+    return lambda: Wofost8Engine(parameterprovider, weather, copy.deepcopy(agromanagement),
+                                 config=config)
+
+@pytest.fixture
+def actions():
+    """Irrigation and fertilization for every day of the season
+    """
+    rng = np.random.default_rng(0)
+    return list(zip(rng.integers(0, 5, size=400), rng.uniform(0, 5, size=400)))
+
+def run(engine, actions, days=None):
+    """Runs the engine for a number of days or until it terminates, taking the
+    action of the day in the season. Returns the output and the variables of
+    every day and the summary output.
+    """
+    trajectory = []
+    while not engine.flag_terminate and (days is None or len(trajectory) < days):
+        action, amount = actions[(engine.day - engine.agromanager.start_date).days]
+        if action == 1:
+            engine._send_signal(signal=pcse.signals.irrigate, amount=amount, efficiency=0.7)
+        elif action == 2:
+            engine._send_signal(signal=pcse.signals.apply_npk, N_amount=5 * amount, N_recovery=0.7)
+        elif action == 3:
+            engine._send_signal(signal=pcse.signals.apply_npk, P_amount=amount, K_amount=amount,
+                                P_recovery=0.7, K_recovery=0.7)
+        engine.run(days=1)
+        trajectory.append((engine.day, copy.deepcopy(engine.get_output()[-1:]),
+                           [engine.get_variable(varname) for varname in VARS]))
+    return trajectory, copy.deepcopy(engine.get_summary_output())
+
+def test_restore(make_engine, actions):
+    expected = run(make_engine(), actions)
+
+    engine = make_engine()
+    head, _ = run(engine, actions, days=SNAPSHOT_DAY)
+    snapshot = engine.snapshot()
+    tail, summary = run(engine, actions)
+    np.testing.assert_equal((head + tail, summary), expected)
+    assert len(summary) > 0
+
+    # Restoring twice replays the same season, also after the crop finished
+    for _ in range(2):
+        engine.restore(snapshot)
+        assert engine.day == head[-1][0] and not engine.flag_terminate
+        np.testing.assert_equal(run(engine, actions), (tail, summary))
+
+def test_fork(make_engine, actions):
+    expected = run(make_engine(), actions)
+
+    engine = make_engine()
+    head, _ = run(engine, actions, days=SNAPSHOT_DAY)
+    fork, other_fork = engine.fork(), engine.fork()
+    # A fork running a different season does not affect the parent
+    run(other_fork, actions[::-1])
+    tail, summary = run(engine, actions)
+    np.testing.assert_equal((head + tail, summary), expected)
+    assert len(summary) > 0
+
+    # Nor does the parent finishing the season affect the fork
+    assert fork.day == head[-1][0] and not fork.flag_terminate
+    np.testing.assert_equal(run(fork, actions), (tail, summary))
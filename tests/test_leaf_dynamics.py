@@ -0,0 +1,25 @@
+"""Tests for the leaf class buffers of the leaf dynamics
+
+Written by Will Solow, 2024
+"""
+import copy
+
+import numpy as np
+import pytest
+
+from pcse.engine import Wofost8Engine
+from pcse.crop.wofost8 import Wofost80
+from pcse.crop.wofost8_fused import Wofost80Fused
+
+@pytest.mark.parametrize("crop", [Wofost80, Wofost80Fused])
+def test_saved_leaf_classes_do_not_change(parameterprovider, weather, agromanagement, config, crop):
+    config = dict(config, CROP=crop)
+    engine = Wofost8Engine(parameterprovider, weather, copy.deepcopy(agromanagement), config=config)
+    engine.run(days=120)
+    saved = engine.get_output()[-1]
+    values = {varname: np.array(saved[varname]) for varname in ["LV", "SLA", "LVAGE"]}
+    assert len(values["LV"]) > 1
+    engine.run(days=80)
+    for varname, value in values.items():
+        np.testing.assert_array_equal(saved[varname], value, err_msg=varname)
+
@@ -0,0 +1,179 @@
+"""Tests for the columnar weather data storage, the binary cache files and the
+registry of NASA POWER weather data providers
+
+Written by Will Solow, 2024
+"""
+import os
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from pcse import nasapower
+from pcse import exceptions as exc
+from pcse.nasapower import NASAPowerWeatherDataProvider, NASAPowerProviderRegistry, \
+    convert_cache_files, WeatherDataProvider, WeatherDataContainer, WeatherDataStore
+
+from conftest import SyntheticWeatherDataProvider
+
+def make_wdc(day, TMAX=20., **kwargs):
+    """Returns a WeatherDataContainer with valid values for all required
+    variables
+    """
+    values = dict(LAT=52., LON=5., ELEV=10., DAY=day, IRRAD=1.e7, TMIN=5., TMAX=TMAX,
+                  VAP=10., RAIN=0.1, E0=0.3, ES0=0.2, ET0=0.25, WIND=2.)
+    values.update(kwargs)
+    return WeatherDataContainer(**values)
+
+def make_wdp(seed=0):
+    """Returns a WeatherDataProvider with synthetic weather for 1999 and 2000
+    and a single day in 2001 after a gap
+    """
+    wdp = SyntheticWeatherDataProvider(52, 5, dt.date(1999, 1, 1), dt.date(2000, 12, 31), seed=seed)
+    day = dt.date(2001, 3, 1)
+    wdp._store_WeatherDataContainer(make_wdc(day, TMAX=float(seed)), day)
+    return wdp
+
+def assert_same_weather(wdp, other):
+    """Asserts that two WeatherDataProviders hold the same days and values
+    """
+    assert len(other.store) == len(wdp.store)
+    assert (other.first_date, other.last_date) == (wdp.first_date, wdp.last_date)
+    assert other.export() == wdp.export()
+
+class EnsembleWeatherDataProvider(WeatherDataProvider):
+    supports_ensembles = True
+
+def test_ensemble_members_are_kept_apart():
+    wdp = EnsembleWeatherDataProvider()
+    day = dt.date(2000, 5, 1)
+    wdp._store_WeatherDataContainer(make_wdc(day, TMAX=5.), day, member_id=0)
+    wdp._store_WeatherDataContainer(make_wdc(day, TMAX=20.), day, member_id=1)
+    assert wdp(day, member_id=0).TMAX == 5.
+    assert wdp(day, member_id=1).TMAX == 20.
+    assert len(wdp.store) == 2
+    assert set(wdp.store.keys()) == {(day, 0), (day, 1)}
+    with pytest.raises(exc.WeatherDataProviderError):
+        wdp(day, member_id=2)
+    with pytest.raises(exc.PCSEError):
+        wdp.store.to_array()
+
+def test_add_days_one_by_one():
+    wdp = WeatherDataProvider()
+    start = dt.date(2000, 1, 1)
+    days = [start + dt.timedelta(days=i) for i in range(1000)]
+    # Forward and then backward from the start, with a gap
+    for i, day in enumerate(days[500:] + days[:400][::-1]):
+        wdp._store_WeatherDataContainer(make_wdc(day, TMAX=float(day.toordinal() % 30)), day)
+    store = wdp.store
+    assert len(store) == 900
+    assert len(store.present) <= 4 * 1000
+    assert (start + dt.timedelta(days=450), 0) not in store
+    for day in days[:400] + days[500:]:
+        assert wdp(day).TMAX == day.toordinal() % 30
+    assert wdp.first_date == days[0] and wdp.last_date == days[-1]
+
+    store.trim()
+    assert len(store.present) == 1000 and store.first_date == days[0]
+    assert wdp(days[-1]).TMAX == days[-1].toordinal() % 30
+
+def test_store_array_round_trip():
+    wdp = make_wdp()
+    varnames, data = wdp.store.to_array()
+    store = WeatherDataStore.from_array(data, wdp.store._first_ordinal, varnames)
+    assert set(varnames) == set(wdp.store.columns)
+    assert (dt.date(2001, 1, 15), 0) not in store
+    other = WeatherDataProvider()
+    other.store = store
+    assert_same_weather(wdp, other)
+
+    # The columns are views on the array
+    day = dt.date(2000, 6, 1)
+    data[varnames.index("TMAX") + 1, (day - wdp.store.first_date).days] = 99.
+    assert other(day).TMAX == 99.
+
+def test_registry_evicts_least_recently_used(monkeypatch):
+    created = []
+    def make_provider(latitude, longitude, force_update=False, ETmodel="PM"):
+        created.append((latitude, longitude))
+        return make_wdp(seed=len(created))
+    monkeypatch.setattr(nasapower, "NASAPowerWeatherDataProvider", make_provider)
+
+    nbytes = make_wdp().store.nbytes
+    registry = NASAPowerProviderRegistry(max_bytes=int(2.5 * nbytes))
+    a = registry(52., 5.)
+    b = registry(40., -120.)
+    # Locations are truncated on 0.1 degree
+    assert registry(52.05, 5.01) is a
+    assert registry.nbytes == 2 * nbytes
+
+    # Requesting a third location evicts the least recently used one
+    c = registry(10., 10.)
+    assert len(registry) == 2 and registry.nbytes == 2 * nbytes
+    assert (52., 5.) in registry and (10., 10.) in registry and (40., -120.) not in registry
+    assert registry(40., -120.) is not b
+    assert (52., 5.) not in registry
+    assert (registry.hits, registry.misses) == (1, 4)
+
+    # The most recently requested provider is kept when it exceeds the budget
+    registry.set_memory_budget(nbytes // 2)
+    assert len(registry) == 1 and (40., -120.) in registry
+    assert registry(10., 10.) is not c
+    assert len(registry) == 1 and (10., 10.) in registry
+    assert len(created) == 5
+
+def test_binary_cache_matches_pickled_cache(tmp_path):
+    wdp = make_wdp()
+    wdp._dump(tmp_path / "weather.cache")
+    wdp._dump_binary(tmp_path / "weather.wdb")
+
+    pickled, binary = WeatherDataProvider(), WeatherDataProvider()
+    pickled._load(tmp_path / "weather.cache")
+    binary._load_binary(tmp_path / "weather.wdb")
+    for other in (pickled, binary):
+        assert_same_weather(wdp, other)
+        assert (other.latitude, other.longitude, other.elevation, other.description) == \
+            (wdp.latitude, wdp.longitude, wdp.elevation, wdp.description)
+    assert (binary.angstA, binary.angstB) == (wdp.angstA, wdp.angstB)
+
+    other = WeatherDataProvider()
+    other.ETmodel = "P"
+    with pytest.raises(exc.PCSEError):
+        other._load_binary(tmp_path / "weather.wdb")
+
+def test_convert_cache_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    def query(self, latitude, longitude):
+        raise AssertionError("NASA POWER should not be queried")
+    monkeypatch.setattr(NASAPowerWeatherDataProvider, "_query_NASAPower_server", query)
+    cache_dir = tmp_path / ".pcse" / "meteo_cache"
+    cache_dir.mkdir(parents=True)
+    mtime = (dt.datetime.now() - dt.timedelta(days=10)).timestamp()
+
+    wdps = {}
+    for lat, lon in [(52., 5.), (40., -120.)]:
+        wdp = wdps[(lat, lon)] = make_wdp(seed=int(lat))
+        wdp.latitude, wdp.longitude = lat, lon
+        wdp._dump(cache_dir / ("NASAPowerWeatherDataProvider_LAT%05i_LON%05i.cache"
+                               % (int(lat * 10), int(lon * 10))))
+    for fname in os.listdir(cache_dir):
+        os.utime(cache_dir / fname, (mtime, mtime))
+
+    # Providers load a legacy cache file and convert it
+    legacy = os.path.join(cache_dir, "NASAPowerWeatherDataProvider_LAT00520_LON00050")
+    assert_same_weather(wdps[(52., 5.)], NASAPowerWeatherDataProvider(52., 5.))
+    assert os.stat(legacy + ".wdb").st_mtime == pytest.approx(mtime)
+
+    # The others are converted at once, keeping the age of the weather data
+    converted = convert_cache_files()
+    assert converted == [os.path.join(cache_dir, "NASAPowerWeatherDataProvider_LAT00400_LON-1200.wdb")]
+    assert os.stat(converted[0]).st_mtime == pytest.approx(mtime)
+    assert convert_cache_files() == []
+
+    os.remove(legacy + ".cache")
+    os.remove(converted[0][:-4] + ".cache")
+    for (lat, lon), wdp in wdps.items():
+        other = NASAPowerWeatherDataProvider(lat, lon)
+        assert_same_weather(wdp, other)
+        assert (other.angstA, other.angstB) == (NASAPowerWeatherDataProvider.angstA,
+                                                NASAPowerWeatherDataProvider.angstB)
@@ -0,0 +1,62 @@
+"""Tests for the array versions of the reference evapotranspiration
+
+Written by Will Solow, 2024
+"""
+import datetime as dt
+import itertools
+
+import numpy as np
+import pytest
+
+from pcse.util import reference_ET, reference_ET_array
+
+ANGSTA = 0.29
+ANGSTB = 0.49
+
+def weather_grid():
+    """Returns rows (DAY, LAT, ELEV, TMIN, TMAX, IRRAD, VAP, WIND) that cover
+    the branches of the scalar routines: temperature differences below, within
+    and above the range of the wind function, vapour pressure above saturation,
+    no radiation or more than the clear sky radiation, polar nights without
+    clear sky radiation and cold days where the evaporation is clamped at zero
+    """
+    rows = []
+    days = [dt.date(2000, 1, 15), dt.date(2000, 6, 21), dt.date(2000, 12, 21)]
+    for day, lat, elev in itertools.product(days, (-35., 0., 52., 80.), (0., 2500.)):
+        for TMIN, TMAX in ((-25., -15.), (5., 14.), (8., 22.), (10., 35.)):
+            for IRRAD in (0., 4e6, 2.2e7, 4.5e7):
+                for VAP in (0.5, 8., 60.):
+                    for WIND in (0., 3.):
+                        rows.append((day, lat, elev, TMIN, TMAX, IRRAD, VAP, WIND))
+    return rows
+
+@pytest.mark.parametrize("etmodel", ["PM", "P"])
+def test_reference_ET_array_matches_reference_ET(etmodel):
+    rows = weather_grid()
+    expected = np.array([reference_ET(*row, ANGSTA, ANGSTB, ETMODEL=etmodel) for row in rows])
+    columns = list(zip(*rows))
+    values = reference_ET_array(columns[0], *[np.array(c) for c in columns[1:]],
+                                ANGSTA, ANGSTB, ETMODEL=etmodel)
+    values = np.stack(values, axis=-1)
+    assert values.shape == expected.shape
+    np.testing.assert_allclose(values, expected, rtol=1e-10, atol=1e-12)
+    # Clamped and unclamped values of all outputs are covered
+    assert ((expected == 0.).any(axis=0) & (expected > 0.).any(axis=0)).all()
+
+@pytest.mark.parametrize("etmodel", ["PM", "P"])
+def test_reference_ET_array_negative_vapour_pressure(etmodel):
+    rows = [(dt.date(2000, 6, 21), 52., 10., 8., 22., 2.2e7, VAP, 3.) for VAP in (-5., 10.)]
+    with pytest.raises(ValueError):
+        reference_ET(*rows[0], ANGSTA, ANGSTB, ETMODEL=etmodel)
+    expected = reference_ET(*rows[1], ANGSTA, ANGSTB, ETMODEL=etmodel)
+
+    columns = list(zip(*rows))
+    values = reference_ET_array(columns[0], *[np.array(c) for c in columns[1:]],
+                                ANGSTA, ANGSTB, ETMODEL=etmodel)
+    assert all(np.isnan(v[0]) for v in values)
+    np.testing.assert_allclose([v[1] for v in values], expected, rtol=1e-10)
+
+def test_reference_ET_array_unknown_model():
+    with pytest.raises(RuntimeError):
+        reference_ET_array([dt.date(2000, 6, 21)], 52., 10., 8., 22., 2.2e7, 10., 3.,
+                           ANGSTA, ANGSTB, ETMODEL="X")
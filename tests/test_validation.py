@@ -0,0 +1,66 @@
+"""Tests for the process-wide validation level of PCSE
+
+Written by Will Solow, 2024
+"""
+import copy
+
+import numpy as np
+import pytest
+
+import pcse
+from pcse import validation
+from pcse.engine import Wofost8Engine
+
+def run_season(parameterprovider, weather, agromanagement, config):
+    """Runs a season with irrigation and fertilization and returns the daily
+    output and the summary output.
+    """
+    engine = Wofost8Engine(parameterprovider, weather, copy.deepcopy(agromanagement), config=config)
+    output = []
+    day = 0
+    while not engine.flag_terminate:
+        if day % 14 == 7:
+            engine._send_signal(signal=pcse.signals.irrigate, amount=2., efficiency=0.7)
+        if day % 30 == 15:
+            engine._send_signal(signal=pcse.signals.apply_npk, N_amount=20., P_amount=5.,
+                                K_amount=5., N_recovery=0.7, P_recovery=0.7, K_recovery=0.7)
+        engine.run(days=1)
+        output.extend(copy.deepcopy(engine.get_output()[-1:]))
+        day += 1
+    return output, copy.deepcopy(engine.get_summary_output())
+
+@pytest.fixture
+def restore_level():
+    level = validation.get_validation_level()
+    yield
+    validation.set_validation_level(level)
+
+def test_results_identical_across_levels(parameterprovider, weather, agromanagement, config,
+                                         restore_level):
+    results = {}
+    for level in validation.LEVELS:
+        validation.set_validation_level(level)
+        results[level] = run_season(parameterprovider, weather, agromanagement, config)
+
+    output, summary = results[validation.DEFAULT]
+    assert len(output) > 200
+    assert max(row["DVS"] for row in output if row["DVS"] is not None) > 1.
+    assert len(summary) > 0
+    for level in [validation.STRICT, validation.FAST]:
+        np.testing.assert_equal(results[level][0], output)
+        np.testing.assert_equal(results[level][1], summary)
+
+def test_unknown_level(restore_level):
+    with pytest.raises(pcse.exceptions.PCSEError):
+        validation.set_validation_level("none")
+    assert validation.get_validation_level() in validation.LEVELS
+
+def test_fast_skips_kiosk_ownership(restore_level):
+    kiosk = pcse.base.VariableKiosk()
+    kiosk.register_variable(1, "A", type="S", publish=True)
+    validation.set_validation_level(validation.FAST)
+    kiosk.set_variable(2, "A", 1.)
+    assert kiosk["A"] == 1.
+    validation.set_validation_level(validation.DEFAULT)
+    with pytest.raises(pcse.exceptions.VariableKioskError):
+        kiosk.set_variable(2, "A", 2.)
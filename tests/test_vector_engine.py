@@ -0,0 +1,71 @@
+"""Tests for the structure-of-arrays WOFOST 8.0 engine
+
+Written by Will Solow, 2024
+"""
+import copy
+
+import numpy as np
+
+import pcse
+from pcse.engine import Wofost8Engine
+from pcse.vector_engine import Wofost8VectorEngine
+
+from conftest import shift_season
+
+VARS = ["DVS", "LAI", "WSO", "WLV", "TWRT", "SM", "NAVAIL", "PAVAIL", "TRA", "RD", "FIN",
+        "NNI", "TAGP", "WC", "SURFACE_N", "TOTN", "VERN", "RNuptake"]
+RTOL = 1e-6
+ATOL = 1e-9
+
+def assert_fields_close(expected, values, msg):
+    """Asserts that the values of the fields match those of the engines, where
+    None of an engine corresponds to NaN
+    """
+    expected = np.array([np.nan if v is None else v for v in expected], dtype=float)
+    np.testing.assert_allclose(values, expected, rtol=RTOL, atol=ATOL, err_msg=msg)
+
+def test_vector_engine_matches_engine(parameterprovider, weather, agromanagement, config):
+    agros = [shift_season(agromanagement, years, delay)
+             for years, delay in [(0, 0), (1, 5), (2, 12), (3, 0), (4, 30)]]
+    n = len(agros)
+    config = dict(config, OUTPUT_VARS=VARS, OUTPUT_ARRAY=True)
+    engines = [Wofost8Engine(parameterprovider, weather, copy.deepcopy(agro), config=config)
+               for agro in agros]
+    vec = Wofost8VectorEngine(parameterprovider, weather, copy.deepcopy(agros), config)
+    rng = np.random.default_rng(0)
+
+    t = 0
+    finished = np.zeros(n, dtype=bool)
+    while not vec.flag_terminate:
+        action, amount = rng.integers(0, 4, size=n), rng.uniform(0, 5, size=n)
+        for i, engine in enumerate(engines):
+            if engine.flag_terminate:
+                continue
+            if action[i] == 1:
+                engine._send_signal(signal=pcse.signals.irrigate, amount=amount[i], efficiency=0.7)
+            elif action[i] == 2:
+                engine._send_signal(signal=pcse.signals.apply_npk, N_amount=5 * amount[i],
+                                    N_recovery=0.7)
+            elif action[i] == 3:
+                engine._send_signal(signal=pcse.signals.apply_npk, P_amount=amount[i],
+                                    P_recovery=0.7)
+            engine.run(days=1)
+        vec.irrigate(np.where(action == 1, amount, np.nan), 0.7)
+        vec.apply_npk(N_amount=np.where(action == 2, 5 * amount, np.nan), N_recovery=0.7)
+        vec.apply_npk(P_amount=np.where(action == 3, amount, np.nan), P_recovery=0.7)
+        vec.run(days=1)
+        t += 1
+
+        assert [e.flag_terminate for e in engines] == vec.terminated.tolist()
+        _, output = vec.get_output_array()
+        for i, engine in enumerate(engines):
+            np.testing.assert_allclose(output[i], engine.get_output_array()[1], rtol=RTOL,
+                                       atol=ATOL, err_msg="output of field %i on day %i" % (i, t))
+        # The Engine removes the soil and site when it terminates, while the
+        # vector engine keeps the final states of terminated fields
+        running = ~vec.terminated
+        for varname in VARS:
+            assert_fields_close([e.get_variable(varname) for e, r in zip(engines, running) if r],
+                                vec.get_variable(varname)[running], "%s on day %i" % (varname, t))
+        finished |= vec.get_variable("FIN") == 1.
+    assert finished.all()
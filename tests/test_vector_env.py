@@ -0,0 +1,64 @@
+"""Tests for the vectorized WOFOST Gym environments
+
+Written by Will Solow, 2024
+"""
+import datetime as dt
+
+import numpy as np
+import pytest
+import gymnasium as gym
+
+import wofost_gym
+import wofost_gym.envs.wofost_base as wofost_base
+from wofost_gym.args import NPK_Args, WOFOST_Args, Agro_Args
+from wofost_gym.vector import NPKVectorEnv
+from utils import Args, get_gym_args
+
+from conftest import ROOT, SyntheticWeatherDataProvider
+
+N_ENVS = 2
+N_STEPS = 60
+
+@pytest.fixture
+def env_fn(monkeypatch):
+    """Returns a function that creates an environment with the given wrapper,
+    using synthetic weather instead of the NASA POWER weather
+    """
+    provider = SyntheticWeatherDataProvider(52, 5, dt.date(1983, 7, 1), dt.date(1987, 12, 31), seed=7)
+    monkeypatch.setattr(wofost_base, "provider_registry", lambda *args, **kwargs: provider)
+    args = Args(npk_args=NPK_Args(wf_args=WOFOST_Args(), ag_args=Agro_Args()), base_fpath=ROOT,
+                agro_fpath="env_config/agro_config/annual_agro_npk.yaml")
+    env_id, env_kwargs = get_gym_args(args)
+
+    def make(wrapper=None):
+        def thunk():
+            env = gym.make(env_id, **env_kwargs)
+            return env if wrapper is None else wrapper(env)
+        return thunk
+    return make
+
+def run(envs, actions):
+    """Steps a vector environment through the actions and returns the rewards
+    """
+    envs.reset(seed=0)
+    rewards = np.array([envs.step(action)[1] for action in actions])
+    envs.close()
+    return rewards
+
+@pytest.mark.parametrize("wrapper", [
+    None,
+    wofost_gym.wrappers.RewardFertilizationCostWrapper,
+    lambda env: wofost_gym.wrappers.RewardFertilizationThresholdWrapper(env, max_n=10, max_w=2),
+])
+def test_vector_env_rewards_match_sync_vector_env(env_fn, wrapper):
+    rng = np.random.default_rng(0)
+    num_actions = env_fn(wrapper)().action_space.n
+    actions = rng.integers(0, num_actions, size=(N_STEPS, N_ENVS))
+
+    rewards = run(gym.vector.SyncVectorEnv([env_fn(wrapper)] * N_ENVS), actions)
+    vector_rewards = run(NPKVectorEnv([env_fn(wrapper)] * N_ENVS), actions)
+    np.testing.assert_allclose(vector_rewards, rewards, rtol=1e-12)
+
+    if wrapper is not None:
+        default_rewards = run(gym.vector.SyncVectorEnv([env_fn()] * N_ENVS), actions)
+        assert not np.allclose(rewards, default_rewards)
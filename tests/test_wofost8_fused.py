@@ -0,0 +1,79 @@
+"""Tests for the fused implementation of the WOFOST 8.0 crop model
+
+Written by Will Solow, 2024
+"""
+import copy
+
+import numpy as np
+import pytest
+
+import pcse
+from pcse.engine import Wofost8Engine
+from pcse.crop.wofost8_fused import Wofost80Fused
+
+from conftest import shift_season
+
+RTOL = 1e-9
+ATOL = 1e-12
+
+def assert_close(a, b, msg):
+    """Asserts that two published values are equal, floats up to a tolerance
+    """
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        np.testing.assert_allclose(np.asarray(b, dtype=float), np.asarray(a, dtype=float),
+                                   rtol=RTOL, atol=ATOL, err_msg=msg)
+    elif isinstance(a, float) or isinstance(b, float):
+        assert b == pytest.approx(a, rel=RTOL, abs=ATOL, nan_ok=True), msg
+    else:
+        assert b == a, msg
+
+def compare_engines(day, engine, fused):
+    """Compares the published variables and the output of both engines
+    """
+    assert set(fused.kiosk.registered_states) == set(engine.kiosk.registered_states)
+    assert set(fused.kiosk.registered_rates) == set(engine.kiosk.registered_rates)
+    assert dict(fused.kiosk).keys() == dict(engine.kiosk).keys(), day
+    for varname, value in dict(engine.kiosk).items():
+        assert_close(value, fused.kiosk[varname], "%s on %s" % (varname, day))
+    for varname in engine.kiosk.registered_states:
+        assert_close(engine.get_variable(varname), fused.get_variable(varname),
+                     "get_variable(%s) on %s" % (varname, day))
+    for row, row_fused in zip(engine.get_output()[-1:], fused.get_output()[-1:]):
+        for varname, value in row.items():
+            assert_close(value, row_fused[varname], "output %s on %s" % (varname, day))
+
+@pytest.mark.parametrize("years, sowing_delay, seed", [(0, 0, 0), (1, 5, 1), (2, 12, 2), (3, 30, 3)])
+def test_fused_matches_object_model(parameterprovider, weather, agromanagement, config,
+                                    years, sowing_delay, seed):
+    agro = shift_season(agromanagement, years, sowing_delay)
+    engine = Wofost8Engine(parameterprovider, weather, copy.deepcopy(agro), config=config)
+    fused = Wofost8Engine(parameterprovider, weather, copy.deepcopy(agro),
+                          config=dict(config, CROP=Wofost80Fused))
+    rng = np.random.default_rng(seed)
+
+    compare_engines(0, engine, fused)
+    day = 0
+    max_dvs = 0.
+    while not engine.flag_terminate:
+        action, amount = rng.integers(0, 5), rng.uniform(0, 5)
+        for e in (engine, fused):
+            if action == 1:
+                e._send_signal(signal=pcse.signals.irrigate, amount=amount, efficiency=0.7)
+            elif action == 2:
+                e._send_signal(signal=pcse.signals.apply_npk, N_amount=5 * amount,
+                               N_recovery=0.7)
+            elif action == 3:
+                e._send_signal(signal=pcse.signals.apply_npk, P_amount=amount,
+                               K_amount=amount, P_recovery=0.7, K_recovery=0.7)
+            e.run(days=1)
+        day += 1
+        assert fused.flag_terminate == engine.flag_terminate
+        compare_engines(day, engine, fused)
+        max_dvs = max(max_dvs, engine.get_variable("DVS") or 0.)
+    assert max_dvs > 1.
+
+    summary, summary_fused = engine.get_summary_output(), fused.get_summary_output()
+    assert len(summary_fused) == len(summary) > 0
+    for row, row_fused in zip(summary, summary_fused):
+        for varname, value in row.items():
+            assert_close(value, row_fused[varname], "summary output %s" % varname)
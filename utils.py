@@ -16,6 +16,7 @@ from dataclasses import dataclass, field
 
 import wofost_gym.wrappers.wrappers as wrappers
 from wofost_gym.args import NPK_Args
+from wofost_gym.vector import NPKAsyncVectorEnv
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -77,6 +78,20 @@ def get_gym_args(args: Args):
     
     return args.env_id, env_kwargs
 
+def make_vector_env(env_fns: list, async_envs: bool=False):
+    """
+    Returns a vector environment of the given environment functions, a
+    SyncVectorEnv or a NPKAsyncVectorEnv that steps the environments in worker
+    processes with shared memory
+
+    Arguments:
+        env_fns: list of functions that create the environments
+        async_envs: step the environments in worker processes
+    """
+    if async_envs:
+        return NPKAsyncVectorEnv(env_fns)
+    return gym.vector.SyncVectorEnv(env_fns)
+
 def norm(x):
     """
     Take the norm ignoring nans
@@ -446,3 +446,15 @@ class NPK_Args:
 
     """Flag for resetting to random year"""
     random_reset: bool = False
+    """Flag for storing the crop and soil states/rates in one shared array 
+       (COMPILED_STATES in the model configuration)"""
+    compiled_states: bool = False
+    """Flag for reusing the crop objects of the crop engine when the same crop
+       is started again, e.g. after a reset (CROP_POOLING in the model configuration)"""
+    crop_pooling: bool = False
+    """Flag for simulating the WOFOST 8.0 crop with the fused implementation 
+       of all its components (Wofost80Fused) instead of Wofost80"""
+    fused_crop: bool = False
+    """Flag for passing the model output to the environment as pandas DataFrame
+       instead of a NumPy array. Slower, useful for debugging"""
+    output_dataframe: bool = False
@@ -4,6 +4,7 @@ from the NPK_Env Gym Environment"""
 import os
 import datetime
 from datetime import date
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 import yaml
@@ -15,7 +16,10 @@ from wofost_gym import utils
 
 import pcse
 from pcse.engine import Wofost8Engine
-from pcse import NASAPowerWeatherDataProvider
+from pcse.crop.wofost8 import Wofost80
+from pcse.crop.wofost8_fused import Wofost80Fused
+from pcse import provider_registry
+from pcse.nasapower import WeatherDataStore
 
 
 class NPK_Env(gym.Env):
@@ -34,6 +38,9 @@ class NPK_Env(gym.Env):
     WEATHER_YEARS = [1984, 2023]
     MISSING_YEARS = []
 
+    # Maximum number of pre-warmed engines kept for fast resets
+    MAX_CACHED_ENGINES = 64
+
     def __init__(self, args: NPK_Args, base_fpath: str, agro_fpath:str, \
                  site_fpath:str, crop_fpath: str, config:dict=None):
         """Initialize the :class:`NPK_Env`.
@@ -43,7 +50,6 @@ class NPK_Env(gym.Env):
             config: Agromanagement configuration dictionary
         """
         # Arguments
-        self.config=config
         self.seed(args.seed)
         self.args = args
         self.wofost_params = args.wf_args
@@ -58,6 +64,12 @@ class NPK_Env(gym.Env):
         # Get the weather and output variables
         self.weather_vars = args.weather_vars
         self.output_vars = args.output_vars
+        self.extra_output_vars = []
+        self.config = self._make_engine_config(config)
+
+        # Columns of the output variables in the output array of the model
+        self.output_index = {var: i for i, var in enumerate(self.get_required_output_vars())}
+        self.output_cols = [self.output_index[var] for var in self.output_vars]
 
         self.log = self._init_log()
         # Load all model parameters from .yaml files
@@ -77,7 +89,7 @@ class NPK_Env(gym.Env):
         self.max_site_duration = self.site_end_date - self.site_start_date
         self.max_crop_duration = self.crop_end_date - self.crop_start_date
 
-        self.weatherdataprovider = NASAPowerWeatherDataProvider(*self.location)
+        self.weatherdataprovider = provider_registry(*self.location)
         self.train_weather_data = self._get_train_weather_data()
 
         # Check that the configuration is valid
@@ -86,12 +98,17 @@ class NPK_Env(gym.Env):
         # Override parameters - must happen before initiaziing crop engine
         utils.set_params(self, self.wofost_params)
         
-        # Initialize crop engine
+        # Initialize crop engine and keep it for rewinding on reset
         self.model = Wofost8Engine(self.parameterprovider, self.weatherdataprovider,
                                          self.agromanagement, config=self.config)
+        self._engines = OrderedDict()
+        self._engines[(self.site_start_date, tuple(self.location))] = \
+            (self.model, self.model.snapshot())
         
         print('Successfully initialized WOFOST Engine. Ready to run simulation...')
         self.date = self.site_start_date
+        # Weather of the season, built on reset
+        self.season_weather = None
         
         # NPK/Irrigation action amounts
         self.num_fert = args.num_fert
@@ -113,6 +130,69 @@ class NPK_Env(gym.Env):
     def get_output_vars(self):
         """Return a list of the output vars"""
         return self.output_vars + self.weather_vars + ["DAYS"]
+
+    def get_required_output_vars(self):
+        """Return the list of model variables that the crop engine saves each 
+        day. These are the observed output variables, WSO and FIN for the reward
+        and truncation, and any variables declared by wrappers through 
+        require_output_vars()
+        """
+        required = []
+        for var in self.output_vars + ['WSO', 'FIN'] + self.extra_output_vars:
+            if var not in required:
+                required.append(var)
+        return required
+
+    def require_output_vars(self, output_vars: list):
+        """Declare additional model variables that need to be saved each day.
+        Used by wrappers that read variables from the model output which are
+        not part of the observation. Takes effect from the next simulated day
+
+        Args:
+            output_vars: list of model variable names
+        """
+        required = self.get_required_output_vars()
+        new_vars = [var for var in output_vars if var not in required]
+        if not new_vars:
+            return
+        self.extra_output_vars += new_vars
+        self.config = self._make_engine_config(self.config)
+        self.output_index = {var: i for i, var in enumerate(self.get_required_output_vars())}
+        self._set_output_vars(self.model)
+
+    def _make_engine_config(self, config: dict):
+        """Return a copy of the configuration passed to the crop engine where 
+        the output variables are limited to get_required_output_vars(). This 
+        avoids collecting all variables listed in the configuration every day
+        
+        Args:
+            config: Agromanagement configuration dictionary
+        """
+        if config is None:
+            return None
+        required = self.get_required_output_vars()
+        config = dict(config, OUTPUT_VARS=required, SUMMARY_OUTPUT_VARS=required, \
+                      TERMINAL_OUTPUT_VARS=required)
+        if self.args.compiled_states:
+            config['COMPILED_STATES'] = True
+        if self.args.crop_pooling:
+            config['CROP_POOLING'] = True
+        if self.args.fused_crop and config.get('CROP') is Wofost80:
+            config['CROP'] = Wofost80Fused
+        if not self.args.output_dataframe:
+            config['OUTPUT_ARRAY'] = True
+        return config
+
+    def _set_output_vars(self, model: Wofost8Engine):
+        """Update the output variables of a crop engine if they differ from
+        those in the configuration of the environment
+
+        Args:
+            model: crop engine
+        """
+        required = self.config['OUTPUT_VARS']
+        if list(model.mconf.OUTPUT_VARS) != required:
+            model.set_output_variables(required, required, required)
     
     def seed(self, seed: int=None):
         """Set the seed for the environment using Gym seeding.
@@ -177,15 +257,9 @@ class NPK_Env(gym.Env):
         self.agromanagement['SiteCalendar']['site_start_date'] = self.site_start_date
         self.agromanagement['SiteCalendar']['site_end_date'] = self.site_end_date
     
-        # Reset weather 
-        self.weatherdataprovider = NASAPowerWeatherDataProvider(*self.location)
-
-        # Override parameters
-        utils.set_params(self, self.wofost_params)
-
         # Reset model
-        self.model = Wofost8Engine(self.parameterprovider, self.weatherdataprovider,
-                                         self.agromanagement, config=self.config)
+        self.model = self._get_engine()
+        self.season_weather = self._get_season_weather()
         
         # Generate initial output
         output = self._run_simulation()
@@ -214,12 +288,43 @@ class NPK_Env(gym.Env):
         # Terminate based on site end date
         terminate = self.date >= self.site_end_date
         # Truncate based on crop finishing
-        truncation = output.iloc[-1]['FIN'] == 1.0
+        truncation = self._get_output_var(output, 'FIN') == 1.0
 
-        self._log(output.iloc[-1]['WSO'], act_tuple, reward)
+        self._log(self._get_output_var(output, 'WSO'), act_tuple, reward)
 
         return observation, reward, terminate, truncation, self.log
     
+    def _get_engine(self):
+        """Return a crop engine at its initial state for the current site start
+        date and location. 
+
+        Engines are kept together with a snapshot of their initial state, so that
+        resetting to a year and location seen before only rewinds the engine 
+        instead of rebuilding it.
+        """
+        key = (self.site_start_date, tuple(self.location))
+        if key in self._engines:
+            self._engines.move_to_end(key)
+            model, snapshot = self._engines[key]
+            model.restore(snapshot)
+            # Restoring the snapshot also restores the engine configuration
+            self._set_output_vars(model)
+            self.weatherdataprovider = model.weatherdataprovider
+            return model
+
+        # Weather providers are shared across envs through the registry
+        self.weatherdataprovider = provider_registry(*self.location)
+
+        # Override parameters
+        utils.set_params(self, self.wofost_params)
+
+        model = Wofost8Engine(self.parameterprovider, self.weatherdataprovider,
+                                         self.agromanagement, config=self.config)
+        self._engines[key] = (model, model.snapshot())
+        if len(self._engines) > self.MAX_CACHED_ENGINES:
+            self._engines.popitem(last=False)
+        return model
+
     def _validate(self):
         """Validate that the configuration is correct """
         if self.config is None:
@@ -313,23 +418,65 @@ class NPK_Env(gym.Env):
         Handles weather forecasting by adding some amount of pre-specified Gaussian
         noise to the forecast. Increasing in strength as the forecast horizon
         increases.
+
+        The weather is sliced from the season weather built on reset, days
+        outside of the season or without weather data are read one by one.
         
         Args:
             date: datetime - day to start collecting the weather information
         """
-        weather_vars = []
+        if self.season_weather is None:
+            self.season_weather = self._get_season_weather()
         noise_scale = np.linspace(start=self.forecast_noise[0], \
                                   stop=self.forecast_noise[1], num=self.forecast_length)
-        
-        # For every day in the forecasting window
-        for i in range(0, self.forecast_length):
-            weather = self._get_weather_day(date + datetime.timedelta(i) )
 
-            # Add random noise to weather prediction
-            weather += np.random.normal(size=len(weather)) * weather * noise_scale[i] 
-            weather_vars.append(weather)
+        index = (date - self.site_start_date).days
+        weather = self.season_weather[max(index, 0):index+self.forecast_length]
+        if index < 0 or len(weather) < self.forecast_length or np.isnan(weather).any():
+            weather = np.array([self._get_weather_day(date + datetime.timedelta(i)) \
+                                for i in range(0, self.forecast_length)])
 
-        return np.array(weather_vars)
+        # Add random noise to weather prediction, one draw for the whole window
+        return weather + np.random.normal(size=weather.shape) * weather * noise_scale[:, None]
+
+    def _get_season_weather(self):
+        """Get the weather from the site start date up to the end of the forecast
+        window of the site end date as a (days, len(weather_vars)) array. The 
+        years are cycled through the training weather years as in _get_weather_day(),
+        days without weather data are NaN.
+        """
+        ndays = (self.site_end_date - self.site_start_date).days + self.forecast_length
+        site_start_ind = np.argwhere(self.train_weather_data == self.site_start_date.year).flatten()[0]
+
+        days = []
+        for i in range(ndays):
+            day = self.site_start_date + datetime.timedelta(i)
+            weather_year_ind = (site_start_ind+day.year-self.site_start_date.year) % len(self.train_weather_data)
+            try:
+                days.append(day.replace(year=int(self.train_weather_data[weather_year_ind])))
+            except ValueError:
+                # February 29th in a year that is not a leap year
+                days.append(None)
+
+        weather = np.full((ndays, len(self.weather_vars)), np.nan)
+        store = getattr(self.weatherdataprovider, "store", None)
+        if isinstance(store, WeatherDataStore):
+            valid = np.array([day is not None for day in days], dtype=bool)
+            index = np.array([day.toordinal() if day is not None else 0 for day in days]) - store._first_ordinal
+            valid &= (index >= 0) & (index < len(store.present))
+            valid[valid] = store.present[index[valid]]
+            for j, var in enumerate(self.weather_vars):
+                if var in store.columns:
+                    weather[valid, j] = store.columns[var][index[valid]]
+            return weather
+
+        for i, day in enumerate(days):
+            try:
+                weatherdatacontainer = self.weatherdataprovider(day)
+                weather[i] = [getattr(weatherdatacontainer, attr, np.nan) for attr in self.weather_vars]
+            except Exception:
+                continue
+        return weather
 
     def _get_weather_day(self, date: date):
         """Get the weather for a specific date based on the desired weather
@@ -346,13 +493,34 @@ class NPK_Env(gym.Env):
 
         return [getattr(weatherdatacontainer, attr) for attr in self.weather_vars]
     
-    def _process_output(self, output: dict):
+    def _get_output_var(self, output, varname: str):
+        """Return the value of a model variable on the last day of output
+
+        Args:
+            output: model output from _run_simulation()
+            varname: name of a variable in get_required_output_vars()
+        """
+        if isinstance(output, pd.DataFrame):
+            return output.iloc[-1][varname]
+        return output[self.output_index[varname]]
+
+    def _process_output(self, output, out: np.ndarray=None):
         """Process the output from the model into the observation required by
         the current environment
         
         Args:
-            output: dictionary of model output variables
+            output: model output from _run_simulation()
+            out: optional float64 array of the observation shape in which the
+                 observation is written, e.g. a row of a vector environment
         """
+        if not isinstance(output, pd.DataFrame):
+            # Output array already holds floats with dates as YYYYMMDD
+            crop_observation = output[self.output_cols]
+            self.date = self.model.get_output_array()[0]
+            weather_observation = self._get_weather(self.date)
+            days_elapsed = self.date - self.site_start_date
+
+            return np.concatenate([crop_observation, weather_observation.flatten(), [days_elapsed.days]], out=out)
 
         # Current day crop observation
         crop_observation = np.array(output.iloc[-1][self.output_vars])
@@ -369,12 +537,22 @@ class NPK_Env(gym.Env):
         for i in range(len(observation)):
             if isinstance(observation[i], datetime.date):
                 observation[i] = int(observation[i].strftime('%Y%m%d'))
+        if out is not None:
+            out[:] = observation
+            return out
         return observation.astype('float64')
 
     def _run_simulation(self):
-        """Run the WOFOST model for the specified number of days
+        """Run the WOFOST model for the specified number of days. Returns the
+        output array of the model with the variables in get_required_output_vars(),
+        or a DataFrame of the model output if args.output_dataframe is set
         """
-        self.model.run(days=self.intervention_interval)
+        # Only the output of the last day is used, so the days before are
+        # run without saving the output
+        self.model.run(days=self.intervention_interval, fast_forward=True)
+        if not self.args.output_dataframe:
+            return self.model.get_output_array()[1]
+
         output = pd.DataFrame(self.model.get_output()).set_index("day")
 
         # Fill missing values with nans - arises when crop has not been
@@ -394,7 +572,7 @@ class NPK_Env(gym.Env):
         msg = "\'Take Action\' method not yet implemented on %s" % self.__class__.__name__
         raise NotImplementedError(msg)
 
-    def _get_reward(self, output: dict, act_tuple: tuple):
+    def _get_reward(self, output, act_tuple: tuple):
         """Convert the reward by applying a high penalty if a fertilization
         threshold is crossed
         
@@ -402,7 +580,7 @@ class NPK_Env(gym.Env):
             output     - of the simulator
             act_tuple  - amount of NPK/Water applied
         """
-        return np.nan_to_num(output.iloc[-1]['WSO'])
+        return np.nan_to_num(self._get_output_var(output, 'WSO'))
         
     def _init_log(self):
         """Initialize the log.
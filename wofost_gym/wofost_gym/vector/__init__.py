@@ -0,0 +1,2 @@
+from wofost_gym.vector.vector_env import NPKVectorEnv
+from wofost_gym.vector.async_vector_env import NPKAsyncVectorEnv
@@ -0,0 +1,322 @@
+"""Vectorized WOFOST Gym environment that steps the environments in worker
+processes and exchanges the step results through shared memory."""
+
+import os
+import sys
+import traceback
+import multiprocessing as mp
+import numpy as np
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import CloudpickleWrapper, create_shared_memory, read_from_shared_memory
+
+from wofost_gym.vector.vector_env import NPKVectorEnv, validate_env
+from wofost_gym import exceptions as exc
+
+
+def _split_infos(infos: dict, num_envs: int):
+    """Split the infos of a vector environment into a list of (index, info)
+    pairs for the environments that have an info
+
+    Args:
+        infos: infos as returned by a vector environment
+        num_envs: number of environments of the vector environment
+    """
+    split = []
+    for i in range(num_envs):
+        info = {key: value[i] for key, value in infos.items()
+                if not key.startswith("_") and infos[f"_{key}"][i]}
+        if info:
+            split.append((i, info))
+    return split
+
+def _worker(env_fns: CloudpickleWrapper, start: int, stop: int, pipe, parent_pipe,
+            obs_buffer, buffers: dict, observation_space, num_envs: int, seed: int):
+    """Worker process that steps the environments [start, stop) of the vector
+    environment with an NPKVectorEnv. Observations, rewards, terminations and
+    truncations are written into the shared buffers, only the infos of
+    environments that were reset are sent through the pipe.
+
+    Args:
+        env_fns: wrapped list of functions that create the environments
+        start: index of the first environment of this worker
+        stop: index after the last environment of this worker
+        pipe: pipe of this worker
+        parent_pipe: pipe of the main process, closed in the worker
+        obs_buffer: shared memory for the observations of all environments
+        buffers: dict with the shared memory for the actions, rewards,
+                 terminations and truncations of all environments
+        observation_space: observation space of a single environment
+        num_envs: number of environments of the vector environment
+        seed: seed of the global np.random generator of this worker
+    """
+    parent_pipe.close()
+    observations = read_from_shared_memory(observation_space, obs_buffer, n=num_envs)[start:stop]
+    actions, rewards, terminateds, truncateds = [np.frombuffer(buffers[key], dtype=dtype)[start:stop]
+        for key, dtype in (("actions", np.int64), ("rewards", np.float64),
+                           ("terminateds", np.bool_), ("truncateds", np.bool_))]
+    envs = None
+    try:
+        # The environments stay alive for the lifetime of the worker, so
+        # cached engines and weather providers are reused across episodes
+        envs = NPKVectorEnv(env_fns.fn, copy=False)
+        # Every environment seeds the global generator with the same seed when
+        # it is created, reseed it so that the workers draw different noise
+        np.random.seed(seed)
+        while True:
+            command, data = pipe.recv()
+            if command == "step":
+                obs, rew, term, trunc, infos = envs.step(actions)
+                observations[:] = obs
+                rewards[:] = rew
+                terminateds[:] = term
+                truncateds[:] = trunc
+                pipe.send((_split_infos(infos, stop-start), True))
+            elif command == "reset":
+                seed, options = data
+                obs, _ = envs.reset(seed=seed, options=options)
+                observations[:] = obs
+                pipe.send((None, True))
+            elif command == "call":
+                name, args, kwargs = data
+                pipe.send((envs.call(name, *args, **kwargs), True))
+            elif command == "set_attr":
+                name, values = data
+                envs.set_attr(name, values)
+                pipe.send((None, True))
+            elif command == "close":
+                pipe.send((None, True))
+                break
+            else:
+                msg = f"Received unknown command `{command}` in worker"
+                raise exc.WOFOSTGymError(msg)
+    except (KeyboardInterrupt, Exception):
+        pipe.send(("".join(traceback.format_exception(*sys.exc_info())), False))
+    finally:
+        if envs is not None:
+            envs.close()
+
+
+class NPKAsyncVectorEnv(VectorEnv):
+    """Vectorized environment that steps N WOFOST Gym environments in worker
+    processes.
+
+    Every worker holds an NPKVectorEnv with a contiguous block of the
+    environments, so the environments and their cached engines stay warm
+    for the lifetime of the worker. The actions, observations, rewards and
+    termination and truncation flags of all environments are stored in
+    shared memory arrays: a step only sends a command through the pipe of
+    every worker and the workers write their results directly into the
+    shared arrays. The only data that is pickled is the info of environments
+    that finished an episode.
+
+    Workers that are forked (the default on Linux) inherit the weather
+    providers loaded by the main process. Weather cache files are memory
+    mapped, so all workers read the same pages from the OS page cache.
+
+    Wrappers are handled as in the NPKVectorEnv: the reward of an
+    environment is given by its reward wrapper and wrappers that are not
+    supported raise a WOFOSTGymError when the vector environment is created.
+    They should be applied to the vector environment instead.
+
+    The forecast noise of the environments is drawn from the global
+    np.random generator of the process that steps them. Every worker draws
+    the noise of its block of environments in turn from its own generator,
+    which is seeded with the seed of the environments plus the index of its
+    first environment, so the workers draw independent noise. The noise of
+    an environment depends on the number of workers and differs from the
+    noise in an NPKVectorEnv, runs are only reproducible for the same
+    num_workers.
+    """
+
+    def __init__(self, env_fns: list, num_workers: int=None, copy: bool=True,
+                 context: str=None, daemon: bool=True):
+        """Initialize the :class:`NPKAsyncVectorEnv`.
+
+        Args:
+            env_fns: list of functions that create the environments
+            num_workers: number of worker processes, defaults to the number of
+                         CPUs, at most one per environment
+            copy: return a copy of the observations, otherwise the returned array
+                  is the shared memory that is overwritten by the next step
+            context: multiprocessing start method, defaults to the platform default
+            daemon: run the workers as daemon processes
+        """
+        ctx = mp.get_context(context)
+        self.env_fns = env_fns
+        self.copy = copy
+
+        dummy_env = env_fns[0]()
+        validate_env(dummy_env)
+        seed = dummy_env.unwrapped.args.seed
+        self.metadata = dummy_env.metadata
+        observation_space, action_space = dummy_env.observation_space, dummy_env.action_space
+        dummy_env.close()
+        del dummy_env
+        super().__init__(num_envs=len(env_fns), observation_space=observation_space,
+                         action_space=action_space)
+
+        obs_buffer = create_shared_memory(self.single_observation_space, n=self.num_envs, ctx=ctx)
+        self.observations = read_from_shared_memory(self.single_observation_space, obs_buffer,
+                                                    n=self.num_envs)
+        buffers = {"actions": ctx.Array("q", self.num_envs, lock=False),
+                   "rewards": ctx.Array("d", self.num_envs, lock=False),
+                   "terminateds": ctx.Array("b", self.num_envs, lock=False),
+                   "truncateds": ctx.Array("b", self.num_envs, lock=False)}
+        self._actions = np.frombuffer(buffers["actions"], dtype=np.int64)
+        self._rewards = np.frombuffer(buffers["rewards"], dtype=np.float64)
+        self._terminateds = np.frombuffer(buffers["terminateds"], dtype=np.bool_)
+        self._truncateds = np.frombuffer(buffers["truncateds"], dtype=np.bool_)
+
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, self.num_envs))
+        bounds = np.linspace(0, self.num_envs, num_workers+1).astype(int)
+        self._slices = [slice(bounds[i], bounds[i+1]) for i in range(num_workers)]
+
+        self.parent_pipes, self.processes = [], []
+        for sl in self._slices:
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(target=_worker, name=f"Worker<{type(self).__name__}>-{sl.start}",
+                                  args=(CloudpickleWrapper(env_fns[sl]), sl.start, sl.stop, child_pipe,
+                                        parent_pipe, obs_buffer, buffers, self.single_observation_space,
+                                        self.num_envs, None if seed is None else seed + sl.start))
+            self.parent_pipes.append(parent_pipe)
+            self.processes.append(process)
+            process.daemon = daemon
+            process.start()
+            child_pipe.close()
+        self._waiting = None
+
+    def _send(self, command: str, data: list=None):
+        """Send a command to all workers
+
+        Args:
+            command: name of the command
+            data: list with the data for every worker, or None
+        """
+        self._assert_is_running()
+        if self._waiting is not None:
+            msg = f"Calling `{command}` while waiting for a pending call to `{self._waiting}` to complete"
+            raise exc.WOFOSTGymError(msg)
+        for i, pipe in enumerate(self.parent_pipes):
+            pipe.send((command, None if data is None else data[i]))
+        self._waiting = command
+
+    def _receive(self):
+        """Receive the results of the last command from all workers
+        """
+        results = [pipe.recv() for pipe in self.parent_pipes]
+        self._waiting = None
+        errors = [(i, result) for i, (result, success) in enumerate(results) if not success]
+        if errors:
+            i, tb = errors[0]
+            self.close(terminate=True)
+            msg = f"Worker {i} of the vector environment failed:\n{tb}"
+            raise exc.WOFOSTGymError(msg)
+        return [result for result, _ in results]
+
+    def reset_async(self, seed: int=None, options: dict=None):
+        """Send the reset command to all workers
+
+        Args:
+            seed: int or list of seeds passed to the reset of the environments
+            options: passed to the reset of the environments
+        """
+        if seed is None:
+            seed = [None for _ in range(self.num_envs)]
+        if isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        self._send("reset", [(seed[sl], options) for sl in self._slices])
+
+    def reset_wait(self, seed: int=None, options: dict=None):
+        """Wait for the reset of all environments
+        """
+        self._receive()
+        return (self.observations.copy() if self.copy else self.observations), {}
+
+    def step_async(self, actions):
+        """Write the actions of all environments into shared memory and send
+        the step command to all workers
+
+        Args:
+            actions: array of N integer actions
+        """
+        self._actions[:] = np.asarray(actions).reshape(self.num_envs)
+        self._send("step")
+
+    def step_wait(self):
+        """Wait for the workers to step all environments
+        """
+        infos = {}
+        for sl, split in zip(self._slices, self._receive()):
+            for i, info in split:
+                infos = self._add_info(infos, info, sl.start + i)
+        return (self.observations.copy() if self.copy else self.observations, np.copy(self._rewards),
+                np.copy(self._terminateds), np.copy(self._truncateds), infos)
+
+    def call(self, name: str, *args, **kwargs):
+        """Call a method or get an attribute of all environments
+
+        Args:
+            name: name of the method or attribute
+        """
+        self._send("call", [(name, args, kwargs) for _ in self._slices])
+        return tuple(result for results in self._receive() for result in results)
+
+    def get_attr(self, name: str):
+        """Get an attribute of all environments
+
+        Args:
+            name: name of the attribute
+        """
+        return self.call(name)
+
+    def set_attr(self, name: str, values):
+        """Set an attribute of all environments
+
+        Args:
+            name: name of the attribute
+            values: list of values, or a single value for all environments
+        """
+        if not isinstance(values, (list, tuple)):
+            values = [values for _ in range(self.num_envs)]
+        if len(values) != self.num_envs:
+            msg = f"Values must be a list of length {self.num_envs}, got {len(values)}"
+            raise exc.WOFOSTGymError(msg)
+        self._send("set_attr", [(name, list(values[sl])) for sl in self._slices])
+        self._receive()
+
+    def close_extras(self, timeout: float=None, terminate: bool=False):
+        """Close the workers
+
+        Args:
+            timeout: seconds to wait for a pending call and for the workers to exit
+            terminate: terminate the workers without closing the environments
+        """
+        if not terminate:
+            try:
+                if self._waiting is not None:
+                    for pipe in self.parent_pipes:
+                        if pipe.poll(timeout):
+                            pipe.recv()
+                    self._waiting = None
+                for pipe in self.parent_pipes:
+                    pipe.send(("close", None))
+                for pipe in self.parent_pipes:
+                    if pipe.poll(timeout):
+                        pipe.recv()
+            except (EOFError, BrokenPipeError, ConnectionResetError):
+                terminate = True
+        for process in self.processes:
+            if terminate and process.is_alive():
+                process.terminate()
+        for pipe in self.parent_pipes:
+            pipe.close()
+        for process in self.processes:
+            process.join(timeout)
+
+    def _assert_is_running(self):
+        if self.closed:
+            msg = f"Trying to operate on `{type(self).__name__}`, after a call to `close()`."
+            raise exc.WOFOSTGymError(msg)
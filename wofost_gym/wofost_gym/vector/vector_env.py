@@ -0,0 +1,228 @@
+"""Vectorized WOFOST Gym environment that steps many environments in a single
+call in the same process."""
+
+import time
+import numpy as np
+import gymnasium as gym
+from gymnasium.vector import VectorEnv
+
+from wofost_gym.envs.wofost_base import NPK_Env
+from wofost_gym.wrappers.wrappers import RewardWrapper
+from wofost_gym import exceptions as exc
+
+
+def get_reward_fn(env: gym.Env):
+    """Return the reward function of an environment. This is the _get_reward()
+    method of the outermost RewardWrapper, or of the environment itself
+
+    Args:
+        env: The (wrapped) environment
+    """
+    while isinstance(env, gym.Wrapper):
+        if isinstance(env, RewardWrapper):
+            return env._get_reward
+        env = env.env
+    return env._get_reward
+
+# Wrappers whose effect the vector environment reproduces (reward wrappers and
+# the episode statistics) or that only check the use of the environment
+SUPPORTED_WRAPPERS = (RewardWrapper, gym.wrappers.RecordEpisodeStatistics,
+                      gym.wrappers.OrderEnforcing, gym.wrappers.PassiveEnvChecker)
+
+def validate_env(env: gym.Env):
+    """Validate that an environment can be stepped directly by a vector
+    environment. The vector environment steps the unwrapped environment, so
+    only the wrappers in SUPPORTED_WRAPPERS are allowed. Any other wrapper
+    would be skipped and should be applied to the vector environment instead.
+
+    Args:
+        env: The (wrapped) environment
+    """
+    if not isinstance(env.unwrapped, NPK_Env):
+        msg = f"Vector environment requires NPK_Env environments, got {type(env.unwrapped)}"
+        raise exc.WOFOSTGymError(msg)
+    while isinstance(env, gym.Wrapper):
+        if not isinstance(env, SUPPORTED_WRAPPERS):
+            msg = f"Cannot use an environment wrapped in {type(env).__name__} in a vector environment. " \
+                  f"Only reward wrappers, RecordEpisodeStatistics, OrderEnforcing and PassiveEnvChecker " \
+                  f"are supported. Wrap the vector environment instead."
+            raise exc.WOFOSTGymError(msg)
+        env = env.env
+
+
+class NPKVectorEnv(VectorEnv):
+    """Vectorized environment that steps N WOFOST Gym environments in one call.
+
+    Unlike gym.vector.SyncVectorEnv, which steps every environment through its
+    full wrapper stack, the NPKVectorEnv holds the unwrapped NPK_Env environments
+    and works in phases: the actions of all environments are sent to their crop
+    engines, then all engines are advanced and finally the observations are
+    written into one preallocated (N, obs_dim) float64 array, which is cast to
+    the dtype of the observation space once per step.
+
+    The reward of an environment is given by its reward wrapper if it has one
+    and the episode statistics are recorded by the vector environment itself.
+    Other wrappers than those in SUPPORTED_WRAPPERS raise a WOFOSTGymError and
+    should be applied to the vector environment instead (e.g.
+    gym.wrappers.NormalizeReward).
+
+    Environments that terminate or truncate are reset immediately. As the
+    environments keep their engines and weather providers cached, this is a
+    rewind of an engine for years and locations seen before. The infos only
+    hold "final_observation" and "final_info" for environments that were reset,
+    where "final_info" is the log of the environment with the episode statistics
+    under "episode" as given by gym.wrappers.RecordEpisodeStatistics
+    """
+
+    def __init__(self, env_fns: list, copy: bool=True):
+        """Initialize the :class:`NPKVectorEnv`.
+
+        Args:
+            env_fns: list of functions that create the environments
+            copy: return a copy of the observations, otherwise the returned array
+                  is overwritten by the next step
+        """
+        self.env_fns = env_fns
+        wrapped_envs = [env_fn() for env_fn in env_fns]
+        for env in wrapped_envs:
+            validate_env(env)
+        self.envs = [env.unwrapped for env in wrapped_envs]
+        self.reward_fns = [get_reward_fn(env) for env in wrapped_envs]
+        self.copy = copy
+        self.metadata = self.envs[0].metadata
+
+        super().__init__(num_envs=len(self.envs),
+                         observation_space=self.envs[0].observation_space,
+                         action_space=self.envs[0].action_space)
+        for env in self.envs:
+            if env.observation_space != self.single_observation_space or \
+                env.action_space != self.single_action_space:
+                msg = "All environments of a vector environment must have the same observation and action space"
+                raise exc.WOFOSTGymError(msg)
+
+        self._observations = np.zeros((self.num_envs,)+self.single_observation_space.shape, dtype=np.float64)
+        self.observations = np.zeros(self._observations.shape, dtype=self.single_observation_space.dtype)
+        self._rewards = np.zeros((self.num_envs,), dtype=np.float64)
+        self._terminateds = np.zeros((self.num_envs,), dtype=np.bool_)
+        self._truncateds = np.zeros((self.num_envs,), dtype=np.bool_)
+        self._actions = None
+
+        # Episode statistics
+        self._episode_returns = np.zeros((self.num_envs,), dtype=np.float64)
+        self._episode_lengths = np.zeros((self.num_envs,), dtype=np.int64)
+        self._episode_starts = np.zeros((self.num_envs,), dtype=np.float64)
+
+    def reset_wait(self, seed: int=None, options: dict=None):
+        """Reset all environments
+
+        Args:
+            seed: int or list of seeds passed to the reset of the environments
+            options: passed to the reset of the environments
+        """
+        if seed is None:
+            seed = [None for _ in range(self.num_envs)]
+        if isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+
+        self._terminateds[:] = False
+        self._truncateds[:] = False
+        for i, env in enumerate(self.envs):
+            kwargs = {}
+            if seed[i] is not None:
+                kwargs['seed'] = seed[i]
+            if options is not None:
+                kwargs['options'] = options
+            self._reset_env(i, **kwargs)
+
+        self.observations[:] = self._observations
+        return (self.observations.copy() if self.copy else self.observations), {}
+
+    def step_async(self, actions):
+        """Set the actions for all environments
+
+        Args:
+            actions: array of N integer actions
+        """
+        self._actions = np.asarray(actions)
+
+    def step_wait(self):
+        """Step all environments with the actions set by step_async()
+        """
+        # Send the actions to all engines first
+        act_tuples = [env._take_action(int(action)) for env, action in zip(self.envs, self._actions)]
+        # Advance all engines
+        outputs = [env._run_simulation() for env in self.envs]
+
+        infos = {}
+        for i, env in enumerate(self.envs):
+            output = outputs[i]
+            env._process_output(output, out=self._observations[i])
+            reward = self.reward_fns[i](output, act_tuples[i])
+
+            self._rewards[i] = reward
+            self._terminateds[i] = env.date >= env.site_end_date
+            self._truncateds[i] = env._get_output_var(output, 'FIN') == 1.0
+            env._log(env._get_output_var(output, 'WSO'), act_tuples[i], reward)
+
+            self._episode_returns[i] += reward
+            self._episode_lengths[i] += 1
+            if self._terminateds[i] or self._truncateds[i]:
+                final_info = env.log
+                final_info['episode'] = {'r': self._episode_returns[i], 'l': self._episode_lengths[i],
+                        't': np.round(time.perf_counter() - self._episode_starts[i], 6)}
+                info = {'final_observation': self._observations[i].copy(), 'final_info': final_info}
+                self._reset_env(i)
+                infos = self._add_info(infos, info, i)
+
+        self.observations[:] = self._observations
+        return (self.observations.copy() if self.copy else self.observations, np.copy(self._rewards),
+                np.copy(self._terminateds), np.copy(self._truncateds), infos)
+
+    def _reset_env(self, i: int, **kwargs):
+        """Reset an environment and write its observation into the observations
+
+        Args:
+            i: index of the environment
+        """
+        self._observations[i] = self.envs[i].reset(**kwargs)[0]
+        self._episode_returns[i] = 0
+        self._episode_lengths[i] = 0
+        self._episode_starts[i] = time.perf_counter()
+
+    def call(self, name: str, *args, **kwargs):
+        """Call a method or get an attribute of all environments
+
+        Args:
+            name: name of the method or attribute
+        """
+        results = []
+        for env in self.envs:
+            function = getattr(env, name)
+            results.append(function(*args, **kwargs) if callable(function) else function)
+        return tuple(results)
+
+    def get_attr(self, name: str):
+        """Get an attribute of all environments
+
+        Args:
+            name: name of the attribute
+        """
+        return self.call(name)
+
+    def set_attr(self, name: str, values):
+        """Set an attribute of all environments
+
+        Args:
+            name: name of the attribute
+            values: list of values, or a single value for all environments
+        """
+        if not isinstance(values, (list, tuple)):
+            values = [values for _ in range(self.num_envs)]
+        for env, value in zip(self.envs, values):
+            setattr(env, name, value)
+
+    def close_extras(self, **kwargs):
+        """Close all environments"""
+        for env in self.envs:
+            env.close()
@@ -364,7 +364,11 @@ class RewardWrapper(gym.Wrapper):
     observation or action wrappers. 
     
     This _validate() function ensures that is the case and will throw and error
-    otherwise 
+    otherwise
+
+    The step() function steps the unwrapped environment and replaces its reward
+    with the _get_reward() function of the wrapper, which is also the reward
+    used by the vector environments
     """
     def __init__(self, env: gym.Env):
         """Initialize the :class:`RewardWrapper` wrapper with an environment.
@@ -400,6 +404,32 @@ class RewardWrapper(gym.Wrapper):
                 year: year to reset enviroment to for weather
                 location: (latitude, longitude). Location to set environment to"""
        return self.env.reset(**kwargs)
+
+    def step(self, action):
+        """Run one timestep of the environment's dynamics.
+
+        Sends action to the WOFOST model and recieves the resulting observation
+        which is then processed to the _get_reward() function and _process_output()
+        function for a reward and observation
+
+        Args:
+            action: integer
+        """
+        # Send action signal to model and run model
+        act_tuple = self.env.unwrapped._take_action(action)
+        output = self.env.unwrapped._run_simulation()
+
+        observation = self.env.unwrapped._process_output(output)
+        
+        reward = self._get_reward(output, act_tuple) 
+        
+        # Terminate based on site end date
+        terminate = self.env.unwrapped.date >= self.env.unwrapped.site_end_date
+        # Truncate based on crop finishing
+        truncation = self.env.unwrapped._get_output_var(output, 'FIN') == 1.0
+
+        self.env.unwrapped._log(self.env.unwrapped._get_output_var(output, 'WSO'), act_tuple, reward)
+        return observation, reward, terminate, truncation, self.env.unwrapped.log
  
 class RewardFertilizationCostWrapper(RewardWrapper):
     """ Modifies the reward to be a function of how much fertilization and irrigation
@@ -416,17 +446,18 @@ class RewardFertilizationCostWrapper(RewardWrapper):
         self.env = env
         self.cost = cost
     
-    def _get_reward(self, output: dict, act_tuple:tuple):
+    def _get_reward(self, output, act_tuple:tuple):
         """Gets the reward as a penalty based on the amount of NPK/Water applied
         
         Args:
-            output: dict     - output from model
+            output           - output from model
             act_tuple: tuple -  NPK/Water amounts"""
+        wso = self.env.unwrapped._get_output_var(output, 'WSO')
         if self.env.unwrapped.NUM_ACT == 6:
-            reward = output.iloc[-1]['WSO'] - \
+            reward = wso - \
                             (np.sum(10 * np.array([act_tuple])))
         elif self.env.unwrapped.NUM_ACT == 4: 
-            reward = output.iloc[-1]['WSO'] - \
+            reward = wso - \
                             (np.sum(10 * np.array([act_tuple[2:]])))
         return reward
          
@@ -453,32 +484,9 @@ class RewardFertilizationThresholdWrapper(RewardWrapper):
         self.max_k = max_k
         self.max_w = max_w
 
-    def step(self, action):
-        """Run one timestep of the environment's dynamics.
-
-        Sends action to the WOFOST model and recieves the resulting observation
-        which is then processed to the _get_reward() function and _process_output()
-        function for a reward and observation
-
-        Args:
-            action: integer
-        """
-        # Send action signal to model and run model
-        act_tuple = self.env.unwrapped._take_action(action)
-        output = self.env.unwrapped._run_simulation()
-
-        observation = self.env.unwrapped._process_output(output)
-        
-        reward = self._get_reward(output, act_tuple) 
-        
-        # Terminate based on site end date
-        terminate = self.env.unwrapped.date >= self.env.unwrapped.site_end_date
-        # Truncate based on crop finishing
-        truncation = output.iloc[-1]['FIN'] == 1.0
+        # Totals of applied NPK/Water are needed for the reward
+        self.env.unwrapped.require_output_vars(['TOTN', 'TOTP', 'TOTK', 'TOTIRRIG'])
 
-        self.env.unwrapped._log(output.iloc[-1]['WSO'], act_tuple, reward)
-        return observation, reward, terminate, truncation, self.env.unwrapped.log
-    
     def _get_reward(self, output, act_tuple):
         """Convert the reward by applying a high penalty if a fertilization
         threshold is crossed
@@ -487,14 +495,15 @@ class RewardFertilizationThresholdWrapper(RewardWrapper):
             output     - of the simulator
             act_tuple  - amount of NPK/Water applied
         """
-        if output.iloc[-1]['TOTN'] > self.max_n and act_tuple[self.env.unwrapped.N] > 0:
+        get_output_var = self.env.unwrapped._get_output_var
+        if get_output_var(output, 'TOTN') > self.max_n and act_tuple[self.env.unwrapped.N] > 0:
             return -1e4 * act_tuple[self.env.unwrapped.N]
-        if output.iloc[-1]['TOTP'] > self.max_p and act_tuple[self.env.unwrapped.P] > 0:
+        if get_output_var(output, 'TOTP') > self.max_p and act_tuple[self.env.unwrapped.P] > 0:
             return -1e4 * act_tuple[self.env.unwrapped.P]
-        if output.iloc[-1]['TOTK'] > self.max_k and act_tuple[self.env.unwrapped.K] > 0:
+        if get_output_var(output, 'TOTK') > self.max_k and act_tuple[self.env.unwrapped.K] > 0:
             return -1e4 * act_tuple[self.env.unwrapped.K]
-        if output.iloc[-1]['TOTIRRIG'] > self.max_w and act_tuple[self.env.unwrapped.I] > 0:
+        if get_output_var(output, 'TOTIRRIG') > self.max_w and act_tuple[self.env.unwrapped.I] > 0:
             return -1e4 * act_tuple[self.env.unwrapped.I]
-        return np.nan_to_num(output.iloc[-1]['WSO'])
+        return np.nan_to_num(get_output_var(output, 'WSO'))
     
 